@@ -0,0 +1,26 @@
+"""add loudness_stats to lessons
+
+Revision ID: 290a64046cad
+Revises: c97eae12ffa1
+Create Date: 2025-10-30 11:40:03.936552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '290a64046cad'
+down_revision: Union[str, None] = 'c97eae12ffa1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('lessons', sa.Column('loudness_stats', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('lessons', 'loudness_stats')
@@ -14,7 +14,8 @@ from app.crud import user as user_crud
 from app.auth.jwt import create_access_token, create_refresh_token, verify_token
 from app.auth.dependencies import get_current_user
 from app.models import User
-from app.services.email import send_verification_email
+from app.crud import job as job_crud
+from app.jobs import JOB_SEND_VERIFICATION_EMAIL
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -64,17 +65,12 @@ async def register(
 
     await db.commit()
 
-    # Send verification email
+    # Send verification email (queued, sent by the worker)
     try:
-        await send_verification_email(
-            db=db,
-            email=user.email,
-            username=user.username,
-            token=user.verification_token
-        )
+        await job_crud.enqueue_job(db, JOB_SEND_VERIFICATION_EMAIL, {"user_id": user.id})
     except Exception as e:
         # Log error but don't fail registration
-        print(f"Failed to send verification email: {e}")
+        print(f"Failed to queue verification email: {e}")
 
     # Create tokens for the new user
     access_token = create_access_token(data={"sub": str(user.id), "email": user.email})
@@ -275,17 +271,12 @@ async def resend_verification(
 
     await db.commit()
 
-    # Send verification email
+    # Send verification email (queued, sent by the worker)
     try:
-        await send_verification_email(
-            db=db,
-            email=user.email,
-            username=user.username,
-            token=user.verification_token
-        )
+        await job_crud.enqueue_job(db, JOB_SEND_VERIFICATION_EMAIL, {"user_id": user.id})
     except Exception as e:
         # Log error but don't expose it to user
-        print(f"Failed to send verification email: {e}")
+        print(f"Failed to queue verification email: {e}")
 
     return {"message": "If this email is registered, a verification link has been sent"}
 
@@ -0,0 +1,80 @@
+"""
+Background jobs API endpoints.
+Status of queued work (audio processing, waveforms, emails) run by app.worker.
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.schemas.job import JobResponse, PaginatedJobsResponse
+from app.crud import job as job_crud
+from app.auth.dependencies import require_admin
+from app.models import User
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("", response_model=PaginatedJobsResponse)
+async def get_jobs(
+    status_filter: Optional[str] = Query(None, alias="status", description="queued, running, succeeded, failed"),
+    job_type: Optional[str] = Query(None, alias="type", description="Job type"),
+    skip: int = Query(0, ge=0, description="Skip records"),
+    limit: int = Query(50, ge=1, le=200, description="Limit records"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    List background jobs, newest first (Admin only).
+
+    Also returns the number of jobs per status (queue depth, failures).
+    """
+    items, total = await job_crud.get_jobs(db, status=status_filter, job_type=job_type, skip=skip, limit=limit)
+    counts = await job_crud.count_jobs_by_status(db)
+    return PaginatedJobsResponse(items=items, total=total, skip=skip, limit=limit, counts=counts)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Get job status (Admin only).
+
+    Poll after an upload (202 with job_id) until status is succeeded (the
+    result holds the processed audio) or failed (see last_error).
+    """
+    job = await job_crud.get_job_by_id(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+@router.post("/{job_id}/retry", response_model=JobResponse)
+async def retry_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Queue a failed job again with a fresh attempt budget (Admin only).
+    """
+    job = await job_crud.get_job_by_id(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    if job.status != job_crud.JOB_FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Only failed jobs can be retried (job is {job.status})"
+        )
+
+    return await job_crud.retry_job(db, job)
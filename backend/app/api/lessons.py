@@ -2,16 +2,22 @@
 Lessons API endpoints.
 """
 import os
-import tempfile
+import json
+import asyncio
+import time
+import secrets
+from datetime import datetime
+from pathlib import Path
 import shutil
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, UploadFile, File, BackgroundTasks
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, UploadFile, File
+from fastapi.responses import StreamingResponse, FileResponse, Response, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app.api.auth import get_current_user
-from app.models import User
+from app.auth.dependencies import AudioUrlSignature, get_audio_url_signature
+from app.models import User, UploadSession
 from app.schemas.lesson import (
     LessonWithRelations,
     LessonSeriesNested,
@@ -22,19 +28,69 @@ from app.schemas.lesson import (
     LessonUpdate
 )
 from app.crud import lesson as lesson_crud
+from app.crud import job as job_crud
+from app.crud import upload_session as upload_crud
+from app.jobs import (
+    JOB_PROCESS_LESSON_AUDIO,
+    JOB_GENERATE_LESSON_RENDITIONS,
+    JOB_GENERATE_LESSON_WAVEFORM,
+    JOB_GENERATE_ALL_WAVEFORMS,
+    JOB_COMPUTE_AUDIO_CHECKSUM,
+    JOB_RESTORE_AUDIO_ARTIFACT
+)
+from app.jobs.audio import release_audio_files
 from app.utils.audio import (
     get_audio_file_path,
-    parse_range_header,
+    parse_ranges,
     get_content_range_header,
-    get_chunk_size
+    get_chunk_size,
+    format_http_date,
+    is_not_modified,
+    if_range_matches,
+    select_audio_quality
+)
+from app.utils.audio_response import AudioFileResponse
+from app.utils.audio_index import audio_index, AudioIndexEntry
+from app.utils.audio_cache import hot_audio_cache
+from app.utils.artifact_store import artifact_store
+from app.utils.waveform_batch import get_batch_status, request_cancel
+from app.utils.audio_ingest import (
+    IngestedFile,
+    UploadTooLargeError,
+    MAX_UPLOAD_SIZE,
+    receive_upload,
+    iter_upload_file,
+    commit_upload,
+    discard_upload
+)
+from app.utils.audio_offload import build_offload_response, is_offload_enabled
+from app.utils.seek_index import write_seek_index, read_seek_index, lookup_offset
+from app.utils.waveform_peaks import read_peaks, WAVEFORM_PEAK_LEVELS
+from app.utils.hls import (
+    ensure_hls_package,
+    delete_hls_package,
+    etag_to_version,
+    get_hls_version_dir,
+    PLAYLIST_NAME,
+    PLAYLIST_MEDIA_TYPE,
+    SEGMENT_MEDIA_TYPE,
+    SEGMENT_PATTERN,
+    VERSION_PATTERN
 )
+from app.config import settings
 from app.utils.audio_processing import (
-    process_audio_file,
-    delete_audio_files
+    RENDITION_LADDER,
+    DEFAULT_QUALITY
 )
 
 router = APIRouter(prefix="/lessons", tags=["Lessons"])
 
+# Only the main MP3 rendition has a frame seek index
+SEEKABLE_MEDIA_TYPE = "audio/mpeg"
+
+# Retry-After of a waveform that the worker is still building
+WAVEFORM_RETRY_AFTER_SECONDS = 5
+
 
 def require_admin(current_user: User = Depends(get_current_user)) -> User:
     """Require admin role."""
@@ -46,8 +102,13 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def build_lesson_with_relations(lesson) -> LessonWithRelations:
-    """Helper function to build LessonWithRelations from Lesson model."""
+def build_lesson_with_relations(lesson, include_waveform: bool = True) -> LessonWithRelations:
+    """
+    Helper function to build LessonWithRelations from Lesson model.
+
+    Lists pass include_waveform=False: waveforms are served by
+    GET /lessons/{id}/waveform.
+    """
     # Build nested schemas
     series_nested = None
     if lesson.series:
@@ -84,12 +145,16 @@ def build_lesson_with_relations(lesson) -> LessonWithRelations:
         key: value for key, value in lesson.__dict__.items()
         if key not in ('series', 'teacher', 'book', 'theme', '_sa_instance_state')
     }
+    if not include_waveform:
+        lesson_data.pop('waveform_data', None)
 
     return LessonWithRelations(
         **lesson_data,
         display_title=lesson_crud.get_display_title(lesson),
         formatted_duration=lesson_crud.format_duration(lesson.duration_seconds),
         audio_url=lesson_crud.get_audio_url(lesson.id),
+        signed_audio_url=lesson_crud.get_signed_audio_url(lesson),
+        audio_qualities=lesson_crud.get_audio_qualities(lesson),
         tags_list=lesson_crud.parse_tags(lesson.tags),
         series=series_nested,
         teacher=teacher_nested,
@@ -141,7 +206,7 @@ async def get_all_lessons(
     )
 
     return {
-        "items": [build_lesson_with_relations(lesson) for lesson in lessons],
+        "items": [build_lesson_with_relations(lesson, include_waveform=False) for lesson in lessons],
         "total": total,
         "skip": skip,
         "limit": limit
@@ -192,6 +257,8 @@ async def update_lesson(
             detail="Lesson not found"
         )
 
+    audio_index.invalidate(lesson_id)
+
     return build_lesson_with_relations(lesson)
 
 
@@ -218,6 +285,8 @@ async def delete_lesson(
             detail="Lesson not found"
         )
 
+    audio_index.invalidate(lesson_id)
+
 
 @router.get("/{lesson_id}", response_model=LessonWithRelations)
 async def get_lesson(lesson_id: int, db: AsyncSession = Depends(get_db)):
@@ -241,49 +310,278 @@ async def get_lesson(lesson_id: int, db: AsyncSession = Depends(get_db)):
     return build_lesson_with_relations(lesson)
 
 
+async def resolve_audio_entry(lesson_id: int, quality: str = DEFAULT_QUALITY) -> AudioIndexEntry:
+    """
+    Resolve a lesson's audio file through the in-memory index.
+
+    The database is only queried when the lesson is not indexed yet.
+    Lessons without the requested rendition fall back to the main MP3.
+    Files evicted by the artifact quota are regenerated first. The access
+    is recorded for the quota's LRU order.
+
+    Args:
+        lesson_id: Lesson ID
+        quality: Rendition name (default: main processed MP3)
+
+    Returns:
+        Audio index entry (path, size, mtime, etag, media type)
+
+    Raises:
+        HTTPException: 404 if the lesson or its audio file does not exist
+    """
+    entry = audio_index.get(lesson_id, quality)
+    if entry is None:
+        entry = await load_audio_entry(lesson_id, quality)
+    artifact_store.touch(entry.path)
+    return entry
+
+
+async def load_audio_entry(lesson_id: int, quality: str) -> AudioIndexEntry:
+    """Resolve a lesson's audio file from the database into the index (see resolve_audio_entry)."""
+
+    # Index miss - look up the lesson (audio fields only, no relationships)
+    async with AsyncSessionLocal() as db:
+        audio_info = await lesson_crud.get_lesson_audio_info(db, lesson_id)
+
+    if not audio_info:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found"
+        )
+
+    lesson_audio_path, renditions_json, audio_version = audio_info
+
+    rendition = lesson_crud.parse_renditions(renditions_json).get(quality)
+    if quality != DEFAULT_QUALITY and rendition:
+        rendition_path = get_audio_file_path(audio_path=rendition["path"])
+        if rendition_path:
+            return audio_index.load(
+                lesson_id, quality, rendition_path,
+                media_type=str(RENDITION_LADDER[quality]["media_type"]),
+                audio_version=audio_version
+            )
+        # Evicted by the artifact quota: the worker rebuilds it, the MP3 is served meanwhile
+        await request_artifact_restore(rendition["path"])
+
+    # Get audio file path using lesson's audio_path field
+    audio_path = get_audio_file_path(audio_path=lesson_audio_path, lesson_id=lesson_id)
+    if not audio_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio file not found"
+        )
+
+    # Cached under the requested quality too, so a missing rendition
+    # does not cost a query on every request
+    return audio_index.load(
+        lesson_id, quality, audio_path,
+        media_type=str(RENDITION_LADDER[DEFAULT_QUALITY]["media_type"]),
+        audio_version=audio_version
+    )
+
+
+async def request_artifact_restore(path: str) -> None:
+    """
+    Queue the regeneration of an evicted rendition, unless it is already queued.
+
+    Args:
+        path: Rendition path relative to AUDIO_FILES_PATH
+    """
+    async with AsyncSessionLocal() as db:
+        if await job_crud.find_unfinished_job(db, JOB_RESTORE_AUDIO_ARTIFACT, path=path) is None:
+            await job_crud.enqueue_job(db, JOB_RESTORE_AUDIO_ARTIFACT, {"path": path})
+
+
+async def get_seek_offset(audio_path: Path, seconds: float) -> int:
+    """
+    Get the byte offset for a time position, building the seek index if missing.
+
+    Args:
+        audio_path: Path to processed MP3 file
+        seconds: Position in seconds
+
+    Returns:
+        Byte offset of the frame playing at that time
+    """
+    offset = lookup_offset(audio_path, seconds)
+    if offset is None:
+        await asyncio.to_thread(write_seek_index, audio_path)
+        offset = lookup_offset(audio_path, seconds)
+    return offset or 0
+
+
+async def check_signed_version(
+    lesson_id: int,
+    signature: AudioUrlSignature,
+    quality: str = DEFAULT_QUALITY,
+    entry: Optional[AudioIndexEntry] = None
+) -> AudioIndexEntry:
+    """
+    Resolve a lesson's audio entry for a signed URL, rejecting URLs signed for older audio.
+
+    Args:
+        lesson_id: Lesson ID
+        signature: Verified URL signature
+        quality: Rendition name
+        entry: Entry already resolved for this request, if any
+
+    Returns:
+        Audio index entry of the signed version
+
+    Raises:
+        HTTPException: 410 if the lesson audio was replaced since signing
+    """
+    if entry is None:
+        entry = await resolve_audio_entry(lesson_id, quality)
+    if entry.audio_version != signature.version:
+        # The index may predate an upload made through another worker
+        audio_index.invalidate(lesson_id)
+        entry = await resolve_audio_entry(lesson_id, quality)
+        if entry.audio_version != signature.version:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Audio URL is stale, request the lesson again"
+            )
+    return entry
+
+
 @router.get("/{lesson_id}/audio")
 async def stream_audio(
     lesson_id: int,
     request: Request,
-    db: AsyncSession = Depends(get_db)
+    quality: Optional[str] = Query(None, description="Rendition: low (24k Opus), medium (48k AAC), high (64k MP3)"),
+    t: Optional[float] = Query(None, ge=0, description="Start position in seconds (uses the seek index)"),
+    signature: Optional[AudioUrlSignature] = Depends(get_audio_url_signature)
 ):
     """
     Stream audio file with Range request support.
 
     Supports HTTP Range requests for partial content delivery,
-    which is essential for audio streaming and seeking.
+    which is essential for audio streaming and seeking. Several ranges in
+    one request (e.g. MP3 header + seek target) are coalesced and returned
+    as a multipart/byteranges body.
+
+    Emits a strong ETag and Last-Modified, answers If-None-Match /
+    If-Modified-Since with 304 and honours If-Range, so cached downloads
+    can be revalidated without transferring the file again.
+
+    With AUDIO_OFFLOAD_MODE set, the response is an X-Accel-Redirect /
+    X-Sendfile header and the reverse proxy serves the file.
+
+    File lookups go through the in-memory audio index (see
+    resolve_audio_entry).
+
+    The rendition is chosen by ?quality= or, if absent, by the Save-Data
+    and ECT client hints; lessons without that rendition get the main MP3.
+
+    Signed URLs (?v=&exp=&sig=, see lesson signed_audio_url) are checked
+    with an HMAC only. A valid one makes the response publicly cacheable
+    until it expires; a URL signed for an older audio version gets 410.
+
+    ?t= without a Range header is served as if "Range: bytes=<offset>-"
+    had been sent: the response is a 206 with a synthesized Content-Range
+    starting at the frame playing at t, not a 200. Clients must not treat
+    it as the whole file (e.g. cache it as a download). ?t= on a rendition
+    other than MP3 is rejected with 400.
 
     Args:
         lesson_id: Lesson ID
         request: FastAPI request object (for Range header)
+        quality: Rendition name
+        t: Start position in seconds; answered as a range from the exact
+           frame offset in the seek index (ignored if a Range header is sent)
+        signature: Verified ?v=&exp=&sig= of a signed URL (see get_audio_url_signature)
 
     Returns:
+        AudioFileResponse (pread in a worker thread) or
         StreamingResponse with audio/mpeg content
     """
-    # Check if lesson exists
-    lesson = await lesson_crud.get_lesson_by_id(db, lesson_id)
-    if not lesson:
+    if quality is not None and quality not in RENDITION_LADDER:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Lesson not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown quality. Available: {', '.join(RENDITION_LADDER)}"
         )
 
-    # Get audio file path using lesson's audio_path field
-    audio_path = get_audio_file_path(audio_path=lesson.audio_path, lesson_id=lesson_id)
-    if not audio_path:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Audio file not found"
-        )
+    selected_quality = select_audio_quality(
+        quality,
+        request.headers.get("Save-Data"),
+        request.headers.get("ECT"),
+        default=DEFAULT_QUALITY
+    )
+    entry = await resolve_audio_entry(lesson_id, selected_quality)
 
-    # Get file size
-    file_size = os.path.getsize(audio_path)
+    if signature is not None:
+        entry = await check_signed_version(lesson_id, signature, selected_quality, entry)
 
-    # Check for Range header
+    audio_path = entry.path
+    file_size = entry.size
+    etag = entry.etag
+    media_type = entry.media_type
+
+    validator_headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": format_http_date(entry.mtime),
+        "Cache-Control": "no-cache",
+    }
+    if signature is not None:
+        # The URL names one audio version, so proxies may keep it until it expires
+        max_age = max(0, signature.expires - int(time.time()))
+        validator_headers["Cache-Control"] = f"public, max-age={max_age}"
+    if quality is None:
+        # Response depends on client hints
+        validator_headers["Vary"] = "Save-Data, ECT"
+
+    # Reverse-proxy offload: the proxy sends the bytes and handles Range and
+    # conditional requests itself (with its own validators). ?t= needs the
+    # seek index, so those requests are still served here.
+    if t is None and is_offload_enabled():
+        offload_headers = {"Cache-Control": validator_headers["Cache-Control"]}
+        if "Vary" in validator_headers:
+            offload_headers["Vary"] = validator_headers["Vary"]
+        offload_response = build_offload_response(audio_path, media_type, offload_headers)
+        if offload_response is not None:
+            return offload_response
+
+    # Conditional GET: the client already has this exact file
+    if is_not_modified(
+        request.headers.get("If-None-Match"),
+        request.headers.get("If-Modified-Since"),
+        etag,
+        entry.mtime
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers)
+
+    # Check for Range header (ignored if If-Range no longer matches the file)
     range_header = request.headers.get("Range")
+    if range_header and not if_range_matches(request.headers.get("If-Range"), etag, entry.mtime):
+        range_header = None
+
+    # Memory map of the file if it is hot (None otherwise)
+    buffer = await hot_audio_cache.get(audio_path, etag, file_size)
+
+    # Time-based seek: ?t=<seconds> becomes a range from the frame playing at t
+    if t is not None and not range_header:
+        if media_type != SEEKABLE_MEDIA_TYPE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Time-based seek is only supported for MP3"
+            )
+        offset = await get_seek_offset(audio_path, t)
+        range_header = f"bytes={offset}-"
 
     # No range request - return full file
     if not range_header:
+        if settings.AUDIO_STREAMING_ENGINE != "generator":
+            return AudioFileResponse(
+                audio_path,
+                file_size,
+                media_type=media_type,
+                method=request.method,
+                buffer=buffer,
+                headers=validator_headers
+            )
+
         def iterfile():
             with open(audio_path, "rb") as f:
                 chunk_size = get_chunk_size()
@@ -292,24 +590,53 @@ async def stream_audio(
 
         return StreamingResponse(
             iterfile(),
-            media_type="audio/mpeg",
+            media_type=media_type,
             headers={
-                "Accept-Ranges": "bytes",
+                **validator_headers,
                 "Content-Length": str(file_size),
             }
         )
 
-    # Parse range header
-    range_data = parse_range_header(range_header, file_size)
-    if not range_data:
+    # Parse range header (one or several ranges, coalesced)
+    ranges = parse_ranges(range_header, file_size)
+    if not ranges:
         raise HTTPException(
             status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
-            detail="Invalid range"
+            detail="Invalid range",
+            headers={"Content-Range": f"bytes */{file_size}"}
         )
 
-    start, end = range_data
+    # Several ranges - multipart/byteranges body
+    if len(ranges) > 1:
+        return AudioFileResponse(
+            audio_path,
+            file_size,
+            ranges=ranges,
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            method=request.method,
+            buffer=buffer,
+            headers=validator_headers
+        )
+
+    start, end = ranges[0]
     content_length = end - start + 1
 
+    if settings.AUDIO_STREAMING_ENGINE != "generator":
+        return AudioFileResponse(
+            audio_path,
+            file_size,
+            ranges=ranges,
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            method=request.method,
+            buffer=buffer,
+            headers={
+                **validator_headers,
+                "Content-Range": get_content_range_header(start, end, file_size),
+            }
+        )
+
     # Stream partial content
     def iterfile_partial():
         with open(audio_path, "rb") as f:
@@ -328,23 +655,368 @@ async def stream_audio(
     return StreamingResponse(
         iterfile_partial(),
         status_code=status.HTTP_206_PARTIAL_CONTENT,
-        media_type="audio/mpeg",
+        media_type=media_type,
         headers={
+            **validator_headers,
             "Content-Range": get_content_range_header(start, end, file_size),
-            "Accept-Ranges": "bytes",
             "Content-Length": str(content_length),
         }
     )
 
 
+@router.get("/{lesson_id}/seek-index")
+async def get_lesson_seek_index(lesson_id: int, request: Request):
+    """
+    Get the time -> byte offset seek table of a lesson's MP3.
+
+    offsets[k] is the byte offset of the MP3 frame playing at
+    k * interval_ms, so a seek to any position costs exactly one range
+    request. The ETag matches the audio file's ETag.
+
+    Args:
+        lesson_id: Lesson ID
+
+    Returns:
+        Dictionary with interval_ms, duration_ms and offsets
+    """
+    entry = await resolve_audio_entry(lesson_id)
+
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": "no-cache",
+    }
+    if is_not_modified(request.headers.get("If-None-Match"), None, entry.etag, entry.mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    seek_index = read_seek_index(entry.path)
+    if seek_index is None:
+        try:
+            await asyncio.to_thread(write_seek_index, entry.path)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error building seek index: {str(e)}"
+            )
+        seek_index = read_seek_index(entry.path)
+
+    return JSONResponse(content=seek_index, headers=headers)
+
+
+@router.get("/{lesson_id}/waveform")
+async def get_lesson_waveform(
+    lesson_id: int,
+    request: Request,
+    points: int = Query(
+        WAVEFORM_PEAK_LEVELS[0], ge=10, le=WAVEFORM_PEAK_LEVELS[-1],
+        description="Number of waveform points"
+    ),
+    format: str = Query("json", pattern="^(json|binary)$", description="json or binary (uint8 per point)"),
+    signature: Optional[AudioUrlSignature] = Depends(get_audio_url_signature)
+):
+    """
+    Get the waveform peaks of a lesson's audio at a given resolution.
+
+    Peaks (0-255) come from the multi-resolution sidecar next to the MP3.
+    The ETag follows the audio file's ETag, so clients and proxies
+    revalidate with a 304. If the sidecar does not exist yet (older
+    lessons), the worker builds it: the response is 202 with Retry-After
+    until the peaks are there. One job is queued per audio file; if it
+    failed for good (e.g. an undecodable MP3) the response is 404 until
+    new audio is uploaded.
+
+    Args:
+        lesson_id: Lesson ID
+        points: Number of points over the whole lesson
+        format: "json" or "binary" (application/octet-stream, one byte per point)
+        signature: Verified ?v=&exp=&sig= of a signed URL (see stream_audio)
+
+    Returns:
+        Dictionary with points, duration_ms and peaks (or raw bytes), or
+        202 while the peaks are generated (404 - no audio or no waveform)
+    """
+    if signature is not None:
+        entry = await check_signed_version(lesson_id, signature)
+    else:
+        entry = await resolve_audio_entry(lesson_id)
+
+    etag = f'{entry.etag[:-1]}-w{points}{"b" if format == "binary" else ""}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, no-cache",
+    }
+    if is_not_modified(request.headers.get("If-None-Match"), None, etag, entry.mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    peaks = read_peaks(entry.path, points)
+    if peaks is None:
+        # No decoding on API nodes: the generate_lesson_waveform job writes the sidecar
+        payload = {"lesson_id": lesson_id, "samples": 100}
+        audio_modified = datetime.utcfromtimestamp(entry.mtime)
+        async with AsyncSessionLocal() as db:
+            job = await job_crud.find_latest_job(db, JOB_GENERATE_LESSON_WAVEFORM, payload)
+            if job is None or job.created_at < audio_modified:
+                # Never run, or run for a previous upload
+                await job_crud.enqueue_job(db, JOB_GENERATE_LESSON_WAVEFORM, payload)
+            elif job.status not in (job_crud.JOB_QUEUED, job_crud.JOB_RUNNING):
+                # Already run for this audio: failed for good, nothing to retry
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Waveform is not available for this audio"
+                )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"message": "Waveform is being generated", "lesson_id": lesson_id},
+            headers={"Retry-After": str(WAVEFORM_RETRY_AFTER_SECONDS), "Cache-Control": "no-store"}
+        )
+
+    data, duration_ms = peaks
+    if format == "binary":
+        return Response(content=data, media_type="application/octet-stream", headers=headers)
+
+    return JSONResponse(
+        content={"points": points, "duration_ms": duration_ms, "peaks": list(data)},
+        headers=headers
+    )
+
+
+# ============================================
+# HLS Delivery Endpoints
+# ============================================
+
+def sign_playlist_uris(playlist: str, query: str) -> str:
+    """
+    Append a signed URL's query string to every URI line of an m3u8 playlist.
+
+    Args:
+        playlist: Playlist text
+        query: Query string of the signed playlist request
+
+    Returns:
+        Playlist whose segment requests carry the same signature
+    """
+    lines = [
+        f"{line}?{query}" if line and not line.startswith("#") else line
+        for line in playlist.splitlines()
+    ]
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/{lesson_id}/hls/index.m3u8")
+async def get_hls_playlist(
+    lesson_id: int,
+    request: Request,
+    signature: Optional[AudioUrlSignature] = Depends(get_audio_url_signature)
+):
+    """
+    Get the HLS playlist for a lesson.
+
+    The lesson's processed MP3 is split into fixed-duration segments on the
+    first request (HLS_SEGMENT_SECONDS). Segment URIs include the audio
+    version, so segments are immutable and the playlist changes on re-upload.
+    A signed playlist URL (?v=&exp=&sig=, as for /audio) passes its query
+    string on to the segment URIs.
+
+    Args:
+        lesson_id: Lesson ID
+        signature: Verified ?v=&exp=&sig= of a signed URL
+
+    Returns:
+        m3u8 playlist (application/vnd.apple.mpegurl)
+    """
+    if signature is not None:
+        entry = await check_signed_version(lesson_id, signature)
+    else:
+        entry = await resolve_audio_entry(lesson_id)
+    version = etag_to_version(entry.etag)
+
+    playlist_headers = {
+        "ETag": entry.etag,
+        "Cache-Control": "no-cache",
+    }
+    if is_not_modified(request.headers.get("If-None-Match"), None, entry.etag, entry.mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=playlist_headers)
+
+    try:
+        version_dir = await ensure_hls_package(lesson_id, entry.path, version)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error packaging HLS: {str(e)}"
+        )
+
+    artifact_store.touch(version_dir)
+    playlist_path = version_dir / PLAYLIST_NAME
+    if signature is not None:
+        playlist = await asyncio.to_thread(playlist_path.read_text)
+        return Response(
+            content=sign_playlist_uris(playlist, request.url.query),
+            media_type=PLAYLIST_MEDIA_TYPE,
+            headers=playlist_headers
+        )
+    return AudioFileResponse(
+        playlist_path,
+        os.path.getsize(playlist_path),
+        media_type=PLAYLIST_MEDIA_TYPE,
+        method=request.method,
+        headers=playlist_headers
+    )
+
+
+@router.get("/{lesson_id}/hls/{version}/{segment}")
+async def get_hls_segment(
+    lesson_id: int,
+    version: str,
+    segment: str,
+    request: Request,
+    signature: Optional[AudioUrlSignature] = Depends(get_audio_url_signature)
+):
+    """
+    Get one HLS segment of a lesson.
+
+    Segments never change for a given version and are served with a
+    long-lived immutable Cache-Control header.
+
+    Args:
+        lesson_id: Lesson ID
+        version: Audio version from the playlist
+        segment: Segment file name (e.g., "segment_00012.ts")
+        signature: Verified ?v=&exp=&sig= copied from a signed playlist
+
+    Returns:
+        MPEG-TS segment (video/mp2t)
+    """
+    if not VERSION_PATTERN.match(version) or not SEGMENT_PATTERN.match(segment):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Segment not found"
+        )
+
+    version_dir = get_hls_version_dir(lesson_id, version)
+    if not version_dir.exists():
+        # Package evicted by the artifact quota: rebuild it if still current
+        entry = await resolve_audio_entry(lesson_id)
+        if etag_to_version(entry.etag) == version:
+            try:
+                await ensure_hls_package(lesson_id, entry.path, version)
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Error packaging HLS: {str(e)}"
+                )
+
+    segment_path = version_dir / segment
+    try:
+        segment_size = os.path.getsize(segment_path)
+    except OSError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Segment not found"
+        )
+
+    segment_headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    offload_response = build_offload_response(segment_path, SEGMENT_MEDIA_TYPE, segment_headers)
+    if offload_response is not None:
+        return offload_response
+
+    return AudioFileResponse(
+        segment_path,
+        segment_size,
+        media_type=SEGMENT_MEDIA_TYPE,
+        method=request.method,
+        headers=segment_headers
+    )
+
+
 # ============================================
 # Audio Upload/Management Endpoints
 # ============================================
 
-@router.post("/{lesson_id}/audio", status_code=status.HTTP_200_OK)
+async def enqueue_lesson_audio(
+    lesson_id: int,
+    ingested: IngestedFile,
+    db: AsyncSession,
+    upload: Optional[UploadSession] = None
+) -> dict:
+    """
+    Publish an ingested upload and queue its processing for the worker.
+
+    The upload is renamed to its content-addressed name in original/ and a
+    process_lesson_audio job is queued (see app.jobs.audio); the API node
+    does no transcoding.
+
+    Args:
+        lesson_id: Lesson ID
+        ingested: Upload streamed into original/ (see receive_upload)
+        db: Database session
+        upload: Resumable upload session being completed: it is marked
+                completed in the job's transaction, and its part file is
+                kept if queueing fails so completion can be retried
+
+    Returns:
+        202 response dictionary with the job id to poll
+    """
+    try:
+        original_name = commit_upload(ingested, keep_part=upload is not None)
+        job = await job_crud.enqueue_job(db, JOB_PROCESS_LESSON_AUDIO, {
+            "lesson_id": lesson_id,
+            "original_name": original_name,
+            "sha256": ingested.sha256,
+            "size": ingested.size
+        }, commit=upload is None)
+        if upload is not None:
+            await upload_crud.complete_upload_session(db, upload, ingested.sha256, job.id)
+    except Exception as e:
+        await db.rollback()
+        if upload is None:
+            discard_upload(ingested)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error queueing audio processing: {str(e)}"
+        )
+
+    # No-op once the upload was renamed into place
+    discard_upload(ingested)
+
+    return {
+        "message": "Audio uploaded, processing queued.",
+        "lesson_id": lesson_id,
+        "job_id": job.id,
+        "status_url": f"{settings.API_V1_PREFIX}/jobs/{job.id}",
+        "original_size": ingested.size,
+        "original_sha256": ingested.sha256
+    }
+
+
+async def ingest_upload(chunks, filename: str) -> IngestedFile:
+    """
+    Stream an upload into original/, mapping ingestion errors to HTTP errors.
+
+    Args:
+        chunks: Async iterator of body chunks
+        filename: Original name of the uploaded file
+
+    Returns:
+        Ingested file
+    """
+    try:
+        return await receive_upload(chunks, filename, max_size=MAX_UPLOAD_SIZE)
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File too large. Maximum size is 200 MB"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error uploading file: {str(e)}"
+        )
+
+
+@router.post("/{lesson_id}/audio", status_code=status.HTTP_202_ACCEPTED)
 async def upload_lesson_audio(
     lesson_id: int,
-    background_tasks: BackgroundTasks,
     audio_file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -355,12 +1027,16 @@ async def upload_lesson_audio(
     Maximum file size: 200 MB
     Supported formats: mp3, wav, m4a, ogg, flac, etc.
 
-    Processing:
-    - Saves original file to original/ directory
+    Saves the original to original/ and queues processing for the worker;
+    returns 202 with job_id (poll GET /jobs/{job_id}). The job:
     - Converts to MP3, mono, 64 kbps
+    - Generates extra renditions (AUDIO_RENDITIONS, e.g. 24k Opus, 48k AAC)
     - Normalizes volume
     - Auto-detects duration
     - Saves processed file to processed/ directory
+
+    For large files prefer POST /{lesson_id}/audio/stream, which skips the
+    multipart spooling.
     """
     # Check lesson exists
     lesson = await lesson_crud.get_lesson_by_id(db, lesson_id)
@@ -370,85 +1046,62 @@ async def upload_lesson_audio(
             detail="Lesson not found"
         )
 
-    # Validate file size (200 MB max)
-    MAX_FILE_SIZE = 200 * 1024 * 1024  # 200 MB in bytes
+    ingested = await ingest_upload(iter_upload_file(audio_file), audio_file.filename)
+    return await enqueue_lesson_audio(lesson_id, ingested, db)
 
-    # Save uploaded file to temporary location
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{audio_file.filename}") as temp_file:
-        try:
-            # Read and write in chunks to handle large files
-            file_size = 0
-            chunk_size = 1024 * 1024  # 1 MB chunks
 
-            while True:
-                chunk = await audio_file.read(chunk_size)
-                if not chunk:
-                    break
-                file_size += len(chunk)
+@router.post("/{lesson_id}/audio/stream", status_code=status.HTTP_202_ACCEPTED)
+async def stream_upload_lesson_audio(
+    lesson_id: int,
+    request: Request,
+    filename: str = Query(..., min_length=1, max_length=255, description="Original file name (with extension)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Upload audio as the raw request body (Admin only).
 
-                # Check file size during upload
-                if file_size > MAX_FILE_SIZE:
-                    temp_file.close()
-                    os.unlink(temp_file.name)
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail=f"File too large. Maximum size is 200 MB"
-                    )
+    The body is streamed straight into original/ with non-blocking writes
+    while its size and SHA-256 are computed, then handed to the worker
+    without another copy. Same processing and limits as the multipart upload.
 
-                temp_file.write(chunk)
+    Example:
+        curl -X POST --data-binary @lesson.wav \
+            "/api/lessons/1/audio/stream?filename=lesson.wav"
 
-            temp_file_path = temp_file.name
-        except Exception as e:
-            temp_file.close()
-            if os.path.exists(temp_file.name):
-                os.unlink(temp_file.name)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error uploading file: {str(e)}"
-            )
-
-    try:
-        # Delete old audio files if they exist
-        if lesson.original_audio_path or lesson.audio_path:
-            delete_audio_files(lesson.original_audio_path, lesson.audio_path)
+    Args:
+        lesson_id: Lesson ID
+        filename: Original file name (the extension is kept)
 
-        # Process audio file
-        original_path, processed_path, duration = process_audio_file(
-            temp_file_path,
-            audio_file.filename
+    Returns:
+        202 response with job_id, original size and SHA-256
+    """
+    lesson = await lesson_crud.get_lesson_by_id(db, lesson_id)
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found"
         )
 
-        # Update lesson in database
-        lesson_update = LessonUpdate(
-            original_audio_path=original_path,
-            audio_path=processed_path,
-            duration_seconds=duration
+    content_length = request.headers.get("Content-Length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File too large. Maximum size is 200 MB"
         )
-        updated_lesson = await lesson_crud.update_lesson(db, lesson_id, lesson_update)
-
-        # Schedule waveform generation in background (non-blocking)
-        background_tasks.add_task(generate_waveform_background, lesson_id=lesson_id, samples=100)
 
-        return {
-            "message": "Audio uploaded and processed successfully. Waveform generation started in background.",
-            "original_path": original_path,
-            "processed_path": processed_path,
-            "duration_seconds": duration,
-            "lesson_id": lesson_id
-        }
-
-    except Exception as e:
+    ingested = await ingest_upload(request.stream(), filename)
+    if ingested.size == 0:
+        discard_upload(ingested)
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing audio: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Empty request body"
         )
-    finally:
-        # Clean up temporary file
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
 
+    return await enqueue_lesson_audio(lesson_id, ingested, db)
 
-@router.put("/{lesson_id}/audio", status_code=status.HTTP_200_OK)
+
+@router.put("/{lesson_id}/audio", status_code=status.HTTP_202_ACCEPTED)
 async def replace_lesson_audio(
     lesson_id: int,
     audio_file: UploadFile = File(...),
@@ -473,8 +1126,8 @@ async def delete_lesson_audio(
     """
     Delete audio files for a lesson (Admin only).
 
-    Removes both original and processed audio files.
-    Updates lesson to remove audio paths and duration.
+    Updates lesson to remove audio paths and duration, then removes the
+    original and processed files unless another lesson shares them.
     """
     # Check lesson exists
     lesson = await lesson_crud.get_lesson_by_id(db, lesson_id)
@@ -491,17 +1144,29 @@ async def delete_lesson_audio(
             detail="Lesson has no audio files"
         )
 
-    try:
-        # Delete audio files
-        delete_audio_files(lesson.original_audio_path, lesson.audio_path)
+    old_original_path = lesson.original_audio_path
+    old_processed_path = lesson.audio_path
+    old_renditions = lesson_crud.parse_renditions(lesson.renditions)
 
+    try:
         # Update lesson in database
-        lesson_update = LessonUpdate(
+        await lesson_crud.update_lesson_audio(
+            db, lesson_id,
             original_audio_path=None,
+            original_sha256=None,
             audio_path=None,
-            duration_seconds=None
+            duration_seconds=None,
+            renditions=None,
+            loudness_stats=None,
+            audio_size=None,
+            audio_sha256=None,
+            audio_version=(lesson.audio_version or 0) + 1
         )
-        await lesson_crud.update_lesson(db, lesson_id, lesson_update)
+        audio_index.invalidate(lesson_id)
+        delete_hls_package(lesson_id)
+
+        # Delete the files unless other lessons share them
+        await release_audio_files(db, old_original_path, old_processed_path, old_renditions)
 
         return {
             "message": "Audio files deleted successfully",
@@ -515,59 +1180,93 @@ async def delete_lesson_audio(
         )
 
 
-# ============================================
-# Background Task Functions
-# ============================================
-
-async def generate_waveform_background(lesson_id: int, samples: int = 100):
+@router.post("/{lesson_id}/renditions", status_code=status.HTTP_202_ACCEPTED)
+async def regenerate_lesson_renditions(
+    lesson_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
     """
-    Background task to generate waveform data for a lesson's audio file.
-    This runs asynchronously after audio upload without blocking the response.
+    (Re)generate the extra audio renditions of a lesson from its original (Admin only).
+
+    Useful for lessons uploaded before the rendition ladder existed or after
+    AUDIO_RENDITIONS changed. Runs in the worker.
 
     Args:
         lesson_id: Lesson ID
-        samples: Number of waveform samples to generate (default: 100)
+
+    Returns:
+        Dictionary with the job id to poll
     """
-    from app.utils.waveform import generate_waveform_json
-    from app.utils.audio import get_audio_file_path
-    from app.crud.lesson import update_lesson
-    from app.schemas.lesson import LessonUpdate
-    from app.database import AsyncSessionLocal
+    lesson = await lesson_crud.get_lesson_by_id(db, lesson_id)
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found"
+        )
 
-    # Create new database session for background task
-    async with AsyncSessionLocal() as db:
-        try:
-            # Get lesson
-            lesson = await lesson_crud.get_lesson_by_id(db, lesson_id)
-            if not lesson or not lesson.audio_path:
-                print(f"[Waveform BG] Skipping lesson {lesson_id}: No audio file")
-                return
+    if not lesson.original_audio_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson has no original audio file"
+        )
 
-            # Get audio file path
-            audio_path = get_audio_file_path(audio_path=lesson.audio_path, lesson_id=lesson_id)
-            if not audio_path:
-                print(f"[Waveform BG] Audio file not found for lesson {lesson_id}: {lesson.audio_path}")
-                return
+    job = await job_crud.enqueue_job(db, JOB_GENERATE_LESSON_RENDITIONS, {"lesson_id": lesson_id})
 
-            # Generate waveform data
-            print(f"[Waveform BG] Generating waveform for lesson {lesson_id}...")
-            waveform_json = generate_waveform_json(audio_path, samples=samples)
+    return {
+        "message": "Rendition generation queued",
+        "lesson_id": lesson_id,
+        "job_id": job.id
+    }
 
-            # Update lesson with waveform data
-            lesson_update = LessonUpdate(waveform_data=waveform_json)
-            await update_lesson(db, lesson_id, lesson_update)
 
-            print(f"[Waveform BG] Successfully generated waveform for lesson {lesson_id}")
+@router.post("/compute-audio-checksums", status_code=status.HTTP_202_ACCEPTED)
+async def compute_audio_checksums(
+    recompute: bool = Query(False, description="Recompute even if checksum already exists"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Compute size and SHA-256 for lessons uploaded before they were stored (Admin only).
 
-        except Exception as e:
-            print(f"[Waveform BG] Error generating waveform for lesson {lesson_id}: {str(e)}")
+    Queues one job per lesson for the worker.
+
+    Args:
+        recompute: If True, recompute checksums that already exist
+
+    Returns:
+        Dictionary with count of lessons to be processed
+    """
+    from sqlalchemy import select, and_
+    from app.models import Lesson
+
+    query = select(Lesson.id).where(
+        and_(
+            Lesson.audio_path.isnot(None),
+            Lesson.audio_path != ''
+        )
+    )
+    if not recompute:
+        query = query.where(Lesson.audio_sha256.is_(None))
+
+    result = await db.execute(query)
+    lesson_ids = result.scalars().all()
+
+    for lesson_id in lesson_ids:
+        await job_crud.enqueue_job(db, JOB_COMPUTE_AUDIO_CHECKSUM, {"lesson_id": lesson_id})
+
+    return {
+        "message": f"Checksum computation queued for {len(lesson_ids)} lessons",
+        "lessons_count": len(lesson_ids),
+        "recompute": recompute
+    }
 
 
 # ============================================
 # Waveform Generation Endpoints
 # ============================================
 
-@router.post("/{lesson_id}/generate-waveform", status_code=status.HTTP_200_OK)
+@router.post("/{lesson_id}/generate-waveform", status_code=status.HTTP_202_ACCEPTED)
 async def generate_lesson_waveform(
     lesson_id: int,
     samples: int = Query(100, ge=50, le=500, description="Number of waveform samples"),
@@ -577,18 +1276,15 @@ async def generate_lesson_waveform(
     """
     Generate waveform data for a lesson's audio file (Admin only).
 
+    Runs in the worker; the job result holds the waveform data.
+
     Args:
         lesson_id: Lesson ID
         samples: Number of waveform samples to generate (default: 100)
 
     Returns:
-        Dictionary with waveform data and lesson info
+        Dictionary with the job id to poll
     """
-    from app.utils.waveform import generate_waveform_json
-    from app.utils.audio import get_audio_file_path
-    from app.crud.lesson import update_lesson
-    from app.schemas.lesson import LessonUpdate
-
     # Check lesson exists
     lesson = await lesson_crud.get_lesson_by_id(db, lesson_id)
     if not lesson:
@@ -604,39 +1300,20 @@ async def generate_lesson_waveform(
             detail="Lesson has no audio file"
         )
 
-    # Get audio file path
-    audio_path = get_audio_file_path(audio_path=lesson.audio_path, lesson_id=lesson_id)
-    if not audio_path:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Audio file not found: {lesson.audio_path}"
-        )
-
-    try:
-        # Generate waveform data
-        waveform_json = generate_waveform_json(audio_path, samples=samples)
-
-        # Update lesson with waveform data
-        lesson_update = LessonUpdate(waveform_data=waveform_json)
-        await update_lesson(db, lesson_id, lesson_update)
-
-        return {
-            "message": "Waveform generated successfully",
-            "lesson_id": lesson_id,
-            "waveform_data": waveform_json,
-            "samples": samples
-        }
+    job = await job_crud.enqueue_job(
+        db, JOB_GENERATE_LESSON_WAVEFORM, {"lesson_id": lesson_id, "samples": samples}
+    )
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error generating waveform: {str(e)}"
-        )
+    return {
+        "message": "Waveform generation queued",
+        "lesson_id": lesson_id,
+        "job_id": job.id,
+        "samples": samples
+    }
 
 
 @router.post("/generate-all-waveforms", status_code=status.HTTP_202_ACCEPTED)
 async def generate_all_waveforms(
-    background_tasks: BackgroundTasks,
     samples: int = Query(100, ge=50, le=500, description="Number of waveform samples"),
     regenerate: bool = Query(False, description="Regenerate even if waveform already exists"),
     db: AsyncSession = Depends(get_db),
@@ -645,47 +1322,65 @@ async def generate_all_waveforms(
     """
     Generate waveforms for all lessons with audio files (Admin only).
 
-    This endpoint starts background tasks to generate waveforms for all lessons.
-    Returns immediately with a count of lessons that will be processed.
+    Queues a generate_all_waveforms job: the worker runs it on the waveform
+    process pool (WAVEFORM_BATCH_WORKERS lessons at a time). Progress is
+    checkpointed and a batch interrupted by a worker crash is resumed;
+    follow it with GET /generate-all-waveforms/status.
 
     Args:
         samples: Number of waveform samples to generate (default: 100)
         regenerate: If True, regenerate waveforms even if they already exist
 
     Returns:
-        Dictionary with count of lessons to be processed
+        Dictionary with the job id to poll
     """
-    from sqlalchemy import select, and_
-    from app.models import Lesson
-
-    # Build query to find lessons that need waveform generation
-    query = select(Lesson).where(
-        and_(
-            Lesson.audio_path.isnot(None),
-            Lesson.audio_path != ''
-        )
-    )
-
-    # If not regenerating, only get lessons without waveform
-    if not regenerate:
-        query = query.where(
-            Lesson.waveform_data.is_(None)
+    if await job_crud.find_unfinished_job(db, JOB_GENERATE_ALL_WAVEFORMS) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Waveform generation is already running"
         )
 
-    result = await db.execute(query)
-    lessons = result.scalars().all()
-
-    # Schedule background task for each lesson
-    for lesson in lessons:
-        background_tasks.add_task(
-            generate_waveform_background,
-            lesson_id=lesson.id,
-            samples=samples
-        )
+    job = await job_crud.enqueue_job(db, JOB_GENERATE_ALL_WAVEFORMS, {
+        "batch_id": secrets.token_hex(8),
+        "samples": samples,
+        "regenerate": regenerate
+    })
 
     return {
-        "message": f"Waveform generation started for {len(lessons)} lessons",
-        "lessons_count": len(lessons),
+        "message": "Waveform generation queued",
+        "job_id": job.id,
+        "status_url": f"{settings.API_V1_PREFIX}/jobs/{job.id}",
         "samples": samples,
         "regenerate": regenerate
     }
+
+
+@router.get("/generate-all-waveforms/status")
+async def get_generate_all_waveforms_status(current_user: User = Depends(require_admin)):
+    """
+    Get progress of the bulk waveform run (Admin only).
+
+    Read from the batch checkpoint written by the worker.
+
+    Returns:
+        Dictionary with state (idle/running/completed/cancelled/failed), total,
+        completed, failed_count, remaining, lessons_per_minute and eta_seconds
+    """
+    return await asyncio.to_thread(get_batch_status)
+
+
+@router.post("/generate-all-waveforms/cancel")
+async def cancel_generate_all_waveforms(current_user: User = Depends(require_admin)):
+    """
+    Stop the bulk waveform run (Admin only).
+
+    The worker stops within a few seconds; lessons in flight are finished.
+
+    Returns:
+        Batch status
+    """
+    batch_status = await asyncio.to_thread(get_batch_status)
+    if batch_status["state"] == "running":
+        await asyncio.to_thread(request_cancel)
+        batch_status["cancel_requested"] = True
+    return batch_status
@@ -1,23 +1,43 @@
 """
 Series API endpoints.
 """
+import os
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.api.auth import get_current_user
+from app.auth.dependencies import verify_series_download_signature
 from app.models import User
 from app.schemas.lesson import (
     LessonSeriesWithCounts,
     LessonSeriesWithRelations,
     LessonSeriesCreate,
     LessonSeriesUpdate,
-    LessonListItem
+    LessonListItem,
+    SeriesManifest,
+    SeriesManifestItem
 )
 from app.crud import teacher as teacher_crud
 from app.crud import lesson as lesson_crud
 from app.crud import series as series_crud
+from app.utils.audio import (
+    get_audio_file_path,
+    parse_range_header,
+    get_content_range_header,
+    format_http_date,
+    is_not_modified,
+    if_range_matches
+)
+from app.utils.series_archive import (
+    ArchiveMember,
+    SeriesArchiveResponse,
+    build_series_archive,
+    slice_parts
+)
+from app.utils.signed_urls import sign_series_download_url
 
 router = APIRouter(prefix="/series", tags=["Series"])
 
@@ -303,9 +323,164 @@ async def get_series_lessons(series_id: int, db: AsyncSession = Depends(get_db))
             duration_seconds=lsn.duration_seconds,
             formatted_duration=lesson_crud.format_duration(lsn.duration_seconds),
             audio_url=lesson_crud.get_audio_url(lsn.id),
-            waveform_data=lsn.waveform_data,
+            signed_audio_url=lesson_crud.get_signed_audio_url(lsn),
             teacher=lsn.teacher,
             book=lsn.book
         ))
 
     return result
+
+
+@router.get("/{series_id}/manifest", response_model=SeriesManifest)
+async def get_series_manifest(series_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Get the download manifest of a series.
+
+    Lists each lesson's audio URL, size, SHA-256 and audio version, as
+    stored on the lesson at processing time (no file access per request),
+    so clients can download lessons in parallel, resume them and skip
+    files they already have intact.
+
+    Args:
+        series_id: Series ID
+
+    Returns:
+        Manifest with total size and lessons ordered by lesson_number
+    """
+    series = await teacher_crud.get_series_by_id(db, series_id)
+    if not series:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Series not found"
+        )
+
+    lessons = await teacher_crud.get_series_lessons(db, series_id)
+
+    items = [
+        SeriesManifestItem(
+            id=lsn.id,
+            lesson_number=lsn.lesson_number,
+            display_title=lesson_crud.get_display_title(lsn),
+            duration_seconds=lsn.duration_seconds,
+            audio_url=lesson_crud.get_audio_url(lsn.id),
+            signed_audio_url=lesson_crud.get_signed_audio_url(lsn),
+            size=lsn.audio_size,
+            sha256=lsn.audio_sha256,
+            version=lsn.audio_version or 0
+        )
+        for lsn in lessons
+        if lsn.audio_path
+    ]
+
+    return SeriesManifest(
+        series_id=series_id,
+        lessons_count=len(items),
+        total_size=sum(item.size or 0 for item in items),
+        signed_download_url=sign_series_download_url(series_id) if items else None,
+        lessons=items
+    )
+
+
+@router.get("/{series_id}/download")
+async def download_series(
+    series_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    signature: None = Depends(verify_series_download_signature)
+):
+    """
+    Download all lesson audio of a series as one uncompressed TAR.
+
+    The archive holds manifest.json followed by lesson_{id}.mp3 for every
+    active lesson with audio. It is assembled on the fly (no temp files)
+    with a precomputed Content-Length; single Range requests with If-Range
+    let interrupted downloads resume. With AUDIO_REQUIRE_SIGNED_URLS on,
+    only the signed URL from the series manifest is accepted.
+
+    Args:
+        series_id: Series ID
+        request: FastAPI request object (for Range headers)
+
+    Returns:
+        application/x-tar stream (200 or 206)
+    """
+    series = await teacher_crud.get_series_by_id(db, series_id)
+    if not series:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Series not found"
+        )
+
+    lessons = await teacher_crud.get_series_lessons(db, series_id)
+
+    members = []
+    for lsn in lessons:
+        audio_path = get_audio_file_path(audio_path=lsn.audio_path, lesson_id=lsn.id)
+        if not audio_path:
+            continue
+        file_stat = os.stat(audio_path)
+        members.append(ArchiveMember(
+            lesson_id=lsn.id,
+            lesson_number=lsn.lesson_number,
+            title=lesson_crud.get_display_title(lsn),
+            duration_seconds=lsn.duration_seconds,
+            path=audio_path,
+            size=file_stat.st_size,
+            mtime=file_stat.st_mtime
+        ))
+
+    if not members:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Series has no audio files"
+        )
+
+    archive = build_series_archive(
+        {
+            "id": series.id,
+            "name": series.name,
+            "year": series.year,
+            "teacher": series.teacher.name if series.teacher else None,
+        },
+        members
+    )
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": archive.etag,
+        "Last-Modified": format_http_date(archive.mtime),
+        "Cache-Control": "no-cache",
+        "Content-Disposition": f'attachment; filename="series_{series_id}.tar"',
+    }
+
+    if is_not_modified(
+        request.headers.get("If-None-Match"),
+        request.headers.get("If-Modified-Since"),
+        archive.etag,
+        archive.mtime
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    range_header = request.headers.get("Range")
+    if range_header and not if_range_matches(request.headers.get("If-Range"), archive.etag, archive.mtime):
+        range_header = None
+
+    if not range_header:
+        return SeriesArchiveResponse(archive.parts, headers=headers, method=request.method)
+
+    byte_range = parse_range_header(range_header, archive.size)
+    if not byte_range:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{archive.size}"}
+        )
+
+    start, end = byte_range
+    headers["Content-Range"] = get_content_range_header(start, end, archive.size)
+    return SeriesArchiveResponse(
+        slice_parts(archive.parts, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        headers=headers,
+        method=request.method
+    )
@@ -13,7 +13,10 @@ from app.models import (
     LessonSeries, Lesson, User
 )
 from app.api.auth import get_current_user
+from app.config import settings
+from app.crud import job as job_crud
 from app.schemas.user import UserResponse as UserSchema
+from app.utils.audio_cache import hot_audio_cache
 
 router = APIRouter(prefix="/statistics", tags=["statistics"])
 
@@ -142,3 +145,40 @@ async def get_statistics(
             "inactive": (users_total or 0) - (users_active or 0)
         }
     }
+
+
+@router.get("/audio-cache")
+async def get_audio_cache_statistics(
+    current_user: UserSchema = Depends(require_admin)
+) -> Dict:
+    """
+    Get hot audio cache counters of this worker process.
+
+    Returns:
+        Dictionary with budget, used bytes, cached files, hits, misses and evictions
+    """
+    return hot_audio_cache.stats()
+
+
+@router.get("/transcode-queue")
+async def get_transcode_queue_statistics(
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(require_admin)
+) -> Dict:
+    """
+    Get the depth of the background job queue.
+
+    Transcoding runs in the worker processes (python -m app.worker), so the
+    queue is read from the jobs table rather than from this API process.
+
+    Returns:
+        Dictionary with the transcode pool size of each worker, total queued
+        and running jobs, and the same counts per job type
+    """
+    by_type = await job_crud.count_unfinished_jobs_by_type(db)
+    return {
+        "max_workers": settings.AUDIO_TRANSCODE_CONCURRENCY,
+        "queued": sum(counts[job_crud.JOB_QUEUED] for counts in by_type.values()),
+        "running": sum(counts[job_crud.JOB_RUNNING] for counts in by_type.values()),
+        "by_type": by_type,
+    }
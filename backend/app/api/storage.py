@@ -0,0 +1,154 @@
+"""
+Audio storage API endpoints (Admin only).
+Disk usage of derived audio artifacts under the artifact quota, consistency
+audit, cold tier of originals.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies import require_admin
+from app.config import settings
+from app.crud import artifact as artifact_crud
+from app.crud import cold_original as cold_crud
+from app.crud import job as job_crud
+from app.database import get_db
+from app.jobs import JOB_AUDIT_AUDIO_STORAGE, JOB_FREEZE_ORIGINALS, JOB_SYNC_AUDIO_ARTIFACTS
+from app.models import User
+from app.utils.artifact_store import artifact_store
+from app.utils.cold_storage import get_cold_dir
+
+router = APIRouter(prefix="/storage", tags=["Storage"])
+
+
+@router.get("/artifacts")
+async def get_artifact_report(
+    lru_limit: int = Query(20, ge=0, le=200, description="Least recently used artifacts to list"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Disk usage of derived artifacts: processed MP3s, renditions, HLS (Admin only).
+
+    Returns:
+        Quota and the bytes counted against it (renditions, HLS), bytes on
+        disk and evicted per kind, the next eviction candidates and this
+        process's eviction/restore counters
+    """
+    usage = await artifact_crud.get_artifact_usage(db)
+    used_bytes = sum(usage[kind]["bytes"] for kind in artifact_crud.EVICTABLE_KINDS if kind in usage)
+    quota = settings.ARTIFACT_QUOTA_BYTES
+
+    least_recent = await artifact_crud.get_least_recent_artifacts(db, lru_limit) if lru_limit else []
+    return {
+        "quota_bytes": quota,
+        "used_bytes": used_bytes,
+        "usage_ratio": round(used_bytes / quota, 4) if quota > 0 else None,
+        "evicted_bytes": sum(kind["evicted_bytes"] for kind in usage.values()),
+        "by_kind": usage,
+        "least_recent": [
+            {
+                "path": artifact.path,
+                "kind": artifact.kind,
+                "size": artifact.size,
+                "last_accessed_at": artifact.last_accessed_at,
+                "evictable": artifact_store.is_evictable(artifact)
+            }
+            for artifact in least_recent
+        ],
+        "process": artifact_store.stats()
+    }
+
+
+@router.post("/artifacts/sync", status_code=status.HTTP_202_ACCEPTED)
+async def sync_artifacts(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Track artifacts already on disk and enforce the quota (Admin only).
+
+    Needed once after enabling ARTIFACT_QUOTA_BYTES on existing storage;
+    runs in the job worker. Poll GET /jobs/{job_id}.
+    """
+    job = await job_crud.enqueue_job(db, JOB_SYNC_AUDIO_ARTIFACTS, max_attempts=1)
+    return {
+        "message": "Artifact sync queued.",
+        "job_id": job.id,
+        "status_url": f"{settings.API_V1_PREFIX}/jobs/{job.id}"
+    }
+
+
+@router.post("/audit", status_code=status.HTTP_202_ACCEPTED)
+async def audit_storage(
+    reclaim: bool = Query(False, description="Delete orphaned files"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Compare the audio directory with the lessons table (Admin only).
+
+    Reports orphaned files (no lesson references them), files kept only for
+    soft-deleted lessons, referenced files that are missing, and their
+    sizes. With reclaim=true the orphans are deleted. Runs in the job
+    worker; the report is the job result. Poll GET /jobs/{job_id}.
+    """
+    job = await job_crud.enqueue_job(db, JOB_AUDIT_AUDIO_STORAGE, {"reclaim": reclaim}, max_attempts=1)
+    return {
+        "message": "Storage audit queued.",
+        "job_id": job.id,
+        "status_url": f"{settings.API_V1_PREFIX}/jobs/{job.id}"
+    }
+
+
+@router.get("/cold")
+async def get_cold_report(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Originals in the cold tier and the bytes reclaimed (Admin only).
+
+    Returns:
+        Settings, totals and per-format counts: original bytes, bytes in
+        the cold tier, reclaimed bytes
+    """
+    usage = await cold_crud.get_cold_usage(db)
+    size = sum(entry["bytes"] for entry in usage.values())
+    cold_size = sum(entry["cold_bytes"] for entry in usage.values())
+    return {
+        "after_days": settings.ORIGINAL_COLD_AFTER_DAYS,
+        "directory": str(get_cold_dir()),
+        "files": sum(entry["files"] for entry in usage.values()),
+        "bytes": size,
+        "cold_bytes": cold_size,
+        "reclaimed_bytes": size - cold_size,
+        "by_format": usage
+    }
+
+
+@router.post("/cold/freeze", status_code=status.HTTP_202_ACCEPTED)
+async def freeze_originals(
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of originals to move"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Move originals older than ORIGINAL_COLD_AFTER_DAYS to the cold tier (Admin only).
+
+    Runs in the job worker; the result lists the bytes reclaimed. Poll
+    GET /jobs/{job_id}. Schedule it (e.g. daily from cron) to keep the
+    tier current.
+    """
+    if settings.ORIGINAL_COLD_AFTER_DAYS <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Cold tier is disabled (ORIGINAL_COLD_AFTER_DAYS=0)"
+        )
+    job = await job_crud.enqueue_job(db, JOB_FREEZE_ORIGINALS, {"limit": limit}, max_attempts=1)
+    return {
+        "message": "Cold tier run queued.",
+        "job_id": job.id,
+        "status_url": f"{settings.API_V1_PREFIX}/jobs/{job.id}"
+    }
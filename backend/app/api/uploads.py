@@ -0,0 +1,310 @@
+"""
+Resumable upload API endpoints.
+
+Large recordings are uploaded in chunks instead of one request body:
+
+    POST   /uploads                        create a session (lesson_id, filename, size)
+    PUT    /uploads/{id}?offset=N          send a chunk (raw body), any order, in parallel
+    HEAD   /uploads/{id}                   Upload-Offset: bytes received without gaps
+    GET    /uploads/{id}                   received and missing ranges
+    POST   /uploads/{id}/complete          hand the file to audio processing (202 + job_id)
+    DELETE /uploads/{id}                   abort
+
+Chunk state is stored in the database and chunks are written into a part
+file on the shared audio volume, so a dropped connection only costs the
+chunk in flight, and uploads survive API restarts and span nodes.
+"""
+import asyncio
+import logging
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.api.auth import get_current_user
+from app.api.lessons import enqueue_lesson_audio
+from app.models import User
+from app.schemas.upload import UploadSessionCreate
+from app.crud import lesson as lesson_crud
+from app.crud import upload_session as upload_crud
+from app.config import settings
+from app.utils.audio_ingest import (
+    MAX_UPLOAD_SIZE,
+    UploadTooLargeError,
+    create_part_file,
+    get_session_part_path,
+    ingest_part_file,
+    receive_chunk
+)
+from app.utils.audio_processing import get_safe_filename
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/uploads", tags=["Uploads"])
+
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Require admin role."""
+    if current_user.role.level < 2:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+
+def build_upload_status(upload) -> dict:
+    """Session state returned by the upload endpoints."""
+    ranges = upload_crud.parse_ranges(upload.received_ranges)
+    return {
+        "id": upload.id,
+        "lesson_id": upload.lesson_id,
+        "filename": upload.filename,
+        "size": upload.size,
+        "offset": upload_crud.get_contiguous_offset(ranges),
+        "received_bytes": upload.received_bytes,
+        "missing_ranges": upload_crud.get_missing_ranges(ranges, upload.size),
+        "status": upload.status,
+        "job_id": upload.job_id,
+        "chunk_size": settings.UPLOAD_CHUNK_MAX_BYTES,
+        "expires_at": upload.expires_at
+    }
+
+
+async def get_active_upload(db: AsyncSession, upload_id: str):
+    """Get an upload session, 404 if missing or expired."""
+    upload = await upload_crud.get_upload_session(db, upload_id)
+    if not upload or upload.expires_at < datetime.utcnow():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found or expired"
+        )
+    return upload
+
+
+async def remove_expired_sessions(db: AsyncSession) -> None:
+    """Delete expired sessions and their part files."""
+    for upload in await upload_crud.pop_expired_upload_sessions(db):
+        get_session_part_path(upload.id).unlink(missing_ok=True)
+        logger.info(f"Expired upload session removed: {upload.id}")
+
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    data: UploadSessionCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Create a resumable upload session for a lesson's audio (Admin only).
+
+    Maximum file size: 200 MB. The part file is allocated right away; send
+    chunks of at most chunk_size bytes with PUT /uploads/{id}?offset=N.
+
+    Returns:
+        Session state with id and chunk_size
+    """
+    if data.size > MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File too large. Maximum size is 200 MB"
+        )
+
+    lesson = await lesson_crud.get_lesson_by_id(db, data.lesson_id)
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found"
+        )
+
+    await remove_expired_sessions(db)
+
+    upload = await upload_crud.create_upload_session(
+        db, data.lesson_id, get_safe_filename(data.filename), data.size
+    )
+    try:
+        await asyncio.to_thread(create_part_file, get_session_part_path(upload.id), data.size)
+    except Exception as e:
+        await upload_crud.delete_upload_session(db, upload)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating upload: {str(e)}"
+        )
+
+    return build_upload_status(upload)
+
+
+@router.head("/{upload_id}")
+async def get_upload_offset(
+    upload_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Resume point of an upload (Admin only).
+
+    Headers: Upload-Offset (bytes received from the start without gaps)
+    and Upload-Length (total size).
+    """
+    upload = await get_active_upload(db, upload_id)
+    ranges = upload_crud.parse_ranges(upload.received_ranges)
+    return Response(
+        status_code=status.HTTP_200_OK,
+        headers={
+            "Upload-Offset": str(upload_crud.get_contiguous_offset(ranges)),
+            "Upload-Length": str(upload.size),
+            "Cache-Control": "no-store"
+        }
+    )
+
+
+@router.get("/{upload_id}")
+async def get_upload(
+    upload_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Upload session state with received bytes and missing ranges (Admin only).
+    """
+    upload = await get_active_upload(db, upload_id)
+    return build_upload_status(upload)
+
+
+@router.put("/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Position of the chunk in the file"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Write one chunk (raw request body) at an offset (Admin only).
+
+    Chunks may be sent in any order, in parallel and repeated; a chunk
+    counts once its request completes. At most chunk_size bytes per request.
+
+    Example:
+        curl -X PUT --data-binary @chunk.bin "/api/uploads/<id>?offset=16777216"
+
+    Returns:
+        Session state (offset, received_bytes, missing_ranges)
+    """
+    upload = await get_active_upload(db, upload_id)
+    if upload.status != upload_crud.UPLOAD_ACTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is already completed"
+        )
+
+    if offset >= upload.size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail=f"Offset must be less than the upload size ({upload.size})"
+        )
+
+    max_length = min(settings.UPLOAD_CHUNK_MAX_BYTES, upload.size - offset)
+    content_length = request.headers.get("Content-Length")
+    if content_length and content_length.isdigit() and int(content_length) > max_length:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Chunk too large: at most {max_length} bytes at this offset"
+        )
+
+    # Release the connection while the body streams in
+    await db.commit()
+
+    try:
+        written = await receive_chunk(request.stream(), get_session_part_path(upload_id), offset, max_length)
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Chunk too large: at most {max_length} bytes at this offset"
+        )
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is no longer active"
+        )
+
+    if written == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Empty request body"
+        )
+
+    upload = await upload_crud.add_received_range(db, upload_id, offset, offset + written)
+    if upload is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found or expired"
+        )
+
+    return build_upload_status(upload)
+
+
+@router.post("/{upload_id}/complete", status_code=status.HTTP_202_ACCEPTED)
+async def complete_upload(
+    upload_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Finish an upload and queue its processing (Admin only).
+
+    Same result as POST /lessons/{id}/audio: 202 with job_id (poll
+    GET /jobs/{job_id}). Repeating the call returns the same job.
+    """
+    await get_active_upload(db, upload_id)
+
+    # Lock the session: concurrent completions hand over the file once
+    upload = await upload_crud.get_upload_session(db, upload_id, for_update=True)
+    if upload.status == upload_crud.UPLOAD_COMPLETED:
+        return {
+            "message": "Upload already completed.",
+            "lesson_id": upload.lesson_id,
+            "upload_id": upload.id,
+            "job_id": upload.job_id,
+            "status_url": f"{settings.API_V1_PREFIX}/jobs/{upload.job_id}",
+            "original_size": upload.size,
+            "original_sha256": upload.sha256
+        }
+
+    ranges = upload_crud.parse_ranges(upload.received_ranges)
+    missing = upload_crud.get_missing_ranges(ranges, upload.size)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Upload is incomplete", "missing_ranges": missing}
+        )
+
+    part_path = get_session_part_path(upload_id)
+    if not part_path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is no longer active"
+        )
+
+    # The job and the completed status are committed together (the row
+    # lock is held until then); if that fails the part file is kept
+    ingested = await ingest_part_file(part_path, upload.filename)
+    result = await enqueue_lesson_audio(upload.lesson_id, ingested, db, upload=upload)
+
+    return {**result, "upload_id": upload_id}
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(
+    upload_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Abort an upload and delete its received data (Admin only).
+    """
+    upload = await get_active_upload(db, upload_id)
+    if upload.status == upload_crud.UPLOAD_ACTIVE:
+        get_session_part_path(upload_id).unlink(missing_ok=True)
+    await upload_crud.delete_upload_session(db, upload)
@@ -1,16 +1,18 @@
 """
 FastAPI dependencies for authentication.
 """
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+from typing import NamedTuple, Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
+from app.config import settings
 from app.database import get_db
 from app.models import User
 from app.auth.jwt import verify_token
+from app.utils.signed_urls import verify_audio_signature, verify_series_signature
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
@@ -99,3 +101,68 @@ async def get_current_admin_user(current_user: User = Depends(get_current_user))
 
 # Alias for convenience
 require_admin = get_current_admin_user
+
+
+class AudioUrlSignature(NamedTuple):
+    """Verified ?v=&exp=&sig= of a signed lesson audio URL."""
+    version: int  # Lesson audio version the URL was signed for
+    expires: int  # Expiry (UNIX timestamp)
+
+
+async def get_audio_url_signature(
+    lesson_id: int,
+    v: Optional[int] = Query(None, ge=0, description="Audio version (signed URL)"),
+    exp: Optional[int] = Query(None, description="Expiry UNIX timestamp (signed URL)"),
+    sig: Optional[str] = Query(None, description="HMAC signature (signed URL)")
+) -> Optional[AudioUrlSignature]:
+    """
+    Check the signature of a request for lesson audio bytes.
+
+    Used by every route serving a lesson's audio (stream, HLS, waveform), so
+    AUDIO_REQUIRE_SIGNED_URLS cannot be bypassed through one of them.
+
+    Returns:
+        Verified signature, or None for an unsigned request
+
+    Raises:
+        HTTPException: 403 if the signature is invalid or expired, or
+            missing while AUDIO_REQUIRE_SIGNED_URLS is on
+    """
+    if sig is not None:
+        if v is None or exp is None or not verify_audio_signature(lesson_id, v, exp, sig):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Invalid or expired audio URL"
+            )
+        return AudioUrlSignature(version=v, expires=exp)
+    if settings.AUDIO_REQUIRE_SIGNED_URLS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Signed audio URL required"
+        )
+    return None
+
+
+async def verify_series_download_signature(
+    series_id: int,
+    exp: Optional[int] = Query(None, description="Expiry UNIX timestamp (signed URL)"),
+    sig: Optional[str] = Query(None, description="HMAC signature (signed URL)")
+) -> None:
+    """
+    Check the signature of a series archive download (see get_audio_url_signature).
+
+    Raises:
+        HTTPException: 403 if the signature is invalid or expired, or
+            missing while AUDIO_REQUIRE_SIGNED_URLS is on
+    """
+    if sig is not None:
+        if exp is None or not verify_series_signature(series_id, exp, sig):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Invalid or expired download URL"
+            )
+    elif settings.AUDIO_REQUIRE_SIGNED_URLS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Signed download URL required"
+        )
@@ -40,6 +40,56 @@ class Settings(BaseSettings):
 
     # Audio files
     AUDIO_FILES_PATH: str = "/app/audio_files"
+    # "pread" - AudioFileResponse (large pread chunks in a thread pool; the old
+    # name "sendfile" is accepted), "generator" - legacy chunked generator.
+    # Kernel sendfile(2) needs a proxy: see AUDIO_OFFLOAD_MODE.
+    AUDIO_STREAMING_ENGINE: str = "pread"
+    # Reverse-proxy offload: "" (serve from the app), "x-accel" (nginx) or "x-sendfile"
+    AUDIO_OFFLOAD_MODE: str = ""
+    AUDIO_OFFLOAD_PREFIX: str = "/protected-audio/"  # nginx internal location for AUDIO_FILES_PATH
+    # In-memory lesson audio index (per worker process)
+    AUDIO_INDEX_TTL_SECONDS: int = 300
+    AUDIO_INDEX_MAX_ENTRIES: int = 10000
+    # Hot-content tier: memory budget for mmap'd popular files (0 disables)
+    AUDIO_HOT_CACHE_BYTES: int = 256 * 1024 * 1024
+    AUDIO_HOT_CACHE_ADMIT_AFTER: int = 2  # Requests before a file is mapped
+    # HLS delivery (segments are packaged lazily on first playlist request)
+    HLS_SEGMENT_SECONDS: int = 6
+    # Transcoding executor: max concurrent ffmpeg jobs (others queue) and their nice level
+    AUDIO_TRANSCODE_CONCURRENCY: int = 2
+    AUDIO_TRANSCODE_NICE: int = 10
+    # Bulk waveform regeneration: pool processes and checkpoint file (empty - AUDIO_FILES_PATH/.waveform_batch.json)
+    WAVEFORM_BATCH_WORKERS: int = 2
+    WAVEFORM_BATCH_CHECKPOINT: str = ""
+    # Extra renditions generated on upload (names from RENDITION_LADDER)
+    AUDIO_RENDITIONS: str = "low,medium"
+    # Signed audio URLs (HMAC over lesson id, audio version and expiry)
+    AUDIO_URL_SIGNING_KEY: str = ""  # Empty - use JWT_SECRET_KEY
+    AUDIO_URL_TTL_SECONDS: int = 6 * 3600
+    AUDIO_URL_EXPIRY_BUCKET_SECONDS: int = 3600  # Expiry rounding, keeps URLs stable
+    AUDIO_REQUIRE_SIGNED_URLS: bool = False  # Reject unsigned audio, HLS, waveform and series archive requests
+    # Resumable uploads (/uploads): max bytes per chunk request, session lifetime
+    UPLOAD_CHUNK_MAX_BYTES: int = 16 * 1024 * 1024
+    UPLOAD_SESSION_TTL_HOURS: int = 24
+    # Evictable derived artifacts (renditions, HLS; processed MP3s are kept): disk quota
+    # in bytes (0 - unlimited), eviction target as a fraction of it, minimum idle time before eviction
+    ARTIFACT_QUOTA_BYTES: int = 0
+    ARTIFACT_QUOTA_LOW_WATERMARK: float = 0.9
+    ARTIFACT_MIN_IDLE_SECONDS: int = 3600
+    ARTIFACT_TOUCH_FLUSH_SECONDS: int = 60  # Last-access times are written in batches
+    # Storage audit: files changed more recently are never treated as orphans
+    STORAGE_AUDIT_GRACE_SECONDS: int = 24 * 3600
+    # Cold tier of originals: moved after this many days (0 - never), directory (empty - AUDIO_FILES_PATH/cold)
+    ORIGINAL_COLD_AFTER_DAYS: int = 0
+    ORIGINAL_COLD_DIR: str = ""
+
+    # Background jobs (jobs table, run by `python -m app.worker`)
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: int = 30  # Backoff: base * 2^(attempt - 1)
+    JOB_RETRY_MAX_SECONDS: int = 3600
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0  # Idle worker poll interval
+    JOB_LOCK_TIMEOUT_SECONDS: int = 600  # Lock not refreshed this long - worker presumed dead, job requeued
+    WORKER_CONCURRENCY: int = 2  # Jobs run at once per worker process
 
     # Cache TTL (seconds)
     CACHE_TTL_THEMES: int = 3600  # 1 hour
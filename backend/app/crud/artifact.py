@@ -0,0 +1,234 @@
+"""
+CRUD operations for AudioArtifact model (derived audio disk quota).
+
+Eviction candidates are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so
+API nodes and workers enforcing the quota at the same time never evict the
+same artifact twice.
+"""
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.audio_artifact import AudioArtifact
+
+ARTIFACT_PROCESSED = "processed"
+ARTIFACT_RENDITION = "rendition"
+ARTIFACT_HLS = "hls"
+# Processed MP3s are never evicted: /audio would wait on a full transcode
+EVICTABLE_KINDS = (ARTIFACT_RENDITION, ARTIFACT_HLS)
+
+
+async def get_artifact(db: AsyncSession, path: str) -> Optional[AudioArtifact]:
+    """
+    Get artifact by path.
+
+    Args:
+        db: Database session
+        path: Path relative to AUDIO_FILES_PATH
+
+    Returns:
+        Artifact or None
+    """
+    result = await db.execute(select(AudioArtifact).where(AudioArtifact.path == path))
+    return result.scalar_one_or_none()
+
+
+async def save_artifact(
+    db: AsyncSession,
+    path: str,
+    kind: str,
+    size: int,
+    source_path: Optional[str] = None,
+    variant: Optional[str] = None,
+    accessed_at: Optional[datetime] = None
+) -> None:
+    """
+    Record an artifact that is (again) on disk.
+
+    Args:
+        db: Database session
+        path: Path relative to AUDIO_FILES_PATH
+        kind: ARTIFACT_PROCESSED, ARTIFACT_RENDITION or ARTIFACT_HLS
+        size: Bytes on disk
+        source_path: Original it can be regenerated from
+        variant: Rendition name
+        accessed_at: Last access (default: now)
+    """
+    values = {
+        "kind": kind,
+        "variant": variant,
+        "source_path": source_path,
+        "size": size,
+        "last_accessed_at": accessed_at or datetime.utcnow(),
+        "evicted_at": None
+    }
+    artifact = await get_artifact(db, path)
+    if artifact is None:
+        db.add(AudioArtifact(path=path, **values))
+        try:
+            await db.commit()
+            return
+        except IntegrityError:
+            # Recorded at the same time by another process
+            await db.rollback()
+            artifact = await get_artifact(db, path)
+
+    for key, value in values.items():
+        setattr(artifact, key, value)
+    await db.commit()
+
+
+async def add_untracked_artifacts(db: AsyncSession, artifacts: List[dict]) -> int:
+    """
+    Insert artifacts that are not tracked yet (disk sync).
+
+    Args:
+        db: Database session
+        artifacts: Column values with "path" (already tracked paths are skipped)
+
+    Returns:
+        Number of inserted artifacts
+    """
+    if not artifacts:
+        return 0
+    result = await db.execute(
+        select(AudioArtifact.path).where(AudioArtifact.path.in_([a["path"] for a in artifacts]))
+    )
+    tracked = set(result.scalars().all())
+    new = [AudioArtifact(**a) for a in artifacts if a["path"] not in tracked]
+    db.add_all(new)
+    await db.commit()
+    return len(new)
+
+
+async def touch_artifacts(db: AsyncSession, accessed: Dict[str, datetime]) -> None:
+    """
+    Store last access times in one statement (executemany).
+
+    Args:
+        db: Database session
+        accessed: Path -> access time
+    """
+    if not accessed:
+        return
+    table = AudioArtifact.__table__
+    await db.execute(
+        update(table)
+        .where(table.c.path == bindparam("artifact_path"))
+        .values(last_accessed_at=bindparam("accessed_at")),
+        [{"artifact_path": path, "accessed_at": at} for path, at in accessed.items()]
+    )
+    await db.commit()
+
+
+async def forget_artifacts(db: AsyncSession, paths: Iterable[str]) -> None:
+    """Stop tracking artifacts whose files were deleted."""
+    paths = list(paths)
+    if paths:
+        await db.execute(delete(AudioArtifact).where(AudioArtifact.path.in_(paths)))
+        await db.commit()
+
+
+async def get_resident_size(db: AsyncSession) -> int:
+    """Total bytes of the evictable artifacts on disk (what the quota applies to)."""
+    result = await db.execute(
+        select(func.coalesce(func.sum(AudioArtifact.size), 0)).where(
+            AudioArtifact.evicted_at.is_(None),
+            AudioArtifact.kind.in_(EVICTABLE_KINDS)
+        )
+    )
+    return int(result.scalar_one())
+
+
+async def claim_lru_artifacts(
+    db: AsyncSession,
+    idle_before: datetime,
+    after: Optional[Tuple[datetime, str]] = None,
+    limit: int = 100
+) -> List[AudioArtifact]:
+    """
+    Lock the least recently used evictable artifacts on disk (eviction candidates).
+
+    Rows locked by another evictor are skipped. The locks are held until
+    the caller commits.
+
+    Args:
+        db: Database session
+        idle_before: Only artifacts not accessed since then
+        after: (last_accessed_at, path) of the previous page
+        limit: Maximum number of artifacts
+
+    Returns:
+        Artifacts ordered by last access
+    """
+    query = select(AudioArtifact).where(
+        AudioArtifact.evicted_at.is_(None),
+        AudioArtifact.kind.in_(EVICTABLE_KINDS),
+        AudioArtifact.last_accessed_at < idle_before
+    )
+    if after is not None:
+        accessed_at, path = after
+        query = query.where(or_(
+            AudioArtifact.last_accessed_at > accessed_at,
+            and_(AudioArtifact.last_accessed_at == accessed_at, AudioArtifact.path > path)
+        ))
+    query = (
+        query.order_by(AudioArtifact.last_accessed_at, AudioArtifact.path)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
+async def get_artifact_usage(db: AsyncSession) -> Dict[str, Dict[str, int]]:
+    """
+    Artifact counts and bytes per kind.
+
+    Returns:
+        Kind -> {"files", "bytes", "evicted_files", "evicted_bytes"}
+    """
+    resident = AudioArtifact.evicted_at.is_(None)
+    result = await db.execute(
+        select(
+            AudioArtifact.kind,
+            resident,
+            func.count(),
+            func.coalesce(func.sum(AudioArtifact.size), 0)
+        ).group_by(AudioArtifact.kind, resident)
+    )
+    usage: Dict[str, Dict[str, int]] = {}
+    for kind, is_resident, count, size in result.all():
+        entry = usage.setdefault(kind, {"files": 0, "bytes": 0, "evicted_files": 0, "evicted_bytes": 0})
+        if is_resident:
+            entry["files"] += count
+            entry["bytes"] += int(size)
+        else:
+            entry["evicted_files"] += count
+            entry["evicted_bytes"] += int(size)
+    return usage
+
+
+async def get_least_recent_artifacts(db: AsyncSession, limit: int = 20) -> List[AudioArtifact]:
+    """Evictable artifacts on disk that were accessed longest ago (next to be evicted)."""
+    result = await db.execute(
+        select(AudioArtifact)
+        .where(AudioArtifact.evicted_at.is_(None), AudioArtifact.kind.in_(EVICTABLE_KINDS))
+        .order_by(AudioArtifact.last_accessed_at)
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def iter_evicted_artifact_paths(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[str]:
+    """Stream the paths of evicted artifacts (deleted on purpose, restored on demand)."""
+    result = await db.stream_scalars(
+        select(AudioArtifact.path)
+        .where(AudioArtifact.evicted_at.isnot(None))
+        .execution_options(yield_per=batch_size)
+    )
+    async for path in result:
+        yield path
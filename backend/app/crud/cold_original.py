@@ -0,0 +1,74 @@
+"""
+CRUD operations for ColdOriginal model (cold tier of original uploads).
+"""
+from typing import Dict, Iterable, List
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.cold_original import ColdOriginal
+
+
+async def get_cold_originals(db: AsyncSession, paths: List[str]) -> Dict[str, ColdOriginal]:
+    """
+    Get the cold tier records of some originals.
+
+    Args:
+        db: Database session
+        paths: Original paths (original/...)
+
+    Returns:
+        Path -> record, for the paths that are in the cold tier
+    """
+    if not paths:
+        return {}
+    result = await db.execute(select(ColdOriginal).where(ColdOriginal.path.in_(paths)))
+    return {cold.path: cold for cold in result.scalars().all()}
+
+
+async def save_cold_original(db: AsyncSession, path: str, format: str, size: int, cold_size: int) -> None:
+    """
+    Record an original stored in the cold tier.
+
+    Args:
+        db: Database session
+        path: Original path (original/...)
+        format: 'flac', 'xz' or 'raw'
+        size: Bytes of the original
+        cold_size: Bytes in the cold tier
+    """
+    cold = await db.get(ColdOriginal, path)
+    if cold is None:
+        db.add(ColdOriginal(path=path, format=format, size=size, cold_size=cold_size))
+    else:
+        cold.format, cold.size, cold.cold_size = format, size, cold_size
+    await db.commit()
+
+
+async def forget_cold_originals(db: AsyncSession, paths: Iterable[str]) -> None:
+    """Stop tracking originals whose cold copies were deleted."""
+    paths = list(paths)
+    if paths:
+        await db.execute(delete(ColdOriginal).where(ColdOriginal.path.in_(paths)))
+        await db.commit()
+
+
+async def get_cold_usage(db: AsyncSession) -> Dict[str, Dict[str, int]]:
+    """
+    Cold originals per format.
+
+    Returns:
+        Format -> {"files", "bytes" (originals), "cold_bytes"}
+    """
+    result = await db.execute(
+        select(
+            ColdOriginal.format,
+            func.count(),
+            func.coalesce(func.sum(ColdOriginal.size), 0),
+            func.coalesce(func.sum(ColdOriginal.cold_size), 0)
+        ).group_by(ColdOriginal.format)
+    )
+    return {
+        format: {"files": count, "bytes": int(size), "cold_bytes": int(cold_size)}
+        for format, count, size, cold_size in result.all()
+    }
@@ -0,0 +1,316 @@
+"""
+CRUD operations for Job model (durable background job queue).
+
+Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+of workers on any number of machines can poll the same table: each queued
+job is handed to exactly one of them and nobody waits on another's lock.
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.job import Job
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+async def enqueue_job(
+    db: AsyncSession,
+    job_type: str,
+    payload: Optional[Dict[str, Any]] = None,
+    max_attempts: Optional[int] = None,
+    commit: bool = True
+) -> Job:
+    """
+    Add a job to the queue (committed right away, so workers see it).
+
+    Args:
+        db: Database session
+        job_type: Handler name (see app.jobs.JOB_HANDLERS)
+        payload: JSON-serializable arguments
+        max_attempts: Attempts before the job is failed (default: JOB_MAX_ATTEMPTS)
+        commit: False to only flush (the job id is set) and let the caller
+                commit it together with its own changes
+
+    Returns:
+        Created job
+    """
+    job = Job(
+        type=job_type,
+        payload=json.dumps(payload or {}),
+        status=JOB_QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_at=datetime.utcnow()
+    )
+    db.add(job)
+    if not commit:
+        await db.flush()
+        return job
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def get_job_by_id(db: AsyncSession, job_id: int) -> Optional[Job]:
+    """Get job by ID."""
+    result = await db.execute(select(Job).where(Job.id == job_id))
+    return result.scalar_one_or_none()
+
+
+async def get_jobs(
+    db: AsyncSession,
+    status: Optional[str] = None,
+    job_type: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 50
+) -> tuple[list[Job], int]:
+    """
+    Get jobs, newest first.
+    Returns (items, total_count).
+    """
+    query = select(Job)
+    count_query = select(func.count()).select_from(Job)
+    if status:
+        query = query.where(Job.status == status)
+        count_query = count_query.where(Job.status == status)
+    if job_type:
+        query = query.where(Job.type == job_type)
+        count_query = count_query.where(Job.type == job_type)
+
+    total = (await db.execute(count_query)).scalar()
+    result = await db.execute(query.order_by(Job.id.desc()).offset(skip).limit(limit))
+    return list(result.scalars().all()), total
+
+
+async def count_jobs_by_status(db: AsyncSession) -> Dict[str, int]:
+    """Number of jobs per status."""
+    result = await db.execute(select(Job.status, func.count()).group_by(Job.status))
+    return {status: count for status, count in result.all()}
+
+
+async def count_unfinished_jobs_by_type(db: AsyncSession) -> Dict[str, Dict[str, int]]:
+    """Number of queued and running jobs per type (job type -> {"queued", "running"})."""
+    result = await db.execute(
+        select(Job.type, Job.status, func.count())
+        .where(Job.status.in_((JOB_QUEUED, JOB_RUNNING)))
+        .group_by(Job.type, Job.status)
+    )
+    counts: Dict[str, Dict[str, int]] = {}
+    for job_type, status, count in result.all():
+        counts.setdefault(job_type, {JOB_QUEUED: 0, JOB_RUNNING: 0})[status] = count
+    return counts
+
+
+async def get_unfinished_job_payloads(db: AsyncSession, job_type: str) -> list[Dict[str, Any]]:
+    """Payloads of the queued and running jobs of a type (e.g. uploads not processed yet)."""
+    result = await db.execute(
+        select(Job.payload).where(Job.type == job_type, Job.status.in_((JOB_QUEUED, JOB_RUNNING)))
+    )
+    return [parse_job_json(payload) or {} for payload in result.scalars().all()]
+
+
+async def find_latest_job(db: AsyncSession, job_type: str, payload: Dict[str, Any]) -> Optional[Job]:
+    """
+    Most recent job of a type queued with exactly this payload, whatever its status.
+
+    Lets public endpoints see that the work was already done or failed for
+    good instead of queueing it again on every request.
+    """
+    result = await db.execute(
+        select(Job)
+        .where(Job.type == job_type, Job.payload == json.dumps(payload))
+        .order_by(Job.id.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def find_unfinished_job(db: AsyncSession, job_type: str, **payload_fields: Any) -> Optional[Job]:
+    """
+    Find a queued or running job of a type whose payload has the given values.
+
+    Lets endpoints reuse a pending job instead of queueing the same work twice.
+    """
+    result = await db.execute(
+        select(Job).where(Job.type == job_type, Job.status.in_((JOB_QUEUED, JOB_RUNNING))).order_by(Job.id)
+    )
+    for job in result.scalars().all():
+        payload = parse_job_json(job.payload) or {}
+        if all(payload.get(key) == value for key, value in payload_fields.items()):
+            return job
+    return None
+
+
+async def claim_next_job(
+    db: AsyncSession,
+    worker_id: str,
+    job_types: Optional[Sequence[str]] = None
+) -> Optional[Job]:
+    """
+    Claim the next due job for a worker.
+
+    Args:
+        db: Database session
+        worker_id: Worker identifier stored in locked_by
+        job_types: Only claim these types (None - any)
+
+    Returns:
+        Claimed job (status running, attempts incremented) or None if the queue is empty
+    """
+    now = datetime.utcnow()
+    query = (
+        select(Job)
+        .where(Job.status == JOB_QUEUED, Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if job_types:
+        query = query.where(Job.type.in_(job_types))
+
+    result = await db.execute(query)
+    job = result.scalar_one_or_none()
+    if job is None:
+        await db.rollback()
+        return None
+
+    job.status = JOB_RUNNING
+    job.attempts += 1
+    job.locked_by = worker_id
+    job.locked_at = now
+    await db.commit()
+    return job
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    """
+    Exponential backoff before the next attempt.
+
+    Args:
+        attempts: Attempts made so far (1 after the first failure)
+
+    Returns:
+        Delay: JOB_RETRY_BASE_SECONDS * 2^(attempts - 1), at most JOB_RETRY_MAX_SECONDS
+    """
+    seconds = settings.JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.JOB_RETRY_MAX_SECONDS))
+
+
+async def complete_job(db: AsyncSession, job: Job, result: Optional[Dict[str, Any]] = None) -> None:
+    """Mark a job as succeeded and store its result."""
+    job.status = JOB_SUCCEEDED
+    job.result = json.dumps(result) if result is not None else None
+    job.last_error = None
+    job.locked_by = None
+    job.locked_at = None
+    await db.commit()
+
+
+async def fail_job(db: AsyncSession, job: Job, error: str, retry: bool = True) -> None:
+    """
+    Record a failed attempt: requeue with backoff, or fail for good.
+
+    Args:
+        db: Database session
+        job: Running job
+        error: Error message
+        retry: False for errors that retrying cannot fix
+    """
+    job.last_error = error
+    job.locked_by = None
+    job.locked_at = None
+    if retry and job.attempts < job.max_attempts:
+        job.status = JOB_QUEUED
+        job.run_at = datetime.utcnow() + get_retry_delay(job.attempts)
+    else:
+        job.status = JOB_FAILED
+    await db.commit()
+
+
+async def retry_job(db: AsyncSession, job: Job) -> Job:
+    """Queue a failed job again with a fresh attempt budget."""
+    job.status = JOB_QUEUED
+    job.attempts = 0
+    job.run_at = datetime.utcnow()
+    job.last_error = None
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def refresh_job_lock(db: AsyncSession, job_id: int, worker_id: str) -> bool:
+    """
+    Heartbeat of a running job: move its lock time forward.
+
+    Args:
+        db: Database session
+        job_id: Job ID
+        worker_id: Worker running the job
+
+    Returns:
+        False if the job is no longer locked by this worker
+    """
+    result = await db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JOB_RUNNING, Job.locked_by == worker_id)
+        .values(locked_at=datetime.utcnow())
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def requeue_stale_jobs(db: AsyncSession, timeout_seconds: int) -> tuple[int, list[Job]]:
+    """
+    Put back jobs whose worker died while running them.
+
+    Running workers refresh locked_at (see refresh_job_lock), so a lock
+    older than timeout_seconds means the worker is gone. The job is queued
+    again (the attempt counts), or failed once its attempts are used up.
+
+    Args:
+        db: Database session
+        timeout_seconds: Lock age after which a worker is presumed dead
+
+    Returns:
+        (number of jobs requeued, jobs failed for good - for their on_failure hooks)
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=timeout_seconds)
+    stale = (Job.status == JOB_RUNNING) & (Job.locked_at < cutoff)
+    error = "Worker lost (lock timeout)"
+
+    # RETURNING: with several workers checking at once, each failed job is
+    # reported to exactly one of them
+    failed = await db.execute(
+        update(Job)
+        .where(stale, Job.attempts >= Job.max_attempts)
+        .values(status=JOB_FAILED, locked_by=None, locked_at=None, last_error=error)
+        .returning(Job)
+        .execution_options(synchronize_session=False)
+    )
+    failed_jobs = list(failed.scalars().all())
+    requeued = await db.execute(
+        update(Job)
+        .where(stale)
+        .values(status=JOB_QUEUED, run_at=datetime.utcnow(), locked_by=None, locked_at=None,
+                last_error=error)
+    )
+    await db.commit()
+    return requeued.rowcount, failed_jobs
+
+
+def parse_job_json(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Parse a job payload/result JSON column."""
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return None
@@ -1,13 +1,15 @@
 """
 CRUD operations for Lesson model.
 """
-from typing import List, Optional
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_
+from sqlalchemy import select, func, or_, and_, update
 from sqlalchemy.orm import selectinload
 
 from app.models import Lesson
 from app.schemas.lesson import LessonCreate, LessonUpdate
+from app.utils.signed_urls import sign_audio_url
 
 
 async def get_all_lessons(
@@ -161,6 +163,125 @@ async def get_lesson_by_id(db: AsyncSession, lesson_id: int) -> Optional[Lesson]
     return result.scalar_one_or_none()
 
 
+async def get_lesson_audio_info(
+    db: AsyncSession,
+    lesson_id: int
+) -> Optional[Tuple[Optional[str], Optional[str], int]]:
+    """
+    Get only the audio fields of a lesson (no relationships).
+
+    Args:
+        db: Database session
+        lesson_id: Lesson ID
+
+    Returns:
+        Tuple of (audio_path, renditions JSON, audio_version) if found, None otherwise
+    """
+    result = await db.execute(
+        select(
+            Lesson.audio_path,
+            Lesson.renditions,
+            Lesson.audio_version
+        ).where(Lesson.id == lesson_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    return row.audio_path, row.renditions, row.audio_version or 0
+
+
+async def get_lesson_by_original_sha256(db: AsyncSession, sha256: str) -> Optional[Lesson]:
+    """
+    Get a lesson whose processed audio was made from an original with this hash.
+
+    Args:
+        db: Database session
+        sha256: Hex SHA-256 of the original file
+
+    Returns:
+        Lesson object if found, None otherwise
+    """
+    result = await db.execute(
+        select(Lesson)
+        .where(
+            Lesson.original_sha256 == sha256,
+            Lesson.audio_path.isnot(None)
+        )
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def count_audio_references(db: AsyncSession, path: str) -> int:
+    """
+    Count lessons referencing an audio file (reference count of a stored blob).
+
+    Args:
+        db: Database session
+        path: Relative audio path (original/... or processed/...)
+
+    Returns:
+        Number of lessons using the file as original or processed audio
+    """
+    result = await db.execute(
+        select(func.count(Lesson.id)).where(
+            or_(Lesson.original_audio_path == path, Lesson.audio_path == path)
+        )
+    )
+    return result.scalar_one()
+
+
+async def get_lesson_ids_with_audio(db: AsyncSession, without_waveform: bool = False) -> List[int]:
+    """
+    Get the ids of lessons that have audio (bulk waveform generation).
+
+    Args:
+        db: Database session
+        without_waveform: Only lessons without waveform data
+
+    Returns:
+        Lesson ids in ascending order
+    """
+    query = select(Lesson.id).where(
+        and_(Lesson.audio_path.isnot(None), Lesson.audio_path != '')
+    ).order_by(Lesson.id)
+    if without_waveform:
+        query = query.where(Lesson.waveform_data.is_(None))
+
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
+async def iter_lesson_audio_references(
+    db: AsyncSession,
+    batch_size: int = 1000
+) -> AsyncIterator[Tuple[int, bool, Optional[str], Optional[str], Optional[str]]]:
+    """
+    Stream the audio columns of all lessons (storage audit), soft-deleted ones included.
+
+    Rows are fetched batch_size at a time from a server-side cursor, so
+    memory does not grow with the number of lessons.
+
+    Args:
+        db: Database session
+        batch_size: Rows fetched per round trip
+
+    Yields:
+        (id, is_active, audio_path, original_audio_path, renditions JSON)
+    """
+    result = await db.stream(
+        select(
+            Lesson.id,
+            Lesson.is_active,
+            Lesson.audio_path,
+            Lesson.original_audio_path,
+            Lesson.renditions
+        ).execution_options(yield_per=batch_size)
+    )
+    async for row in result:
+        yield tuple(row)
+
+
 def format_duration(seconds: Optional[int]) -> str:
     """
     Format duration in seconds to human-readable string.
@@ -219,6 +340,80 @@ def get_audio_url(lesson_id: int, base_url: str = "/api/lessons") -> str:
     return f"{base_url}/{lesson_id}/audio"
 
 
+def get_signed_audio_url(lesson: Lesson, base_url: str = "/api/lessons") -> Optional[str]:
+    """
+    Get signed, expiring audio streaming URL for lesson.
+
+    Args:
+        lesson: Lesson object
+        base_url: Base API URL
+
+    Returns:
+        Signed audio URL, or None if the lesson has no audio
+    """
+    if not lesson.audio_path:
+        return None
+    return sign_audio_url(lesson.id, lesson.audio_version or 0, base_url)
+
+
+def parse_renditions(renditions_str: Optional[str]) -> Dict[str, dict]:
+    """
+    Parse Lesson.renditions JSON into a dictionary.
+
+    Args:
+        renditions_str: JSON string (quality -> {path, size, duration_seconds})
+
+    Returns:
+        Dictionary of renditions (empty if none or invalid)
+    """
+    if not renditions_str:
+        return {}
+    try:
+        return json.loads(renditions_str)
+    except ValueError:
+        return {}
+
+
+def parse_loudness_stats(loudness_stats_str: Optional[str]) -> Optional[Dict[str, str]]:
+    """
+    Parse Lesson.loudness_stats JSON into a dictionary.
+
+    Args:
+        loudness_stats_str: JSON string (loudnorm measured values)
+
+    Returns:
+        Dictionary of measured values or None if none or invalid
+    """
+    if not loudness_stats_str:
+        return None
+    try:
+        return json.loads(loudness_stats_str)
+    except ValueError:
+        return None
+
+
+def get_audio_qualities(lesson: Lesson) -> Dict[str, dict]:
+    """
+    Get the audio qualities a lesson can be streamed in, without file paths.
+
+    Args:
+        lesson: Lesson object
+
+    Returns:
+        Dictionary quality -> {size, duration_seconds}
+    """
+    if not lesson.audio_path:
+        return {}
+
+    qualities = {"high": {"size": None, "duration_seconds": lesson.duration_seconds}}
+    for name, rendition in parse_renditions(lesson.renditions).items():
+        qualities[name] = {
+            "size": rendition.get("size"),
+            "duration_seconds": rendition.get("duration_seconds"),
+        }
+    return qualities
+
+
 def parse_tags(tags_str: Optional[str]) -> List[str]:
     """
     Parse comma-separated tags string into list.
@@ -256,6 +451,43 @@ async def create_lesson(db: AsyncSession, lesson_data: LessonCreate) -> Lesson:
     return lesson
 
 
+async def create_lessons(db: AsyncSession, lessons_data: List[Dict[str, Any]]) -> List[Lesson]:
+    """
+    Create several lessons in one transaction (bulk import).
+
+    Args:
+        db: Database session
+        lessons_data: Column values of each lesson (LessonCreate fields plus audio fields)
+
+    Returns:
+        Created lesson objects (without relationships)
+    """
+    lessons = [Lesson(**data) for data in lessons_data]
+    db.add_all(lessons)
+    await db.commit()
+    return lessons
+
+
+async def get_series_lesson_numbers(db: AsyncSession, series_id: int) -> Set[int]:
+    """
+    Get lesson numbers already used in a series.
+
+    Args:
+        db: Database session
+        series_id: Series ID
+
+    Returns:
+        Set of lesson numbers
+    """
+    result = await db.execute(
+        select(Lesson.lesson_number).where(
+            Lesson.series_id == series_id,
+            Lesson.lesson_number.isnot(None)
+        )
+    )
+    return set(result.scalars().all())
+
+
 async def update_lesson(
     db: AsyncSession,
     lesson_id: int,
@@ -291,6 +523,42 @@ async def update_lesson(
     return lesson
 
 
+# Audio columns written by audio processing, not by LessonUpdate: signed
+# URLs, HLS packages and content-addressed refcounts depend on them
+LESSON_AUDIO_FIELDS = frozenset({
+    "original_audio_path",
+    "original_sha256",
+    "audio_path",
+    "duration_seconds",
+    "waveform_data",
+    "renditions",
+    "loudness_stats",
+    "audio_size",
+    "audio_sha256",
+    "audio_version",
+})
+
+
+async def update_lesson_audio(db: AsyncSession, lesson_id: int, **audio_fields: Any) -> None:
+    """
+    Set server-managed audio columns of a lesson (processing jobs, audio deletion).
+
+    Args:
+        db: Database session
+        lesson_id: Lesson ID
+        **audio_fields: Columns from LESSON_AUDIO_FIELDS and their values
+
+    Raises:
+        ValueError: If a field is not an audio column
+    """
+    unknown = set(audio_fields) - LESSON_AUDIO_FIELDS
+    if unknown:
+        raise ValueError(f"Not lesson audio fields: {', '.join(sorted(unknown))}")
+
+    await db.execute(update(Lesson).where(Lesson.id == lesson_id).values(**audio_fields))
+    await db.commit()
+
+
 async def delete_lesson(db: AsyncSession, lesson_id: int) -> bool:
     """
     Soft delete a lesson (set is_active to False).
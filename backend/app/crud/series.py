@@ -140,6 +140,31 @@ async def get_all_series(
     return list(result.scalars().all())
 
 
+async def get_series_by_name(
+    db: AsyncSession, name: str, year: int, teacher_id: int
+) -> Optional[LessonSeries]:
+    """
+    Get a series by its unique key (name, year, teacher).
+
+    Args:
+        db: Database session
+        name: Series name
+        year: Series year
+        teacher_id: Teacher ID
+
+    Returns:
+        LessonSeries object or None
+    """
+    result = await db.execute(
+        select(LessonSeries).where(
+            LessonSeries.name == name,
+            LessonSeries.year == year,
+            LessonSeries.teacher_id == teacher_id
+        )
+    )
+    return result.scalar_one_or_none()
+
+
 async def create_series(db: AsyncSession, series_data: LessonSeriesCreate) -> LessonSeries:
     """
     Create a new lesson series.
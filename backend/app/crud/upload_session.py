@@ -0,0 +1,187 @@
+"""
+CRUD operations for UploadSession model (resumable uploads).
+
+Received chunks are tracked as merged byte ranges, so chunks may arrive in
+any order, in parallel and more than once. Ranges are updated under a row
+lock: parallel chunk requests on different nodes never lose each other's
+ranges.
+"""
+import json
+import secrets
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.upload_session import UploadSession
+
+UPLOAD_ACTIVE = "active"
+UPLOAD_COMPLETED = "completed"
+
+Range = List[int]  # [start, end)
+
+
+def parse_ranges(value: Optional[str]) -> List[Range]:
+    """Parse the received_ranges JSON column."""
+    try:
+        return json.loads(value) if value else []
+    except ValueError:
+        return []
+
+
+def merge_range(ranges: List[Range], start: int, end: int) -> List[Range]:
+    """
+    Add [start, end) to sorted, non-overlapping ranges.
+
+    Args:
+        ranges: Received ranges
+        start: First byte of the chunk
+        end: Byte after the chunk
+
+    Returns:
+        Sorted, merged ranges
+    """
+    merged = []
+    for range_start, range_end in sorted(ranges + [[start, end]]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_end)
+        else:
+            merged.append([range_start, range_end])
+    return merged
+
+
+def get_contiguous_offset(ranges: List[Range]) -> int:
+    """Number of bytes received from the start without gaps (tus Upload-Offset)."""
+    return ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+
+
+def get_missing_ranges(ranges: List[Range], size: int) -> List[Range]:
+    """Byte ranges not received yet."""
+    missing = []
+    position = 0
+    for start, end in ranges:
+        if start > position:
+            missing.append([position, start])
+        position = max(position, end)
+    if position < size:
+        missing.append([position, size])
+    return missing
+
+
+async def create_upload_session(db: AsyncSession, lesson_id: int, filename: str, size: int) -> UploadSession:
+    """
+    Create an upload session (expires after UPLOAD_SESSION_TTL_HOURS).
+
+    Args:
+        db: Database session
+        lesson_id: Lesson the audio is for
+        filename: Safe original file name
+        size: Total size in bytes
+
+    Returns:
+        Created session
+    """
+    upload = UploadSession(
+        id=secrets.token_hex(16),
+        lesson_id=lesson_id,
+        filename=filename,
+        size=size,
+        received_ranges="[]",
+        received_bytes=0,
+        status=UPLOAD_ACTIVE,
+        expires_at=datetime.utcnow() + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    )
+    db.add(upload)
+    await db.commit()
+    await db.refresh(upload)
+    return upload
+
+
+async def get_upload_session(
+    db: AsyncSession,
+    upload_id: str,
+    for_update: bool = False
+) -> Optional[UploadSession]:
+    """
+    Get upload session by ID.
+
+    Args:
+        db: Database session
+        upload_id: Session ID
+        for_update: Lock the row until the transaction ends and reload it;
+            the session may already hold the row, loaded before the lock
+            (expire_on_commit is off) and stale by now
+
+    Returns:
+        Session or None
+    """
+    query = select(UploadSession).where(UploadSession.id == upload_id)
+    if for_update:
+        query = query.with_for_update().execution_options(populate_existing=True)
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
+
+async def add_received_range(db: AsyncSession, upload_id: str, start: int, end: int) -> Optional[UploadSession]:
+    """
+    Record a chunk written to the part file.
+
+    Args:
+        db: Database session
+        upload_id: Session ID
+        start: First byte of the chunk
+        end: Byte after the chunk
+
+    Returns:
+        Updated session, or None if it no longer exists
+    """
+    upload = await get_upload_session(db, upload_id, for_update=True)
+    if upload is None:
+        await db.rollback()
+        return None
+
+    ranges = merge_range(parse_ranges(upload.received_ranges), start, end)
+    upload.received_ranges = json.dumps(ranges)
+    upload.received_bytes = sum(range_end - range_start for range_start, range_end in ranges)
+    await db.commit()
+    return upload
+
+
+async def complete_upload_session(db: AsyncSession, upload: UploadSession, sha256: str, job_id: int) -> None:
+    """Mark a session as completed and handed over to processing."""
+    upload.status = UPLOAD_COMPLETED
+    upload.sha256 = sha256
+    upload.job_id = job_id
+    await db.commit()
+
+
+async def delete_upload_session(db: AsyncSession, upload: UploadSession) -> None:
+    """Delete an upload session."""
+    await db.delete(upload)
+    await db.commit()
+
+
+async def pop_expired_upload_sessions(db: AsyncSession) -> List[UploadSession]:
+    """
+    Delete expired sessions.
+
+    Returns:
+        Deleted sessions (their part files are the caller's to remove)
+    """
+    result = await db.execute(
+        select(UploadSession).where(UploadSession.expires_at < datetime.utcnow())
+    )
+    expired = list(result.scalars().all())
+    for upload in expired:
+        await db.delete(upload)
+    if expired:
+        await db.commit()
+    return expired
+
+
+async def get_active_upload_ids(db: AsyncSession) -> List[str]:
+    """IDs of the sessions still receiving chunks (their part files are in use)."""
+    result = await db.execute(select(UploadSession.id).where(UploadSession.status == UPLOAD_ACTIVE))
+    return list(result.scalars().all())
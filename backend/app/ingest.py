@@ -0,0 +1,508 @@
+"""
+Bulk import of a lecture archive from a directory tree.
+
+Every folder that contains audio files becomes a series of the given
+teacher (nested folders are joined: "Акыда/2019 - Основы" -> series
+"Акыда - Основы" of 2019) and every file a lesson. Lesson numbers come
+from the first number in the file name, or from the natural sort order
+if those are missing or repeated in the folder.
+
+Files are transcoded on a process pool (one process per CPU by default)
+exactly like uploads: content-addressed original, MP3 with waveform and
+renditions; content already in the catalog is not transcoded again.
+Lessons are inserted in batched transactions, and every committed file is
+appended to a manifest, so an interrupted import is simply run again.
+
+Usage:
+    python -m app.ingest /data/archive --teacher-id 1 [--book-id 2] [--year 2020]
+    or
+    docker-compose exec api python -m app.ingest /data/archive --teacher-id 1 --dry-run
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from app.config import settings
+from app.crud import book as book_crud
+from app.crud import lesson as lesson_crud
+from app.crud import series as series_crud
+from app.crud import teacher as teacher_crud
+from app.database import AsyncSessionLocal
+from app.jobs.audio import release_audio_files
+from app.schemas.lesson import LessonSeriesCreate
+from app.utils.artifact_store import artifact_store
+from app.utils.audio_ingest import process_local_file
+from app.utils.audio_processing import AUDIO_BASE_DIR, compute_file_checksum, get_blob_name
+
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".m4a", ".ogg", ".flac", ".aac", ".opus", ".wma"}
+
+DEFAULT_BATCH_SIZE = 50
+
+# "2019 - Основы", "2019_Основы", "2019 Основы"
+YEAR_PREFIX = re.compile(r"^((?:19|20)\d{2})[\s._-]+(.+)$")
+
+
+@dataclass
+class IngestFile:
+    """Audio file mapped to a lesson."""
+    path: Path
+    lesson_number: int
+    size: int
+    mtime: int
+    sha256: Optional[str] = None
+
+
+@dataclass
+class IngestSeries:
+    """Folder mapped to a series."""
+    folder: Path
+    name: str
+    year: int
+    files: List[IngestFile] = field(default_factory=list)
+
+
+def natural_key(text: str) -> list:
+    """Sort key that orders "урок 2" before "урок 10"."""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", text)]
+
+
+def get_series_name(root: Path, folder: Path, default_year: int) -> tuple:
+    """
+    Series name and year for a folder.
+
+    Args:
+        root: Imported directory
+        folder: Folder with audio files
+        default_year: Year if no folder name starts with one
+
+    Returns:
+        (name, year)
+    """
+    parts = list(folder.relative_to(root).parts) or [root.resolve().name]
+    year = default_year
+    for index, part in enumerate(parts):
+        match = YEAR_PREFIX.match(part)
+        if match:
+            year = int(match.group(1))
+            parts[index] = match.group(2).strip()
+            break
+    return " - ".join(parts)[:255], year
+
+
+def number_files(paths: List[Path]) -> Dict[Path, int]:
+    """
+    Lesson numbers of a folder's files.
+
+    The first number in each file name is used if every file has one and
+    none repeats; otherwise files are numbered 1..N in natural order.
+
+    Args:
+        paths: Audio files of one folder
+
+    Returns:
+        Path -> lesson number
+    """
+    paths = sorted(paths, key=lambda p: natural_key(p.name))
+    numbers = []
+    for path in paths:
+        match = re.search(r"\d+", path.stem)
+        numbers.append(int(match.group()) if match else None)
+    if None not in numbers and 0 not in numbers and len(set(numbers)) == len(numbers):
+        return dict(zip(paths, numbers))
+    return {path: index for index, path in enumerate(paths, start=1)}
+
+
+def scan_archive(root: Path, default_year: int) -> List[IngestSeries]:
+    """
+    Map a directory tree to series and lessons.
+
+    Args:
+        root: Imported directory
+        default_year: Year of series whose folders carry none
+
+    Returns:
+        Series in natural folder order, files by lesson number
+    """
+    folders: Dict[Path, List[Path]] = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+        audio = [
+            Path(dirpath) / name for name in filenames
+            if not name.startswith(".") and Path(name).suffix.lower() in AUDIO_EXTENSIONS
+        ]
+        if audio:
+            folders[Path(dirpath)] = audio
+
+    archive = []
+    for folder in sorted(folders, key=lambda p: natural_key(str(p.relative_to(root)))):
+        name, year = get_series_name(root, folder, default_year)
+        series = IngestSeries(folder=folder, name=name, year=year)
+        for path, number in sorted(number_files(folders[folder]).items(), key=lambda item: item[1]):
+            stat = path.stat()
+            series.files.append(IngestFile(
+                path=path, lesson_number=number, size=stat.st_size, mtime=int(stat.st_mtime)
+            ))
+        archive.append(series)
+    return archive
+
+
+def get_manifest_path() -> Path:
+    """Default manifest file."""
+    return Path(settings.AUDIO_FILES_PATH) / ".ingest_manifest.jsonl"
+
+
+def read_manifest(manifest_path: Path) -> Set[tuple]:
+    """
+    Files already imported.
+
+    Returns:
+        Set of (path, size, mtime); a changed file is imported again
+    """
+    done = set()
+    if not manifest_path.exists():
+        return done
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                done.add((entry["path"], entry["size"], entry["mtime"]))
+            except (ValueError, KeyError):
+                continue  # Line cut off by an interrupted write
+    return done
+
+
+def build_title(teacher_name: str, book_name: Optional[str], series: IngestSeries, number: int) -> str:
+    """Lesson title in the admin app format: Преподаватель_Книга_Год_Серия_урок_N."""
+    parts = [teacher_name, book_name, str(series.year), series.name, f"урок_{number}"]
+    return "_".join(part.replace(" ", "_") for part in parts if part)[:255]
+
+
+class ArchiveIngest:
+    """One import run: transcodes on a process pool, inserts in batches."""
+
+    def __init__(
+        self,
+        teacher,
+        book,
+        theme_id: Optional[int],
+        workers: int,
+        batch_size: int,
+        manifest_path: Path
+    ):
+        self.teacher = teacher
+        self.book = book
+        self.theme_id = theme_id
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.manifest_path = manifest_path
+        self.stats = {"imported": 0, "deduplicated": 0, "skipped": 0, "failed": 0}
+        self.failures: List[tuple] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._batch: List[tuple] = []  # (IngestFile, lesson values) not inserted yet
+        self._batch_lock = asyncio.Lock()
+        self._transcodes: Dict[str, asyncio.Future] = {}  # sha256 -> processing in this run
+        self._users: Counter = Counter()  # sha256 -> files of this run using its audio
+
+    async def run(self, archive: List[IngestSeries], done: Set[tuple]) -> None:
+        """
+        Import an archive.
+
+        Args:
+            archive: Series from scan_archive
+            done: Files listed in the manifest (skipped)
+        """
+        # Pool processes are niced; ffmpeg inherits it (see with_transcode_priority)
+        nice = settings.AUDIO_TRANSCODE_NICE
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=os.nice if nice > 0 else None,
+            initargs=(nice,) if nice > 0 else ()
+        )
+        # At most one file per pool process in flight
+        semaphore = asyncio.Semaphore(self.workers)
+        try:
+            for series in archive:
+                pending = [
+                    item for item in series.files
+                    if (str(item.path.resolve()), item.size, item.mtime) not in done
+                ]
+                self.stats["skipped"] += len(series.files) - len(pending)
+                if not pending:
+                    continue
+
+                series_row = await self.get_or_create_series(series)
+                async with AsyncSessionLocal() as db:
+                    taken = await lesson_crud.get_series_lesson_numbers(db, series_row.id)
+                for item in pending:
+                    if item.lesson_number in taken:
+                        print(f"  ⚠ {item.path}: lesson {item.lesson_number} already exists, skipped")
+                        self.stats["skipped"] += 1
+                pending = [item for item in pending if item.lesson_number not in taken]
+
+                print(f"\n📁 {series.name} ({series.year}): {len(pending)} files -> series id={series_row.id}")
+                tasks = []
+                for item in pending:
+                    await semaphore.acquire()
+                    task = asyncio.create_task(self.import_file(series, series_row, item))
+                    task.add_done_callback(lambda _: semaphore.release())
+                    tasks.append(task)
+                await asyncio.gather(*tasks)
+
+            async with self._batch_lock:
+                await self.insert_batch()
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def get_or_create_series(self, series: IngestSeries):
+        """Existing series of the teacher with the same name and year, or a new one."""
+        async with AsyncSessionLocal() as db:
+            row = await series_crud.get_series_by_name(db, series.name, series.year, self.teacher.id)
+            if row:
+                return row
+            return await series_crud.create_series(db, LessonSeriesCreate(
+                name=series.name,
+                year=series.year,
+                teacher_id=self.teacher.id,
+                book_id=self.book.id if self.book else None,
+                theme_id=self.theme_id
+            ))
+
+    async def import_file(self, series: IngestSeries, series_row, item: IngestFile) -> None:
+        """Process one file and queue its lesson for insertion."""
+        loop = asyncio.get_running_loop()
+        try:
+            _, item.sha256 = await loop.run_in_executor(self._executor, compute_file_checksum, item.path)
+            audio, deduplicated = await self.get_audio(item)
+        except Exception as e:
+            self.fail(item, f"processing failed: {e}")
+            return
+
+        self._users[item.sha256] += 1
+        values = {
+            "title": build_title(
+                self.teacher.name, self.book.name if self.book else None, series, item.lesson_number
+            ),
+            "lesson_number": item.lesson_number,
+            "series_id": series_row.id,
+            "teacher_id": series_row.teacher_id,
+            "book_id": series_row.book_id,
+            "theme_id": series_row.theme_id,
+            "original_sha256": item.sha256,
+            "audio_version": 1,
+            **audio
+        }
+        if deduplicated:
+            self.stats["deduplicated"] += 1
+
+        async with self._batch_lock:
+            self._batch.append((item, values))
+            if len(self._batch) >= self.batch_size:
+                await self.insert_batch()
+
+    async def get_audio(self, item: IngestFile) -> tuple:
+        """
+        Audio columns for a file's lesson.
+
+        Content already in the catalog, or being processed in this run, is
+        reused; anything else is processed on the pool.
+
+        Returns:
+            (lesson audio columns, deduplicated)
+        """
+        async with AsyncSessionLocal() as db:
+            existing = await lesson_crud.get_lesson_by_original_sha256(db, item.sha256)
+        if existing is not None and (AUDIO_BASE_DIR / existing.audio_path).exists():
+            return {
+                "original_audio_path": existing.original_audio_path,
+                "audio_path": existing.audio_path,
+                "duration_seconds": existing.duration_seconds,
+                "waveform_data": existing.waveform_data,
+                "loudness_stats": existing.loudness_stats,
+                "renditions": existing.renditions,
+                "audio_size": existing.audio_size,
+                "audio_sha256": existing.audio_sha256
+            }, True
+
+        if item.sha256 in self._transcodes:
+            return await asyncio.shield(self._transcodes[item.sha256]), True
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._transcodes[item.sha256] = future
+        try:
+            processed = await loop.run_in_executor(self._executor, process_local_file, str(item.path))
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved: files waiting on it fail on their own
+            await self.release(item)
+            raise
+
+        audio = {
+            "original_audio_path": processed["original_audio_path"],
+            "audio_path": processed["audio_path"],
+            "duration_seconds": processed["duration_seconds"],
+            "waveform_data": json.dumps(processed["waveform"]) if processed["waveform"] else None,
+            "loudness_stats": json.dumps(processed["loudness_stats"]) if processed["loudness_stats"] else None,
+            "renditions": json.dumps(processed["renditions"]) if processed["renditions"] else None,
+            "audio_size": processed["audio_size"],
+            "audio_sha256": processed["audio_sha256"]
+        }
+        future.set_result(audio)
+        return audio, False
+
+    async def insert_batch(self) -> None:
+        """
+        Insert the queued lessons in one transaction (call under _batch_lock).
+
+        If the batch is rejected, its lessons are inserted one by one so a
+        single bad row does not drop the others. Inserted files are then
+        recorded in the manifest.
+        """
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+
+        inserted = []
+        try:
+            async with AsyncSessionLocal() as db:
+                lessons = await lesson_crud.create_lessons(db, [values for _, values in batch])
+                inserted = [(item, values, lesson.id) for (item, values), lesson in zip(batch, lessons)]
+        except Exception:
+            failed = []
+            for item, values in batch:
+                try:
+                    async with AsyncSessionLocal() as db:
+                        lesson = (await lesson_crud.create_lessons(db, [values]))[0]
+                    inserted.append((item, values, lesson.id))
+                except Exception as e:
+                    self.fail(item, f"insert failed: {e}")
+                    failed.append((item, values))
+            # Released after the others are inserted: they may share the audio
+            for item, values in failed:
+                self._users[item.sha256] -= 1
+                if self._users[item.sha256] <= 0:
+                    await self.release(item, lesson_crud.parse_renditions(values["renditions"]))
+
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            for item, _, lesson_id in inserted:
+                f.write(json.dumps({
+                    "path": str(item.path.resolve()),
+                    "size": item.size,
+                    "mtime": item.mtime,
+                    "sha256": item.sha256,
+                    "lesson_id": lesson_id
+                }, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        for _, values, _ in inserted:
+            await artifact_store.record_lesson_audio(
+                values["audio_path"], values["original_audio_path"],
+                lesson_crud.parse_renditions(values["renditions"])
+            )
+
+        self.stats["imported"] += len(inserted)
+        print(f"  ✓ Committed {len(inserted)} lessons ({self.stats['imported']} total)")
+
+    async def release(self, item: IngestFile, renditions: Optional[dict] = None) -> None:
+        """Delete the stored files of a failed file unless a lesson references them."""
+        original_path = f"original/{get_blob_name(item.sha256, item.path.suffix)}"
+        processed_path = Path(original_path.replace("original/", "processed/", 1)).with_suffix(".mp3").as_posix()
+        async with AsyncSessionLocal() as db:
+            await release_audio_files(db, original_path, processed_path, renditions)
+
+    def fail(self, item: IngestFile, error: str) -> None:
+        """Record a failed file."""
+        print(f"  ✗ {item.path}: {error}")
+        self.stats["failed"] += 1
+        self.failures.append((str(item.path), error))
+
+
+async def ingest(args: argparse.Namespace) -> int:
+    """Run an import, returns the exit code."""
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"❌ Not a directory: {root}")
+        return 2
+
+    archive = scan_archive(root, args.year or datetime.utcnow().year)
+    total = sum(len(series.files) for series in archive)
+    print(f"🔎 {root}: {len(archive)} series, {total} audio files")
+
+    async with AsyncSessionLocal() as db:
+        teacher = await teacher_crud.get_teacher_by_id(db, args.teacher_id)
+        book = await book_crud.get_book_by_id(db, args.book_id) if args.book_id else None
+    if not teacher:
+        print(f"❌ Teacher {args.teacher_id} not found")
+        return 2
+    if args.book_id and not book:
+        print(f"❌ Book {args.book_id} not found")
+        return 2
+    theme_id = book.theme_id if book and book.theme_id else args.theme_id
+    if args.theme_id and theme_id != args.theme_id:
+        print(f"⚠ --theme-id {args.theme_id} ignored: the book has theme {theme_id}")
+
+    if args.dry_run:
+        for series in archive:
+            print(f"\n📁 {series.name} ({series.year})")
+            for item in series.files:
+                print(f"  {item.lesson_number:>4}  {item.path.relative_to(root)}")
+        return 0
+
+    manifest_path = Path(args.manifest) if args.manifest else get_manifest_path()
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    done = read_manifest(manifest_path)
+    print(f"📝 Manifest: {manifest_path} ({len(done)} files already imported)")
+
+    started = time.perf_counter()
+    run = ArchiveIngest(teacher, book, theme_id, args.workers, args.batch_size, manifest_path)
+    await run.run(archive, done)
+
+    stats = run.stats
+    print(f"\n✅ Import finished in {time.perf_counter() - started:.1f} s")
+    print(f"   Imported:     {stats['imported']} (reused audio: {stats['deduplicated']})")
+    print(f"   Skipped:      {stats['skipped']}")
+    print(f"   Failed:       {stats['failed']}")
+    for path, error in run.failures:
+        print(f"     {path}: {error}")
+    return 1 if stats["failed"] else 0
+
+
+def main():
+    """Parse arguments and run the import."""
+    parser = argparse.ArgumentParser(
+        description="Import a lecture archive: folders become series, audio files lessons."
+    )
+    parser.add_argument("root", help="Archive directory")
+    parser.add_argument("--teacher-id", type=int, required=True, help="Teacher of the imported series")
+    parser.add_argument("--book-id", type=int, help="Book of the imported series")
+    parser.add_argument("--theme-id", type=int, help="Theme (ignored if the book has one)")
+    parser.add_argument("--year", type=int, help="Year of folders without one (default: current year)")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1,
+        help="Transcoding processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+        help=f"Lessons per transaction (default: {DEFAULT_BATCH_SIZE})"
+    )
+    parser.add_argument("--manifest", help="Manifest file (default: AUDIO_FILES_PATH/.ingest_manifest.jsonl)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the mapping without importing")
+    args = parser.parse_args()
+
+    raise SystemExit(asyncio.run(ingest(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Background job handlers.
+
+Each job type maps to an async handler(db, payload) run by app.worker;
+the dictionary it returns is stored as the job result. Handlers raise
+PermanentJobError for failures a retry cannot fix; any other exception is
+retried with backoff. An optional on_failure hook runs once a job has
+failed for good (e.g. to remove an upload nobody will process).
+"""
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Job types
+JOB_PROCESS_LESSON_AUDIO = "process_lesson_audio"
+JOB_GENERATE_LESSON_RENDITIONS = "generate_lesson_renditions"
+JOB_GENERATE_LESSON_WAVEFORM = "generate_lesson_waveform"
+JOB_GENERATE_ALL_WAVEFORMS = "generate_all_waveforms"
+JOB_COMPUTE_AUDIO_CHECKSUM = "compute_audio_checksum"
+JOB_SEND_VERIFICATION_EMAIL = "send_verification_email"
+JOB_SYNC_AUDIO_ARTIFACTS = "sync_audio_artifacts"
+JOB_RESTORE_AUDIO_ARTIFACT = "restore_audio_artifact"
+JOB_AUDIT_AUDIO_STORAGE = "audit_audio_storage"
+JOB_FREEZE_ORIGINALS = "freeze_originals"
+
+JobFunction = Callable[[AsyncSession, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+FailureHook = Callable[[AsyncSession, Dict[str, Any], str], Awaitable[None]]
+
+
+class PermanentJobError(Exception):
+    """Job failure that retrying cannot fix (missing lesson, bad payload...)."""
+
+
+class JobHandler(NamedTuple):
+    """Registered handler of a job type."""
+    run: JobFunction
+    on_failure: Optional[FailureHook]
+
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(job_type: str, on_failure: Optional[FailureHook] = None):
+    """
+    Register an async function as the handler of a job type.
+
+    Args:
+        job_type: Job type name
+        on_failure: Called with (db, payload, error) when the job fails for good
+    """
+    def decorator(func: JobFunction) -> JobFunction:
+        JOB_HANDLERS[job_type] = JobHandler(run=func, on_failure=on_failure)
+        return func
+    return decorator
+
+
+# Register handlers
+from app.jobs import audio, email  # noqa: E402,F401
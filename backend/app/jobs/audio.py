@@ -0,0 +1,422 @@
+"""
+Audio job handlers: upload processing, renditions, waveforms (one lesson
+or the whole catalog), checksums, artifact quota sync, the storage audit
+and the cold tier of originals.
+
+They run in app.worker, never on API nodes. Heavy work (ffmpeg) still goes
+through the bounded transcode pool, so a worker never runs more transcodes
+than AUDIO_TRANSCODE_CONCURRENCY whatever its WORKER_CONCURRENCY.
+"""
+import asyncio
+import json
+import logging
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud import artifact as artifact_crud
+from app.crud import cold_original as cold_crud
+from app.crud import job as job_crud
+from app.crud import lesson as lesson_crud
+from app.jobs import (
+    JOB_AUDIT_AUDIO_STORAGE,
+    JOB_COMPUTE_AUDIO_CHECKSUM,
+    JOB_FREEZE_ORIGINALS,
+    JOB_GENERATE_ALL_WAVEFORMS,
+    JOB_GENERATE_LESSON_RENDITIONS,
+    JOB_GENERATE_LESSON_WAVEFORM,
+    JOB_PROCESS_LESSON_AUDIO,
+    JOB_RESTORE_AUDIO_ARTIFACT,
+    JOB_SYNC_AUDIO_ARTIFACTS,
+    PermanentJobError,
+    job_handler,
+)
+from app.schemas.lesson import LessonUpdate
+from app.utils.artifact_store import artifact_store
+from app.utils.audio import get_audio_file_path
+from app.utils.audio_cache import hot_audio_cache
+from app.utils.audio_processing import (
+    AUDIO_BASE_DIR,
+    ORIGINAL_DIR,
+    compute_file_checksum,
+    delete_audio_files,
+    delete_rendition_files,
+    generate_rendition,
+    generate_renditions,
+    get_enabled_renditions,
+    process_original_file,
+)
+from app.utils.cold_storage import freeze_originals
+from app.utils.hls import delete_hls_package
+from app.utils.storage_audit import audit_storage
+from app.utils.transcode_pool import transcode_pool
+from app.utils.waveform_batch import WaveformBatch
+from app.utils.waveform_peaks import compute_lesson_waveform
+
+logger = logging.getLogger(__name__)
+
+
+async def release_audio_files(
+    db: AsyncSession,
+    original_path: Optional[str],
+    processed_path: Optional[str],
+    renditions: Optional[dict],
+    running_upload: Optional[str] = None
+) -> None:
+    """
+    Delete former audio files of a lesson that nothing references any more.
+
+    Stored files are content-addressed and shared between lessons with the
+    same audio, so a file is only removed when its reference count is zero:
+    lessons pointing at it, plus, for an original, unfinished
+    process_lesson_audio jobs that will read it. Call after the lesson row
+    has been updated.
+
+    Args:
+        db: Database session
+        original_path: Former original path
+        processed_path: Former processed path
+        renditions: Former renditions (belong to the original)
+        running_upload: Upload of the process_lesson_audio job calling
+                        this (its own job is not a reference)
+    """
+    if original_path:
+        pending = await count_pending_uploads(db)
+        if running_upload is not None:
+            pending[running_upload] -= 1
+        if pending[original_path] > 0 or await lesson_crud.count_audio_references(db, original_path) > 0:
+            original_path = None
+            renditions = None
+    if processed_path and await lesson_crud.count_audio_references(db, processed_path) > 0:
+        processed_path = None
+
+    if processed_path:
+        hot_audio_cache.invalidate(AUDIO_BASE_DIR / processed_path)
+    if original_path or processed_path:
+        delete_audio_files(original_path, processed_path)
+    delete_rendition_files(renditions)
+
+    deleted = [str(rendition["path"]) for rendition in (renditions or {}).values()]
+    if processed_path:
+        deleted.append(processed_path)
+    await artifact_crud.forget_artifacts(db, deleted)
+    if original_path:
+        await cold_crud.forget_cold_originals(db, [original_path])
+
+
+async def count_pending_uploads(db: AsyncSession) -> Counter:
+    """Originals waiting for unfinished process_lesson_audio jobs (path -> number of jobs)."""
+    payloads = await job_crud.get_unfinished_job_payloads(db, JOB_PROCESS_LESSON_AUDIO)
+    return Counter(f"original/{payload['original_name']}" for payload in payloads if payload.get("original_name"))
+
+
+async def release_upload(db: AsyncSession, payload: Dict[str, Any], error: str) -> None:
+    """Delete an uploaded original that failed processing for good, unless referenced."""
+    await release_audio_files(db, f"original/{payload['original_name']}", None, None)
+
+
+@job_handler(JOB_PROCESS_LESSON_AUDIO, on_failure=release_upload)
+async def process_lesson_audio(db: AsyncSession, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replace a lesson's audio with an uploaded original and process it.
+
+    Files are content-addressed by the SHA-256 of the original. If another
+    lesson already has processed audio for the same hash, its output is
+    reused and nothing is transcoded. The old files are released once the
+    lesson points at the new ones.
+
+    Payload:
+        lesson_id: Lesson ID
+        original_name: Committed upload inside original/ (see commit_upload)
+        sha256: SHA-256 of the original
+        size: Size of the original in bytes
+
+    Returns:
+        Paths, duration and renditions of the lesson's new audio
+    """
+    lesson_id = payload["lesson_id"]
+    original_name = payload["original_name"]
+    upload_path = f"original/{original_name}"
+
+    lesson = await lesson_crud.get_lesson_by_id(db, lesson_id)
+    if not lesson:
+        raise PermanentJobError(f"Lesson {lesson_id} not found")
+
+    old_original_path = lesson.original_audio_path
+    old_processed_path = lesson.audio_path
+    old_renditions = lesson_crud.parse_renditions(lesson.renditions)
+
+    existing = await lesson_crud.get_lesson_by_original_sha256(db, payload["sha256"])
+    deduplicated = existing is not None and (AUDIO_BASE_DIR / existing.audio_path).exists()
+
+    if deduplicated:
+        # Known content: reuse the processed output
+        original_path = existing.original_audio_path
+        processed_path = existing.audio_path
+        duration = existing.duration_seconds
+        renditions = lesson_crud.parse_renditions(existing.renditions)
+        waveform_data = existing.waveform_data
+        loudness_stats = existing.loudness_stats
+        audio_size, audio_sha256 = existing.audio_size, existing.audio_sha256
+        if audio_sha256 is None:
+            audio_size, audio_sha256 = await asyncio.to_thread(
+                compute_file_checksum, AUDIO_BASE_DIR / processed_path
+            )
+    else:
+        if not (ORIGINAL_DIR / original_name).exists():
+            raise PermanentJobError(f"Uploaded file is missing: {upload_path}")
+
+        # One decode gives the MP3, duration, loudness and waveform
+        processed = await transcode_pool.run(process_original_file, original_name)
+        original_path = processed.original_path
+        processed_path = processed.processed_path
+        duration = processed.duration_seconds
+        waveform_data = json.dumps(processed.waveform) if processed.waveform else None
+        loudness_stats = json.dumps(processed.loudness_stats) if processed.loudness_stats else None
+
+        # Extra renditions (low-bitrate Opus/AAC) from the stored original,
+        # normalized with the loudness measured above
+        renditions = await transcode_pool.run(
+            generate_renditions, original_path,
+            loudness_stats=processed.loudness_stats,
+            duration_seconds=duration
+        )
+
+        # Size and checksum for download manifests
+        audio_size, audio_sha256 = await asyncio.to_thread(
+            compute_file_checksum, AUDIO_BASE_DIR / processed_path
+        )
+
+    await lesson_crud.update_lesson_audio(
+        db, lesson_id,
+        original_audio_path=original_path,
+        original_sha256=payload["sha256"],
+        audio_path=processed_path,
+        duration_seconds=duration,
+        renditions=json.dumps(renditions) if renditions else None,
+        waveform_data=waveform_data,
+        loudness_stats=loudness_stats,
+        audio_size=audio_size,
+        audio_sha256=audio_sha256,
+        audio_version=(lesson.audio_version or 0) + 1
+    )
+    delete_hls_package(lesson_id)
+
+    # Old files, unless still used (by this or another lesson); with dedup
+    # the upload itself is released if it was stored under another name
+    await release_audio_files(
+        db,
+        old_original_path if old_original_path != original_path else None,
+        old_processed_path if old_processed_path != processed_path else None,
+        old_renditions if old_original_path != original_path else None,
+        running_upload=upload_path
+    )
+    if upload_path not in (original_path, old_original_path):
+        await release_audio_files(db, upload_path, None, None, running_upload=upload_path)
+
+    await artifact_store.record_lesson_audio(processed_path, original_path, renditions)
+
+    # Waveform comes with processing; older lessons reused by dedup may lack it
+    if waveform_data is None:
+        try:
+            await generate_lesson_waveform(db, {"lesson_id": lesson_id, "samples": 100})
+        except Exception as e:
+            logger.warning(f"Waveform generation failed for lesson {lesson_id}: {e}")
+
+    logger.info(f"Audio processed for lesson {lesson_id} (deduplicated: {deduplicated})")
+    return {
+        "lesson_id": lesson_id,
+        "original_path": original_path,
+        "processed_path": processed_path,
+        "duration_seconds": duration,
+        "renditions": renditions,
+        "original_size": payload.get("size"),
+        "original_sha256": payload["sha256"],
+        "deduplicated": deduplicated
+    }
+
+
+@job_handler(JOB_GENERATE_LESSON_RENDITIONS)
+async def generate_lesson_renditions(db: AsyncSession, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    (Re)generate the extra audio renditions of a lesson from its original.
+
+    Rendition files are shared by every lesson with the same original and
+    keep their names, so each one is encoded to a temporary file and renamed
+    over the current one: players keep streaming the old encoding until the
+    new one is in place. A failed rebuild leaves the renditions that were
+    already replaced, which are valid encodes of the same audio. The audio
+    version is not bumped: the audio itself did not change.
+
+    Payload:
+        lesson_id: Lesson ID
+
+    Returns:
+        Generated renditions
+    """
+    lesson_id = payload["lesson_id"]
+    lesson = await lesson_crud.get_lesson_by_id(db, lesson_id)
+    if not lesson or not lesson.original_audio_path:
+        raise PermanentJobError(f"Lesson {lesson_id} has no original audio file")
+
+    renditions = {}
+    for name in get_enabled_renditions():
+        renditions[name] = await transcode_pool.run(
+            generate_rendition, lesson.original_audio_path, name,
+            loudness_stats=lesson_crud.parse_loudness_stats(lesson.loudness_stats),
+            duration_seconds=lesson.duration_seconds
+        )
+
+    await lesson_crud.update_lesson_audio(
+        db, lesson_id,
+        renditions=json.dumps(renditions) if renditions else None
+    )
+    await artifact_store.record_lesson_audio(None, lesson.original_audio_path, renditions)
+    return {"lesson_id": lesson_id, "renditions": renditions}
+
+
+@job_handler(JOB_GENERATE_LESSON_WAVEFORM)
+async def generate_lesson_waveform(db: AsyncSession, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Generate waveform data (and the peaks sidecar) of a lesson's audio.
+
+    Payload:
+        lesson_id: Lesson ID
+        samples: Number of waveform samples (default: 100)
+
+    Returns:
+        Waveform JSON and number of samples
+    """
+    lesson_id = payload["lesson_id"]
+    samples = payload.get("samples", 100)
+
+    lesson = await lesson_crud.get_lesson_by_id(db, lesson_id)
+    if not lesson or not lesson.audio_path:
+        raise PermanentJobError(f"Lesson {lesson_id} has no audio file")
+
+    audio_path = get_audio_file_path(audio_path=lesson.audio_path, lesson_id=lesson_id)
+    if not audio_path:
+        raise PermanentJobError(f"Audio file not found: {lesson.audio_path}")
+
+    waveform_json = await transcode_pool.run(compute_lesson_waveform, str(audio_path), samples)
+    await lesson_crud.update_lesson(db, lesson_id, LessonUpdate(waveform_data=waveform_json))
+    return {"lesson_id": lesson_id, "waveform_data": waveform_json, "samples": samples}
+
+
+@job_handler(JOB_GENERATE_ALL_WAVEFORMS)
+async def generate_all_waveforms(db: AsyncSession, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Generate waveforms for all lessons with audio on the waveform process pool.
+
+    Progress is checkpointed (see app.utils.waveform_batch); if the worker
+    dies, the requeued job resumes the same batch instead of starting over.
+
+    Payload:
+        batch_id: Identifies the batch in the checkpoint
+        samples: Number of waveform samples
+        regenerate: Also lessons that already have a waveform
+
+    Returns:
+        Final batch status
+    """
+    batch = WaveformBatch(workers=settings.WAVEFORM_BATCH_WORKERS)
+    if not await batch.resume(payload["batch_id"]):
+        lesson_ids = await lesson_crud.get_lesson_ids_with_audio(
+            db, without_waveform=not payload.get("regenerate", False)
+        )
+        await batch.start(
+            payload["batch_id"], lesson_ids,
+            samples=payload.get("samples", 100),
+            regenerate=payload.get("regenerate", False)
+        )
+    return await batch.wait()
+
+
+@job_handler(JOB_COMPUTE_AUDIO_CHECKSUM)
+async def compute_audio_checksum(db: AsyncSession, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Store size and SHA-256 of a lesson's processed audio.
+
+    Payload:
+        lesson_id: Lesson ID
+
+    Returns:
+        Size and SHA-256
+    """
+    lesson_id = payload["lesson_id"]
+    lesson = await lesson_crud.get_lesson_by_id(db, lesson_id)
+    if not lesson or not lesson.audio_path:
+        raise PermanentJobError(f"Lesson {lesson_id} has no audio file")
+
+    audio_path = get_audio_file_path(audio_path=lesson.audio_path, lesson_id=lesson_id)
+    if not audio_path:
+        raise PermanentJobError(f"Audio file not found: {lesson.audio_path}")
+
+    audio_size, audio_sha256 = await asyncio.to_thread(compute_file_checksum, audio_path)
+    await lesson_crud.update_lesson_audio(db, lesson_id, audio_size=audio_size, audio_sha256=audio_sha256)
+    return {"lesson_id": lesson_id, "audio_size": audio_size, "audio_sha256": audio_sha256}
+
+
+@job_handler(JOB_SYNC_AUDIO_ARTIFACTS)
+async def sync_audio_artifacts(db: AsyncSession, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Track derived audio files not tracked yet and enforce the artifact quota.
+
+    Run once after enabling ARTIFACT_QUOTA_BYTES on existing storage, and
+    after changing the quota.
+
+    Returns:
+        Scanned and newly tracked artifacts, evicted artifacts and freed bytes
+    """
+    return await artifact_store.sync()
+
+
+@job_handler(JOB_RESTORE_AUDIO_ARTIFACT)
+async def restore_audio_artifact(db: AsyncSession, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Regenerate an evicted rendition that was requested again.
+
+    Queued by the audio stream endpoint, which serves the processed MP3
+    meanwhile.
+
+    Payload:
+        path: Rendition path relative to AUDIO_FILES_PATH
+
+    Returns:
+        Path and whether the file is on disk again
+    """
+    path = payload["path"]
+    restored = await artifact_store.restore(path)
+    if restored is None and get_audio_file_path(audio_path=path) is None:
+        raise PermanentJobError(f"Artifact {path} cannot be restored")
+    return {"path": path, "restored": restored is not None}
+
+
+@job_handler(JOB_AUDIT_AUDIO_STORAGE)
+async def audit_audio_storage(db: AsyncSession, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compare the audio directory with the lessons table (see app.utils.storage_audit).
+
+    Payload:
+        reclaim: Delete orphaned files (default False - report only)
+
+    Returns:
+        Audit report
+    """
+    return await audit_storage(db, reclaim=bool(payload.get("reclaim", False)))
+
+
+@job_handler(JOB_FREEZE_ORIGINALS)
+async def freeze_cold_originals(db: AsyncSession, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Move originals older than ORIGINAL_COLD_AFTER_DAYS to the cold tier.
+
+    Payload:
+        limit: Maximum number of originals (default: all)
+
+    Returns:
+        Frozen originals and bytes reclaimed (see app.utils.cold_storage)
+    """
+    return await freeze_originals(db, limit=payload.get("limit"))
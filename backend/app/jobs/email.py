@@ -0,0 +1,43 @@
+"""
+Email job handlers.
+
+Sending over SMTP can take seconds (or hang on a bad server), so request
+handlers queue emails instead of sending them inline.
+"""
+from typing import Any, Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import user as user_crud
+from app.jobs import JOB_SEND_VERIFICATION_EMAIL, PermanentJobError, job_handler
+from app.services.email import send_verification_email as send_verification_message
+
+
+@job_handler(JOB_SEND_VERIFICATION_EMAIL)
+async def send_verification_email(db: AsyncSession, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Send the email verification link to a user.
+
+    The token is read when the job runs, so a resend that replaced it in
+    the meantime never mails a stale link.
+
+    Payload:
+        user_id: User ID
+
+    Returns:
+        Recipient, or skipped=True if there is nothing to verify any more
+    """
+    user = await user_crud.get_user_by_id(db, payload["user_id"])
+    if not user:
+        raise PermanentJobError(f"User {payload['user_id']} not found")
+
+    if user.email_verified or not user.verification_token:
+        return {"email": user.email, "skipped": True}
+
+    await send_verification_message(
+        db=db,
+        email=user.email,
+        username=user.username,
+        token=user.verification_token
+    )
+    return {"email": user.email, "skipped": False}
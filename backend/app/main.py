@@ -7,6 +7,7 @@ from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.database import close_db
+from app.utils.artifact_store import artifact_store
 
 
 @asynccontextmanager
@@ -27,6 +28,7 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     print("Shutting down...")
+    await artifact_store.flush_touches()
     await close_db()
 
 
@@ -177,7 +179,7 @@ async def health_check():
 
 
 # Include API routers
-from app.api import auth, themes, books, book_authors, teachers, series, lessons, tests, statistics, migration, settings as settings_api, users, feedbacks, bookmarks
+from app.api import auth, themes, books, book_authors, teachers, series, lessons, tests, statistics, migration, settings as settings_api, users, feedbacks, bookmarks, jobs, uploads, storage
 
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
 app.include_router(themes.router, prefix=settings.API_V1_PREFIX)
@@ -186,10 +188,13 @@ app.include_router(book_authors.router, prefix=settings.API_V1_PREFIX)
 app.include_router(teachers.router, prefix=settings.API_V1_PREFIX)
 app.include_router(series.router, prefix=settings.API_V1_PREFIX)
 app.include_router(lessons.router, prefix=settings.API_V1_PREFIX)
+app.include_router(uploads.router, prefix=settings.API_V1_PREFIX)
 app.include_router(tests.router, prefix=settings.API_V1_PREFIX)
 app.include_router(users.router)
 app.include_router(feedbacks.router, prefix=settings.API_V1_PREFIX)
 app.include_router(bookmarks.router, prefix=settings.API_V1_PREFIX)
 app.include_router(statistics.router, prefix=settings.API_V1_PREFIX)
 app.include_router(migration.router, prefix=settings.API_V1_PREFIX)
+app.include_router(jobs.router, prefix=settings.API_V1_PREFIX)
+app.include_router(storage.router, prefix=settings.API_V1_PREFIX)
 app.include_router(settings_api.router)
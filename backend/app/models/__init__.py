@@ -9,6 +9,10 @@ from app.models.test import Test, TestQuestion, TestAttempt
 from app.models.bookmark import Bookmark
 from app.models.feedback import Feedback, FeedbackMessage
 from app.models.system_settings import SystemSettings
+from app.models.job import Job
+from app.models.upload_session import UploadSession
+from app.models.audio_artifact import AudioArtifact
+from app.models.cold_original import ColdOriginal
 
 __all__ = [
     # User models
@@ -32,4 +36,8 @@ __all__ = [
     "FeedbackMessage",
     # System models
     "SystemSettings",
+    "Job",
+    "UploadSession",
+    "AudioArtifact",
+    "ColdOriginal",
 ]
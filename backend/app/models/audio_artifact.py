@@ -0,0 +1,26 @@
+"""
+Audio artifact model.
+Derived audio files (processed MP3, renditions, HLS packages) tracked for the
+disk quota: size and last access of each, so the least recently used ones
+can be evicted and regenerated from original/ when requested again.
+"""
+from sqlalchemy import Column, BigInteger, String, DateTime
+from app.database import Base
+from app.models.base import TimestampMixin
+
+
+class AudioArtifact(Base, TimestampMixin):
+    """Derived audio file under AUDIO_FILES_PATH."""
+
+    __tablename__ = "audio_artifacts"
+
+    path = Column(String(500), primary_key=True)  # Relative to AUDIO_FILES_PATH (file, or directory for HLS)
+    kind = Column(String(20), nullable=False, index=True)  # 'processed', 'rendition', 'hls'
+    variant = Column(String(20), nullable=True)  # Rendition name
+    source_path = Column(String(500), nullable=True)  # Original it is regenerated from (None - not evictable, except HLS)
+    size = Column(BigInteger, default=0, nullable=False)  # Bytes on disk, sidecars included
+    last_accessed_at = Column(DateTime, nullable=False, index=True)
+    evicted_at = Column(DateTime, nullable=True, index=True)  # Deleted by the quota, restored on demand
+
+    def __repr__(self):
+        return f"<AudioArtifact(path='{self.path}', kind='{self.kind}', size={self.size})>"
@@ -0,0 +1,23 @@
+"""
+Cold original model.
+Originals moved to the cold tier (ORIGINAL_COLD_DIR), compressed losslessly
+where that pays off. Kept to report the bytes reclaimed and to skip
+re-encoding when an original comes back to original/.
+"""
+from sqlalchemy import Column, BigInteger, String
+from app.database import Base
+from app.models.base import TimestampMixin
+
+
+class ColdOriginal(Base, TimestampMixin):
+    """Original stored in the cold tier."""
+
+    __tablename__ = "cold_originals"
+
+    path = Column(String(500), primary_key=True)  # Original path (original/...), relative to AUDIO_FILES_PATH
+    format = Column(String(10), nullable=False, index=True)  # 'flac', 'xz', 'raw' (moved as is)
+    size = Column(BigInteger, nullable=False)  # Bytes of the original
+    cold_size = Column(BigInteger, nullable=False)  # Bytes in the cold tier (sidecar included)
+
+    def __repr__(self):
+        return f"<ColdOriginal(path='{self.path}', format='{self.format}', size={self.size}, cold_size={self.cold_size})>"
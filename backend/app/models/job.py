@@ -0,0 +1,34 @@
+"""
+Job model.
+Durable background job queue (audio processing, waveforms, emails) consumed by app.worker.
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from app.database import Base
+from app.models.base import TimestampMixin
+
+
+class Job(Base, TimestampMixin):
+    """Queued unit of background work."""
+
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    type = Column(String(50), nullable=False, index=True)  # Handler name, see app.jobs.JOB_HANDLERS
+    payload = Column(Text, nullable=False, default="{}")  # JSON arguments
+    status = Column(String(20), default='queued', nullable=False)  # 'queued', 'running', 'succeeded', 'failed'
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # Not claimed before (retry backoff)
+    locked_by = Column(String(100), nullable=True)  # Worker id (host:pid)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)  # JSON returned by the handler
+
+    __table_args__ = (
+        # Claim query: status = 'queued' AND run_at <= now ORDER BY run_at
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, type='{self.type}', status='{self.status}')>"
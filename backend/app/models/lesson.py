@@ -2,7 +2,7 @@
 Lesson models: Teachers, Series, Lessons.
 Core lesson structure and audio content.
 """
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.database import Base
 from app.models.base import TimestampMixin
@@ -69,10 +69,16 @@ class Lesson(Base, TimestampMixin):
     description = Column(Text, nullable=True)
     audio_path = Column(String(500), nullable=True)  # Path to processed MP3 file (processed/)
     original_audio_path = Column(String(500), nullable=True)  # Path to original uploaded file (original/)
+    original_sha256 = Column(String(64), nullable=True, index=True)  # Content address of the original (dedup)
     lesson_number = Column(Integer, nullable=True)
     duration_seconds = Column(Integer, nullable=True)
     tags = Column(String(500), nullable=True)  # Comma-separated tags
     waveform_data = Column(Text, nullable=True)  # JSON array of waveform amplitude values
+    renditions = Column(Text, nullable=True)  # JSON: quality -> {path, size, duration_seconds}
+    loudness_stats = Column(Text, nullable=True)  # JSON: loudnorm measurement of the original (reused by re-encodes)
+    audio_size = Column(BigInteger, nullable=True)  # Processed MP3 size in bytes
+    audio_sha256 = Column(String(64), nullable=True)  # Processed MP3 checksum (download manifest)
+    audio_version = Column(Integer, default=0, server_default="0", nullable=False)  # Bumped on audio upload/delete (signed URLs)
     series_id = Column(Integer, ForeignKey("lesson_series.id", ondelete="RESTRICT"), nullable=False, index=True)
     book_id = Column(Integer, ForeignKey("books.id", ondelete="SET NULL"), nullable=True, index=True)
     teacher_id = Column(Integer, ForeignKey("lesson_teachers.id", ondelete="SET NULL"), nullable=True, index=True)
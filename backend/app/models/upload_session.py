@@ -0,0 +1,28 @@
+"""
+Upload session model.
+Resumable chunked audio uploads: chunk state lives in the database, so an
+upload survives API restarts and its chunks can land on any node.
+"""
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey
+from app.database import Base
+from app.models.base import TimestampMixin
+
+
+class UploadSession(Base, TimestampMixin):
+    """Resumable upload of a lesson's audio file."""
+
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True)  # Random token, part of the upload URL
+    lesson_id = Column(Integer, ForeignKey("lessons.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)  # Safe original file name (extension kept)
+    size = Column(BigInteger, nullable=False)  # Declared total size in bytes
+    received_ranges = Column(Text, nullable=False, default="[]")  # JSON [[start, end), ...], merged
+    received_bytes = Column(BigInteger, default=0, nullable=False)
+    status = Column(String(20), default='active', nullable=False)  # 'active', 'completed'
+    sha256 = Column(String(64), nullable=True)  # Set on completion
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="SET NULL"), nullable=True)  # Processing job
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<UploadSession(id='{self.id}', lesson_id={self.lesson_id}, status='{self.status}')>"
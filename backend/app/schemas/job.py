@@ -0,0 +1,47 @@
+"""
+Pydantic schemas for Job model.
+Used for API response validation.
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, Field, field_validator
+
+
+class JobResponse(BaseModel):
+    """Schema for background job response."""
+    id: int
+    type: str
+    status: str = Field(..., description="queued, running, succeeded, failed")
+    payload: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = Field(None, description="Handler result once succeeded")
+    attempts: int
+    max_attempts: int
+    run_at: datetime = Field(..., description="Not run before (retry backoff)")
+    locked_by: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    @field_validator("payload", "result", mode="before")
+    @classmethod
+    def parse_json(cls, value):
+        """Job columns store JSON text."""
+        if isinstance(value, str):
+            try:
+                return json.loads(value)
+            except ValueError:
+                return None
+        return value
+
+    class Config:
+        from_attributes = True
+
+
+class PaginatedJobsResponse(BaseModel):
+    """Paginated jobs response."""
+    items: list[JobResponse]
+    total: int
+    skip: int
+    limit: int
+    counts: Dict[str, int] = Field(..., description="Number of jobs per status")
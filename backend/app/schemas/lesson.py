@@ -2,7 +2,7 @@
 Pydantic schemas for Teacher, Series, Lesson models.
 """
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 from pydantic import BaseModel, Field
 
 
@@ -146,6 +146,12 @@ class LessonSeriesWithCounts(LessonSeriesWithRelations):
 
 
 # Lesson schemas
+class AudioRenditionInfo(BaseModel):
+    """Size and duration of one audio rendition."""
+    size: Optional[int] = None
+    duration_seconds: Optional[int] = None
+
+
 class LessonBase(BaseModel):
     """Base lesson schema."""
     title: str = Field(..., max_length=255)
@@ -209,8 +215,10 @@ class LessonWithRelations(LessonResponse):
     display_title: Optional[str] = None  # e.g., "Урок 1"
     formatted_duration: Optional[str] = None  # e.g., "30м 15с"
     audio_url: Optional[str] = None  # API URL for audio streaming
+    signed_audio_url: Optional[str] = None  # Signed, expiring URL (no auth, cacheable by proxies)
     tags_list: Optional[List[str]] = None  # Parsed tags
     waveform_data: Optional[str] = None  # JSON array of waveform amplitude values
+    audio_qualities: Optional[Dict[str, AudioRenditionInfo]] = None  # Available ?quality= values
 
     # Related entities
     series: Optional[LessonSeriesNested] = None
@@ -227,9 +235,31 @@ class LessonListItem(BaseModel):
     duration_seconds: Optional[int] = None
     formatted_duration: Optional[str] = None
     audio_url: Optional[str] = None
-    waveform_data: Optional[str] = None  # JSON array of waveform amplitude values
+    signed_audio_url: Optional[str] = None  # Signed, expiring URL (no auth, cacheable by proxies)
     teacher: Optional[TeacherNested] = None
     book: Optional[BookNested] = None
 
     class Config:
         from_attributes = True
+
+
+class SeriesManifestItem(BaseModel):
+    """One lesson audio file in a series download manifest."""
+    id: int
+    lesson_number: Optional[int] = None
+    display_title: str
+    duration_seconds: Optional[int] = None
+    audio_url: str
+    signed_audio_url: Optional[str] = None
+    size: Optional[int] = None  # Bytes, None until computed (see /lessons/compute-audio-checksums)
+    sha256: Optional[str] = None
+    version: int  # Lesson audio_version; changes whenever the file is replaced
+
+
+class SeriesManifest(BaseModel):
+    """Series download manifest (for parallel, resumable downloads)."""
+    series_id: int
+    lessons_count: int
+    total_size: int  # Sum of known sizes
+    signed_download_url: Optional[str] = None  # Signed, expiring URL of the whole-series TAR
+    lessons: List[SeriesManifestItem]
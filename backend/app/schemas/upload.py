@@ -0,0 +1,12 @@
+"""
+Pydantic schemas for resumable uploads.
+Used for API request validation.
+"""
+from pydantic import BaseModel, Field
+
+
+class UploadSessionCreate(BaseModel):
+    """Schema for creating a resumable upload session."""
+    lesson_id: int
+    filename: str = Field(..., min_length=1, max_length=255, description="Original file name (with extension)")
+    size: int = Field(..., gt=0, description="Total file size in bytes")
@@ -0,0 +1,461 @@
+"""
+Disk quota for derived audio artifacts.
+
+Processed MP3s (with their seek index and waveform peaks sidecars),
+renditions and HLS packages are tracked in the audio_artifacts table with
+their size and last access. Renditions (rebuilt from the original in
+original/ or the cold tier) and HLS packages (from the processed MP3)
+count towards ARTIFACT_QUOTA_BYTES: when their total goes over it the
+least recently used ones are deleted until it is back under
+ARTIFACT_QUOTA_LOW_WATERMARK of the quota. Originals and processed MP3s
+are never evicted - every /audio request falls back to the processed MP3,
+and rebuilding it means a full transcode.
+
+An evicted rendition is regenerated by the worker (restore_audio_artifact
+job) when it is requested again; the API serves the processed MP3 until
+then. Concurrent restores share one regeneration: in-process through a
+shared future, across processes through a lock file per artifact.
+
+Accesses are collected in memory and written in one batched UPDATE every
+ARTIFACT_TOUCH_FLUSH_SECONDS, so streaming never waits on the database.
+"""
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from app.config import settings
+from app.crud import artifact as artifact_crud
+from app.crud import lesson as lesson_crud
+from app.database import AsyncSessionLocal
+from app.utils.audio import get_audio_file_path
+from app.utils.audio_cache import hot_audio_cache
+from app.utils.audio_processing import (
+    AUDIO_BASE_DIR,
+    ORIGINAL_DIR,
+    PROCESSED_DIR,
+    RENDITIONS_DIR,
+    RENDITION_LADDER,
+    generate_rendition,
+)
+from app.utils.cold_storage import list_cold_originals, original_exists
+from app.utils.hls import HLS_DIR
+from app.utils.seek_index import delete_seek_index, get_seek_index_path
+from app.utils.transcode_pool import transcode_pool
+from app.utils.waveform_peaks import delete_peaks, get_peaks_path
+
+logger = logging.getLogger(__name__)
+
+# Eviction candidates locked per query
+EVICTION_PAGE_SIZE = 100
+
+# Artifacts inserted per transaction by sync
+SYNC_BATCH_SIZE = 500
+
+# Pending accesses that force a flush before ARTIFACT_TOUCH_FLUSH_SECONDS
+MAX_PENDING_TOUCHES = 10000
+
+
+def get_artifact_key(path: Path) -> Optional[str]:
+    """
+    Artifact key (path relative to AUDIO_FILES_PATH) of a served file.
+
+    Args:
+        path: Absolute path, or relative to the working directory
+            ("audio_files/...", see get_audio_file_path)
+
+    Returns:
+        Key, or None if the file is not under the audio directory
+    """
+    parts = Path(path).parts
+    if parts and parts[0] == "audio_files":
+        return Path(*parts[1:]).as_posix()
+    try:
+        return Path(path).relative_to(AUDIO_BASE_DIR).as_posix()
+    except ValueError:
+        return None
+
+
+def get_processed_source(processed_path: str, original_path: Optional[str]) -> Optional[str]:
+    """Original a processed MP3 is rebuilt from (None if its name does not derive from it)."""
+    if not original_path or not original_path.startswith("original/"):
+        return None
+    original_name = original_path[len("original/"):]
+    if f"processed/{Path(original_name).with_suffix('.mp3').as_posix()}" != processed_path:
+        return None
+    return original_path
+
+
+def get_artifact_size(key: str, kind: str) -> int:
+    """Bytes on disk of an artifact (processed MP3 with sidecars, HLS directory)."""
+    full_path = AUDIO_BASE_DIR / key
+    if kind == artifact_crud.ARTIFACT_HLS:
+        return sum(f.stat().st_size for f in full_path.iterdir() if f.is_file())
+    size = full_path.stat().st_size
+    if kind == artifact_crud.ARTIFACT_PROCESSED:
+        for sidecar in (get_seek_index_path(full_path), get_peaks_path(full_path)):
+            if sidecar.exists():
+                size += sidecar.stat().st_size
+    return size
+
+
+def delete_artifact_files(key: str, kind: str) -> None:
+    """Delete an artifact's files."""
+    full_path = AUDIO_BASE_DIR / key
+    if kind == artifact_crud.ARTIFACT_HLS:
+        shutil.rmtree(full_path, ignore_errors=True)
+        return
+    hot_audio_cache.invalidate(full_path)
+    full_path.unlink(missing_ok=True)
+    if kind == artifact_crud.ARTIFACT_PROCESSED:
+        delete_seek_index(full_path)
+        delete_peaks(full_path)
+
+
+def _lock_artifact(key: str) -> int:
+    """Take the cross-process lock of an artifact (blocking), returns the fd."""
+    lock_dir = AUDIO_BASE_DIR / ".locks"
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    lock_path = lock_dir / f"{hashlib.sha1(key.encode()).hexdigest()}.lock"
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    return fd
+
+
+def _unlock_artifact(fd: int) -> None:
+    """Release a lock taken by _lock_artifact."""
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def scan_artifacts() -> Iterator[dict]:
+    """
+    Derived artifacts on disk (for sync), with their source originals.
+
+    Yields:
+        Column values: path, kind, variant, source_path, size, last_accessed_at (file mtime)
+    """
+    originals: Dict[str, Dict[str, str]] = {}  # Shard -> stem -> original file name
+
+    def find_original(stem: str) -> Optional[str]:
+        shard = stem[:2]
+        if shard not in originals:
+            shard_dir = ORIGINAL_DIR / shard
+            names = os.listdir(shard_dir) if shard_dir.is_dir() else []
+            names += list_cold_originals(shard)
+            originals[shard] = {Path(name).stem: name for name in names if not name.startswith(".")}
+        name = originals[shard].get(stem)
+        return f"original/{shard}/{name}" if name else None
+
+    def entry(key: str, kind: str, stat, variant=None, source=None) -> dict:
+        return {
+            "path": key,
+            "kind": kind,
+            "variant": variant,
+            "source_path": source,
+            "size": get_artifact_size(key, kind) if kind != artifact_crud.ARTIFACT_RENDITION else stat.st_size,
+            "last_accessed_at": datetime.utcfromtimestamp(stat.st_mtime)
+        }
+
+    if PROCESSED_DIR.is_dir():
+        for shard in sorted(os.scandir(PROCESSED_DIR), key=lambda e: e.name):
+            if not shard.is_dir() or shard.name == RENDITIONS_DIR.name:
+                continue
+            for item in os.scandir(shard.path):
+                if item.name.startswith(".") or not item.name.endswith(".mp3"):
+                    continue
+                key = f"processed/{shard.name}/{item.name}"
+                original = find_original(Path(item.name).stem)
+                yield entry(key, artifact_crud.ARTIFACT_PROCESSED, item.stat(),
+                            source=get_processed_source(key, original))
+
+    if RENDITIONS_DIR.is_dir():
+        for item in os.scandir(RENDITIONS_DIR):
+            parts = item.name.split(".")
+            if item.name.startswith(".") or len(parts) != 3 or parts[1] not in RENDITION_LADDER:
+                continue
+            yield entry(f"processed/renditions/{item.name}", artifact_crud.ARTIFACT_RENDITION, item.stat(),
+                        variant=parts[1], source=find_original(parts[0]))
+
+    if HLS_DIR.is_dir():
+        for lesson_dir in os.scandir(HLS_DIR):
+            if not lesson_dir.is_dir():
+                continue
+            for version_dir in os.scandir(lesson_dir.path):
+                if version_dir.name.startswith(".") or not version_dir.is_dir():
+                    continue
+                key = f"hls/{lesson_dir.name}/{version_dir.name}"
+                yield entry(key, artifact_crud.ARTIFACT_HLS, version_dir.stat())
+
+
+class ArtifactStore:
+    """Tracks derived artifacts, enforces the quota and restores evicted ones."""
+
+    def __init__(self, quota_bytes: int, low_watermark: float, min_idle_seconds: int, flush_seconds: int):
+        self.quota_bytes = quota_bytes
+        self.low_watermark = min(max(low_watermark, 0.0), 1.0)
+        self.min_idle_seconds = min_idle_seconds
+        self.flush_seconds = flush_seconds
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.restores = 0
+        self.restore_failures = 0
+        self._touches: Dict[str, datetime] = {}
+        self._last_flush = time.monotonic()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._restoring: Dict[str, asyncio.Future] = {}
+        self._enforce_lock = asyncio.Lock()
+
+    async def record(
+        self,
+        key: str,
+        kind: str,
+        source_path: Optional[str] = None,
+        variant: Optional[str] = None
+    ) -> None:
+        """
+        Track an artifact that was just written, then enforce the quota.
+
+        Never raises: accounting must not fail the work that produced the file.
+
+        Args:
+            key: Path relative to AUDIO_FILES_PATH
+            kind: ARTIFACT_PROCESSED, ARTIFACT_RENDITION or ARTIFACT_HLS
+            source_path: Original it can be regenerated from
+            variant: Rendition name
+        """
+        try:
+            size = await asyncio.to_thread(get_artifact_size, key, kind)
+            async with AsyncSessionLocal() as db:
+                await artifact_crud.save_artifact(db, key, kind, size, source_path=source_path, variant=variant)
+        except Exception as e:
+            logger.warning(f"Could not record artifact {key}: {e}")
+            return
+        await self.enforce_quota()
+
+    async def record_lesson_audio(
+        self,
+        processed_path: Optional[str],
+        original_path: Optional[str],
+        renditions: Optional[Dict[str, Dict[str, object]]]
+    ) -> None:
+        """Track a lesson's processed MP3 and renditions."""
+        if processed_path:
+            await self.record(
+                processed_path, artifact_crud.ARTIFACT_PROCESSED,
+                source_path=get_processed_source(processed_path, original_path)
+            )
+        for name, rendition in (renditions or {}).items():
+            await self.record(
+                str(rendition["path"]), artifact_crud.ARTIFACT_RENDITION,
+                source_path=original_path, variant=name
+            )
+
+    def touch(self, path: Path) -> None:
+        """Note an access to a served file (written to the database in batches)."""
+        key = get_artifact_key(path)
+        if key is None:
+            return
+        self._touches[key] = datetime.utcnow()
+
+        due = time.monotonic() - self._last_flush >= self.flush_seconds or len(self._touches) >= MAX_PENDING_TOUCHES
+        if due and (self._flush_task is None or self._flush_task.done()):
+            self._last_flush = time.monotonic()
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush_touches())
+
+    async def flush_touches(self) -> None:
+        """Write the collected access times."""
+        touches, self._touches = self._touches, {}
+        if not touches:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                await artifact_crud.touch_artifacts(db, touches)
+        except Exception as e:
+            logger.warning(f"Could not store artifact access times: {e}")
+
+    def is_evictable(self, artifact) -> bool:
+        """Whether an artifact may be evicted (and rebuilt when requested again)."""
+        if artifact.kind == artifact_crud.ARTIFACT_HLS:
+            return True
+        if artifact.kind not in artifact_crud.EVICTABLE_KINDS:
+            return False
+        return bool(artifact.source_path) and original_exists(artifact.source_path)
+
+    async def enforce_quota(self) -> Dict[str, int]:
+        """
+        Evict least recently used artifacts while over the quota.
+
+        Only artifacts idle for ARTIFACT_MIN_IDLE_SECONDS and rebuildable
+        from an existing source are evicted. Rows of files that are gone are
+        dropped on the way.
+
+        Returns:
+            Number of evicted artifacts and freed bytes
+        """
+        result = {"evicted": 0, "freed_bytes": 0}
+        if self.quota_bytes <= 0:
+            return result
+
+        async with self._enforce_lock:
+            async with AsyncSessionLocal() as db:
+                used = await artifact_crud.get_resident_size(db)
+                if used <= self.quota_bytes:
+                    return result
+                target = int(self.quota_bytes * self.low_watermark)
+                idle_before = datetime.utcnow() - timedelta(seconds=self.min_idle_seconds)
+                logger.info(f"Artifacts use {used} bytes of {self.quota_bytes}, evicting down to {target}")
+
+                after = None
+                while used > target:
+                    candidates = await artifact_crud.claim_lru_artifacts(
+                        db, idle_before, after=after, limit=EVICTION_PAGE_SIZE
+                    )
+                    if not candidates:
+                        break
+                    after = (candidates[-1].last_accessed_at, candidates[-1].path)
+
+                    for artifact in candidates:
+                        if used <= target:
+                            break
+                        full_path = AUDIO_BASE_DIR / artifact.path
+                        if not full_path.exists():
+                            used -= artifact.size
+                            await db.delete(artifact)
+                            continue
+                        if not self.is_evictable(artifact):
+                            continue
+                        await asyncio.to_thread(delete_artifact_files, artifact.path, artifact.kind)
+                        artifact.evicted_at = datetime.utcnow()
+                        used -= artifact.size
+                        result["evicted"] += 1
+                        result["freed_bytes"] += artifact.size
+                        logger.info(f"Evicted artifact {artifact.path} ({artifact.size} bytes)")
+                    # Releases the row locks of this page
+                    await db.commit()
+
+        self.evictions += result["evicted"]
+        self.evicted_bytes += result["freed_bytes"]
+        if used > target:
+            logger.warning(f"Artifact quota still exceeded ({used} bytes): nothing else can be evicted")
+        return result
+
+    async def restore(self, key: str) -> Optional[Path]:
+        """
+        Regenerate an evicted rendition (single-flight per key, worker only).
+
+        Args:
+            key: Path relative to AUDIO_FILES_PATH
+
+        Returns:
+            Path of the restored file (see get_audio_file_path), or None if the
+            artifact was not evicted or cannot be rebuilt
+        """
+        future = self._restoring.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._restoring[key] = future
+        try:
+            path = await self._restore(key)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Restoring artifact {key} failed: {e}")
+            self.restore_failures += 1
+            path = None
+        finally:
+            self._restoring.pop(key, None)
+        future.set_result(path)
+        return path
+
+    async def _restore(self, key: str) -> Optional[Path]:
+        """Rebuild an artifact under its cross-process lock."""
+        async with AsyncSessionLocal() as db:
+            artifact = await artifact_crud.get_artifact(db, key)
+        if artifact is None or artifact.evicted_at is None or not artifact.source_path:
+            return None
+        if artifact.kind != artifact_crud.ARTIFACT_RENDITION:
+            return None
+
+        fd = await asyncio.to_thread(_lock_artifact, key)
+        try:
+            full_path = AUDIO_BASE_DIR / key
+            if not full_path.exists():
+                # Not rebuilt by another process while we waited for the lock
+                await self._regenerate(artifact)
+                self.restores += 1
+                logger.info(f"Restored evicted artifact {key}")
+            await self.record(key, artifact.kind, source_path=artifact.source_path, variant=artifact.variant)
+        finally:
+            await asyncio.to_thread(_unlock_artifact, fd)
+
+        return get_audio_file_path(audio_path=key)
+
+    async def _regenerate(self, artifact) -> None:
+        """Rebuild a rendition's file from its original."""
+        if not original_exists(artifact.source_path):
+            raise FileNotFoundError(f"Original is missing: {artifact.source_path}")
+
+        sha256 = Path(artifact.source_path).stem
+        async with AsyncSessionLocal() as db:
+            lesson = await lesson_crud.get_lesson_by_original_sha256(db, sha256)
+        loudness_stats = lesson_crud.parse_loudness_stats(lesson.loudness_stats) if lesson else None
+        duration = lesson.duration_seconds if lesson else None
+
+        await transcode_pool.run(
+            generate_rendition, artifact.source_path, artifact.variant,
+            loudness_stats=loudness_stats, duration_seconds=duration
+        )
+
+    async def sync(self) -> Dict[str, int]:
+        """
+        Track artifacts found on disk that are not tracked yet, then enforce the quota.
+
+        Untracked files get their modification time as last access.
+
+        Returns:
+            Numbers of scanned and newly tracked artifacts, eviction result
+        """
+        scanned = 0
+        added = 0
+        entries = scan_artifacts()
+        while True:
+            batch: List[dict] = await asyncio.to_thread(
+                lambda: [item for _, item in zip(range(SYNC_BATCH_SIZE), entries)]
+            )
+            if not batch:
+                break
+            scanned += len(batch)
+            async with AsyncSessionLocal() as db:
+                added += await artifact_crud.add_untracked_artifacts(db, batch)
+
+        result = await self.enforce_quota()
+        return {"scanned": scanned, "added": added, **result}
+
+    def stats(self) -> Dict[str, int]:
+        """Counters of this process."""
+        return {
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "restores": self.restores,
+            "restore_failures": self.restore_failures,
+            "pending_touches": len(self._touches),
+        }
+
+
+# Global store instance (one per process)
+artifact_store = ArtifactStore(
+    quota_bytes=settings.ARTIFACT_QUOTA_BYTES,
+    low_watermark=settings.ARTIFACT_QUOTA_LOW_WATERMARK,
+    min_idle_seconds=settings.ARTIFACT_MIN_IDLE_SECONDS,
+    flush_seconds=settings.ARTIFACT_TOUCH_FLUSH_SECONDS
+)
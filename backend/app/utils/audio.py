@@ -2,7 +2,8 @@
 Audio streaming utilities with Range request support.
 """
 import os
-from typing import Optional, Tuple
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Optional, Tuple
 from pathlib import Path
 
 
@@ -40,60 +41,130 @@ def get_audio_file_path(audio_path: Optional[str] = None, lesson_id: Optional[in
     return None
 
 
-def parse_range_header(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+# Maximum number of ranges served in one multipart/byteranges response
+MAX_RANGES = 8
+
+
+def _parse_range_spec(range_spec: str, file_size: int) -> Optional[Tuple[int, int]]:
     """
-    Parse HTTP Range header.
+    Parse a single byte-range-spec ("start-end", "start-" or "-suffix").
 
     Args:
-        range_header: Range header value (e.g., "bytes=0-1023")
+        range_spec: One range from the Range header, without "bytes="
         file_size: Total file size in bytes
 
     Returns:
-        Tuple of (start_byte, end_byte) or None if invalid
+        Tuple of (start_byte, end_byte) or None if unsatisfiable
+
+    Raises:
+        ValueError: If the range is syntactically invalid
     """
-    try:
-        # Format: "bytes=start-end"
-        if not range_header.startswith("bytes="):
-            return None
+    range_spec = range_spec.strip()
 
-        range_spec = range_header[6:]  # Remove "bytes="
+    if "-" not in range_spec:
+        raise ValueError(f"Invalid range: {range_spec}")
+
+    parts = range_spec.split("-", 1)
+
+    # Case 1: "bytes=start-end"
+    if parts[0] and parts[1]:
+        start = int(parts[0])
+        end = int(parts[1])
+
+    # Case 2: "bytes=start-" (from start to end of file)
+    elif parts[0] and not parts[1]:
+        start = int(parts[0])
+        end = file_size - 1
+
+    # Case 3: "bytes=-end" (last N bytes)
+    elif not parts[0] and parts[1]:
+        start = file_size - int(parts[1])
+        end = file_size - 1
+
+    else:
+        raise ValueError(f"Invalid range: {range_spec}")
+
+    # Validate range
+    if start < 0 or start >= file_size:
+        return None
 
-        # Handle different range formats
-        if "-" not in range_spec:
-            return None
+    if end < start or end >= file_size:
+        end = file_size - 1
 
-        parts = range_spec.split("-", 1)
+    return (start, end)
 
-        # Case 1: "bytes=start-end"
-        if parts[0] and parts[1]:
-            start = int(parts[0])
-            end = int(parts[1])
 
-        # Case 2: "bytes=start-" (from start to end of file)
-        elif parts[0] and not parts[1]:
-            start = int(parts[0])
-            end = file_size - 1
+def coalesce_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Sort ranges and merge the ones that overlap or are adjacent.
 
-        # Case 3: "bytes=-end" (last N bytes)
-        elif not parts[0] and parts[1]:
-            start = file_size - int(parts[1])
-            end = file_size - 1
+    Args:
+        ranges: List of (start, end) byte ranges
 
+    Returns:
+        Sorted list of non-overlapping ranges
+    """
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
         else:
-            return None
+            merged.append((start, end))
+    return merged
+
+
+def parse_ranges(range_header: str, file_size: int, max_ranges: int = MAX_RANGES) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse an HTTP Range header that may contain several ranges.
 
-        # Validate range
-        if start < 0 or start >= file_size:
-            return None
+    Unsatisfiable ranges are dropped, the rest are coalesced.
 
-        if end < start or end >= file_size:
-            end = file_size - 1
+    Args:
+        range_header: Range header value (e.g., "bytes=0-1023,50000-")
+        file_size: Total file size in bytes
+        max_ranges: Maximum number of ranges after coalescing
 
-        return (start, end)
+    Returns:
+        Sorted list of (start_byte, end_byte) or None if invalid,
+        unsatisfiable or above the range limit
+    """
+    if not range_header.startswith("bytes="):
+        return None
+
+    specs = range_header[6:].split(",")  # Remove "bytes="
 
+    # Refuse pathological headers before doing any work
+    if len(specs) > max_ranges * 4:
+        return None
+
+    try:
+        ranges = [_parse_range_spec(spec, file_size) for spec in specs]
     except (ValueError, IndexError):
         return None
 
+    ranges = coalesce_ranges([r for r in ranges if r is not None])
+    if not ranges or len(ranges) > max_ranges:
+        return None
+
+    return ranges
+
+
+def parse_range_header(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse HTTP Range header with a single range.
+
+    Args:
+        range_header: Range header value (e.g., "bytes=0-1023")
+        file_size: Total file size in bytes
+
+    Returns:
+        Tuple of (start_byte, end_byte) or None if invalid
+    """
+    ranges = parse_ranges(range_header, file_size, max_ranges=1)
+    if not ranges:
+        return None
+    return ranges[0]
+
 
 def get_content_range_header(start: int, end: int, total: int) -> str:
     """
@@ -118,3 +189,153 @@ def get_chunk_size() -> int:
         Chunk size in bytes (default: 64KB)
     """
     return 64 * 1024  # 64 KB chunks
+
+
+def make_etag(file_size: int, mtime: float) -> str:
+    """
+    Build a strong ETag from file identity (size + modification time).
+
+    Args:
+        file_size: File size in bytes
+        mtime: File modification time (st_mtime)
+
+    Returns:
+        Quoted ETag value (e.g., '"18f3a-65b1c2d3e4f5"')
+    """
+    return f'"{file_size:x}-{int(mtime * 1_000_000):x}"'
+
+
+def format_http_date(timestamp: float) -> str:
+    """
+    Format a UNIX timestamp as an HTTP date (for Last-Modified).
+
+    Args:
+        timestamp: UNIX timestamp
+
+    Returns:
+        HTTP date string (e.g., "Sun, 26 Oct 2025 22:02:56 GMT")
+    """
+    return formatdate(timestamp, usegmt=True)
+
+
+def parse_http_date(value: str) -> Optional[int]:
+    """
+    Parse an HTTP date into a UNIX timestamp.
+
+    Args:
+        value: HTTP date string
+
+    Returns:
+        UNIX timestamp (seconds) or None if the value is not a valid date
+    """
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def _etag_list(header_value: str) -> list:
+    """Split an If-None-Match / If-Match header into ETag values."""
+    return [tag.strip() for tag in header_value.split(",") if tag.strip()]
+
+
+def _weak_etag_match(a: str, b: str) -> bool:
+    """Weak comparison: ETags match ignoring the W/ prefix."""
+    return a.removeprefix("W/") == b.removeprefix("W/")
+
+
+def is_not_modified(
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+    etag: str,
+    mtime: float
+) -> bool:
+    """
+    Check conditional GET headers against the current file validators.
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110, 13.2.2).
+
+    Args:
+        if_none_match: If-None-Match header value
+        if_modified_since: If-Modified-Since header value
+        etag: Current ETag of the file
+        mtime: Current modification time of the file
+
+    Returns:
+        True if the client's copy is still valid (respond with 304)
+    """
+    if if_none_match:
+        tags = _etag_list(if_none_match)
+        return "*" in tags or any(_weak_etag_match(tag, etag) for tag in tags)
+
+    if if_modified_since:
+        since = parse_http_date(if_modified_since)
+        if since is not None:
+            return int(mtime) <= since
+
+    return False
+
+
+def if_range_matches(if_range: Optional[str], etag: str, mtime: float) -> bool:
+    """
+    Evaluate an If-Range precondition.
+
+    If-Range carries either an ETag (strong comparison) or an HTTP date
+    (exact match with Last-Modified). When it does not match, the Range header
+    must be ignored and the full file sent.
+
+    Args:
+        if_range: If-Range header value
+        etag: Current ETag of the file
+        mtime: Current modification time of the file
+
+    Returns:
+        True if the Range header should be honoured
+    """
+    if not if_range:
+        return True
+
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # Weak ETags never match in If-Range
+        return not if_range.startswith("W/") and if_range == etag
+
+    since = parse_http_date(if_range)
+    return since is not None and since == int(mtime)
+
+
+def select_audio_quality(
+    requested: Optional[str],
+    save_data: Optional[str],
+    effective_connection_type: Optional[str],
+    default: str = "high"
+) -> str:
+    """
+    Pick an audio rendition from the ?quality= parameter or client hints.
+
+    An explicit quality always wins. Otherwise "Save-Data: on" or a 2G
+    effective connection type (ECT client hint) selects "low", 3G selects
+    "medium".
+
+    Args:
+        requested: Value of the quality query parameter
+        save_data: Save-Data request header
+        effective_connection_type: ECT request header ("slow-2g", "2g", "3g", "4g")
+        default: Quality used when there is no hint
+
+    Returns:
+        Quality name
+    """
+    if requested:
+        return requested
+
+    if save_data and save_data.strip().lower() == "on":
+        return "low"
+
+    ect = (effective_connection_type or "").strip().lower()
+    if ect in ("slow-2g", "2g"):
+        return "low"
+    if ect == "3g":
+        return "medium"
+
+    return default
@@ -0,0 +1,152 @@
+"""
+Hot-content tier for audio serving.
+
+Keeps the most requested processed audio files memory-mapped (with
+MADV_WILLNEED read-ahead) under a byte budget with LRU eviction, so range
+slices are served straight from memory instead of reopening and rereading
+the file for every request. Mapping happens in a worker thread, and so do
+the copies out of the map (AudioFileResponse): a page that is not resident
+faults in a thread, never on the event loop.
+"""
+import asyncio
+import mmap
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from app.config import settings
+
+
+class HotAudioCache:
+    """
+    LRU of memory-mapped audio files bounded by total mapped bytes.
+
+    A file is admitted on its admit_after-th request, so one-off plays of
+    old lessons do not push out the hot ones. Entries are keyed by
+    (path, etag), so a re-uploaded file is never served from a stale map.
+    """
+
+    # Bound for the request counter of not-yet-admitted files
+    MAX_TRACKED_FILES = 10000
+
+    def __init__(self, budget_bytes: int, admit_after: int):
+        self.budget_bytes = budget_bytes
+        self.admit_after = max(1, admit_after)
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._maps: "OrderedDict[Tuple[str, str], mmap.mmap]" = OrderedDict()
+        self._request_counts: Dict[Tuple[str, str], int] = {}
+        self._admitting: Set[Tuple[str, str]] = set()
+
+    async def get(self, path: Path, etag: str, size: int) -> Optional[mmap.mmap]:
+        """
+        Get the memory map of a file, admitting it if it became hot.
+
+        Args:
+            path: Audio file path
+            etag: Current ETag of the file
+            size: File size in bytes
+
+        Returns:
+            Read-only memory map, or None if the file is not (yet) cached
+        """
+        key = (os.path.abspath(path), etag)
+
+        buffer = self._maps.get(key)
+        if buffer is not None:
+            self.hits += 1
+            self._maps.move_to_end(key)
+            return buffer
+
+        self.misses += 1
+        if size == 0 or size > self.budget_bytes:
+            return None
+
+        if len(self._request_counts) >= self.MAX_TRACKED_FILES:
+            self._request_counts.clear()
+        count = self._request_counts.get(key, 0) + 1
+        if count < self.admit_after:
+            self._request_counts[key] = count
+            return None
+        self._request_counts.pop(key, None)
+
+        if key in self._admitting:
+            # Another request is mapping it right now
+            return None
+        self._admitting.add(key)
+        try:
+            return await self._admit(key, path, size)
+        finally:
+            self._admitting.discard(key)
+
+    async def _admit(self, key: Tuple[str, str], path: Path, size: int) -> Optional[mmap.mmap]:
+        """Map a file in a worker thread, then evict LRU entries to fit it."""
+        buffer = await asyncio.to_thread(self._map_file, path, size)
+        if buffer is None:
+            return None
+
+        while self._maps and self.used_bytes + size > self.budget_bytes:
+            self._evict_oldest()
+
+        self._maps[key] = buffer
+        self.used_bytes += size
+        return buffer
+
+    @staticmethod
+    def _map_file(path: Path, size: int) -> Optional[mmap.mmap]:
+        """Map a file and ask the kernel to read it ahead (blocking)."""
+        try:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        if len(buffer) != size:
+            # File changed since it was indexed
+            buffer.close()
+            return None
+
+        if hasattr(mmap, "MADV_WILLNEED"):
+            buffer.madvise(mmap.MADV_WILLNEED)
+        return buffer
+
+    def _evict_oldest(self) -> None:
+        """
+        Drop the least recently used map.
+
+        The map is not closed explicitly: responses still sending from it
+        keep it alive, and it is unmapped once the last reference is gone.
+        """
+        _, buffer = self._maps.popitem(last=False)
+        self.used_bytes -= len(buffer)
+        self.evictions += 1
+
+    def invalidate(self, path: Path) -> None:
+        """Drop all cached versions of a file (after it was replaced or deleted)."""
+        abs_path = os.path.abspath(path)
+        for key in [key for key in self._maps if key[0] == abs_path]:
+            buffer = self._maps.pop(key)
+            self.used_bytes -= len(buffer)
+
+    def stats(self) -> Dict[str, object]:
+        """Counters for monitoring."""
+        requests = self.hits + self.misses
+        return {
+            "budget_bytes": self.budget_bytes,
+            "used_bytes": self.used_bytes,
+            "files": len(self._maps),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / requests, 4) if requests else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+# Global cache instance (one per worker process)
+hot_audio_cache = HotAudioCache(
+    budget_bytes=settings.AUDIO_HOT_CACHE_BYTES,
+    admit_after=settings.AUDIO_HOT_CACHE_ADMIT_AFTER
+)
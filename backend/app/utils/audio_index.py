@@ -0,0 +1,133 @@
+"""
+Process-local index of lesson audio files.
+
+Maps (lesson_id, quality) to the resolved audio file and its validators so the audio
+streaming route can answer range requests without touching the database.
+Entries are filled lazily on the first request, invalidated by the audio
+delete endpoints and expire after AUDIO_INDEX_TTL_SECONDS so that
+changes made by other processes (API workers, the job worker processing
+uploads) are picked up.
+"""
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+from app.config import settings
+from app.utils.audio import make_etag
+from app.utils.audio_processing import RENDITION_LADDER, DEFAULT_QUALITY
+
+
+class AudioIndexEntry(NamedTuple):
+    """Cached audio file identity for one lesson."""
+    path: Path
+    size: int
+    mtime: float
+    etag: str
+    media_type: str
+    audio_version: int
+    loaded_at: float
+
+
+class AudioIndex:
+    """Bounded LRU map (lesson_id, quality) -> AudioIndexEntry with TTL expiry."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, str], AudioIndexEntry]" = OrderedDict()
+
+    def get(self, lesson_id: int, quality: str = DEFAULT_QUALITY) -> Optional[AudioIndexEntry]:
+        """
+        Get a cached entry, checking it against the file on disk.
+
+        Costs one stat() call; a changed or missing file drops the entry.
+
+        Args:
+            lesson_id: Lesson ID
+            quality: Rendition name (default: main processed MP3)
+
+        Returns:
+            Entry if cached and still valid, None otherwise
+        """
+        key = (lesson_id, quality)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if time.monotonic() - entry.loaded_at > self.ttl_seconds:
+            self._entries.pop(key, None)
+            return None
+
+        try:
+            file_stat = os.stat(entry.path)
+        except OSError:
+            self._entries.pop(key, None)
+            return None
+
+        if file_stat.st_size != entry.size or file_stat.st_mtime != entry.mtime:
+            self._entries.pop(key, None)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def load(
+        self,
+        lesson_id: int,
+        quality: str,
+        path: Path,
+        media_type: str,
+        audio_version: int = 0
+    ) -> AudioIndexEntry:
+        """
+        Stat an audio file and store its entry.
+
+        Args:
+            lesson_id: Lesson ID
+            quality: Requested rendition name (index key)
+            path: Resolved audio file path (may be a fallback rendition)
+            media_type: Content-Type of the file
+            audio_version: Lesson audio version (checked against signed URLs)
+
+        Returns:
+            New entry
+        """
+        file_stat = os.stat(path)
+        entry = AudioIndexEntry(
+            path=path,
+            size=file_stat.st_size,
+            mtime=file_stat.st_mtime,
+            etag=make_etag(file_stat.st_size, file_stat.st_mtime),
+            media_type=media_type,
+            audio_version=audio_version,
+            loaded_at=time.monotonic()
+        )
+
+        key = (lesson_id, quality)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        return entry
+
+    def invalidate(self, lesson_id: int) -> None:
+        """Drop the entries of a lesson (after its audio or status changed)."""
+        for quality in RENDITION_LADDER:
+            self._entries.pop((lesson_id, quality), None)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global index instance (one per worker process)
+audio_index = AudioIndex(
+    ttl_seconds=settings.AUDIO_INDEX_TTL_SECONDS,
+    max_entries=settings.AUDIO_INDEX_MAX_ENTRIES
+)
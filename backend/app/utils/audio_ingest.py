@@ -0,0 +1,289 @@
+"""
+Streaming ingestion of uploaded audio.
+
+The request body is written straight into original/ (as a hidden ".part"
+file next to its final name) with the writes and SHA-256 updates running in
+a worker thread, so the event loop never blocks on disk and the file is
+read only once, by the transcoder. Publishing the upload is a rename to its
+content-addressed name (original/<sha[:2]>/<sha><ext>).
+
+Resumable uploads (app.api.uploads) write their chunks at arbitrary offsets
+into a preallocated part file in the same directory and are hashed once
+all bytes have arrived.
+
+Local files imported in bulk (app.ingest) are processed whole in a pool
+process by process_local_file.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import secrets
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, NamedTuple
+
+from fastapi import UploadFile
+
+from app.utils.audio_processing import (
+    ORIGINAL_DIR,
+    AUDIO_BASE_DIR,
+    compute_file_checksum,
+    ensure_directories,
+    generate_renditions,
+    get_safe_filename,
+    get_blob_name,
+    process_audio_file
+)
+
+logger = logging.getLogger(__name__)
+
+# Maximum upload size: 200 MB
+MAX_UPLOAD_SIZE = 200 * 1024 * 1024
+
+# Incoming chunks are batched into blocks of this size per thread hop
+WRITE_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Upload exceeded the maximum size."""
+
+
+class IngestedFile(NamedTuple):
+    """Upload written to disk but not yet published under its final name."""
+    filename: str  # Safe file name inside original/
+    part_path: Path
+    size: int
+    sha256: str
+
+
+def _write_block(f: BinaryIO, digest, block: bytes) -> None:
+    """Write a block and feed it to the hash (hashlib releases the GIL)."""
+    digest.update(block)
+    f.write(block)
+
+
+async def receive_upload(
+    chunks: AsyncIterator[bytes],
+    original_filename: str,
+    max_size: int = MAX_UPLOAD_SIZE
+) -> IngestedFile:
+    """
+    Stream an upload into original/ while hashing it.
+
+    Args:
+        chunks: Body chunks (e.g., request.stream())
+        original_filename: Original name of the uploaded file
+        max_size: Maximum size in bytes
+
+    Returns:
+        Ingested file (call commit_upload or discard_upload)
+
+    Raises:
+        UploadTooLargeError: If the body exceeds max_size
+    """
+    await asyncio.to_thread(ensure_directories)
+
+    filename = get_safe_filename(original_filename)
+    part_path = ORIGINAL_DIR / f".{filename}.{secrets.token_hex(4)}.part"
+
+    digest = hashlib.sha256()
+    size = 0
+    pending = bytearray()
+
+    f = await asyncio.to_thread(open, part_path, "wb")
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLargeError(f"Upload exceeds {max_size} bytes")
+
+            pending += chunk
+            if len(pending) >= WRITE_BLOCK_SIZE:
+                await asyncio.to_thread(_write_block, f, digest, bytes(pending))
+                pending.clear()
+
+        if pending:
+            await asyncio.to_thread(_write_block, f, digest, bytes(pending))
+        await asyncio.to_thread(f.close)
+    except BaseException:
+        f.close()
+        part_path.unlink(missing_ok=True)
+        raise
+
+    logger.info(f"Upload received: {part_path} ({size} bytes)")
+    return IngestedFile(filename=filename, part_path=part_path, size=size, sha256=digest.hexdigest())
+
+
+async def iter_upload_file(upload: UploadFile, chunk_size: int = WRITE_BLOCK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Read a multipart UploadFile in chunks.
+
+    Args:
+        upload: Uploaded file
+        chunk_size: Read size
+
+    Yields:
+        File chunks
+    """
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def get_ingested_blob_name(ingested: IngestedFile) -> str:
+    """Content-addressed name of an ingested upload inside original/."""
+    return get_blob_name(ingested.sha256, Path(ingested.filename).suffix or ".unknown")
+
+
+def commit_upload(ingested: IngestedFile, keep_part: bool = False) -> str:
+    """
+    Publish an ingested upload under its content-addressed name (a rename, no copy).
+
+    Args:
+        ingested: Ingested file
+        keep_part: Publish a hard link and keep the part file until
+                   discard_upload, so it can be published again if
+                   queueing the upload fails (resumable uploads)
+
+    Returns:
+        File name inside original/ (for process_original_file)
+    """
+    original_name = get_ingested_blob_name(ingested)
+    target_path = ORIGINAL_DIR / original_name
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    if keep_part:
+        try:
+            os.link(ingested.part_path, target_path)
+        except FileExistsError:
+            pass  # Same content already published (content-addressed name)
+    else:
+        os.replace(ingested.part_path, target_path)
+    return original_name
+
+
+def discard_upload(ingested: IngestedFile) -> None:
+    """Delete an ingested upload that was not committed."""
+    ingested.part_path.unlink(missing_ok=True)
+
+
+def get_session_part_path(upload_id: str) -> Path:
+    """Part file of a resumable upload session (inside original/)."""
+    return ORIGINAL_DIR / f".upload-{upload_id}.part"
+
+
+def create_part_file(part_path: Path, size: int) -> None:
+    """Create a part file of the final size (sparse), for writes at any offset."""
+    ensure_directories()
+    with open(part_path, "wb") as f:
+        f.truncate(size)
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    """Write a whole block at an offset."""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+async def receive_chunk(
+    chunks: AsyncIterator[bytes],
+    part_path: Path,
+    offset: int,
+    max_length: int
+) -> int:
+    """
+    Stream one chunk of a resumable upload into its part file.
+
+    Writes run in a worker thread and are fsynced before returning, so a
+    chunk reported as received survives a crash of the node.
+
+    Args:
+        chunks: Body chunks (e.g., request.stream())
+        part_path: Part file (see create_part_file)
+        offset: Position of the chunk in the file
+        max_length: Maximum chunk length in bytes
+
+    Returns:
+        Number of bytes written
+
+    Raises:
+        UploadTooLargeError: If the body exceeds max_length
+        FileNotFoundError: If the part file does not exist
+    """
+    fd = await asyncio.to_thread(os.open, part_path, os.O_WRONLY)
+    written = 0
+    pending = bytearray()
+    try:
+        async for chunk in chunks:
+            if written + len(pending) + len(chunk) > max_length:
+                raise UploadTooLargeError(f"Chunk exceeds {max_length} bytes")
+
+            pending += chunk
+            if len(pending) >= WRITE_BLOCK_SIZE:
+                await asyncio.to_thread(_pwrite_all, fd, bytes(pending), offset + written)
+                written += len(pending)
+                pending.clear()
+
+        if pending:
+            await asyncio.to_thread(_pwrite_all, fd, bytes(pending), offset + written)
+            written += len(pending)
+        await asyncio.to_thread(os.fsync, fd)
+    finally:
+        os.close(fd)
+
+    return written
+
+
+async def ingest_part_file(part_path: Path, filename: str) -> IngestedFile:
+    """
+    Hash a fully received part file (read in a worker thread).
+
+    Args:
+        part_path: Part file
+        filename: Safe original file name
+
+    Returns:
+        Ingested file (call commit_upload or discard_upload)
+    """
+    size, sha256 = await asyncio.to_thread(compute_file_checksum, part_path)
+    return IngestedFile(filename=filename, part_path=part_path, size=size, sha256=sha256)
+
+
+def process_local_file(input_path: str) -> Dict[str, Any]:
+    """
+    Store and fully process a local audio file (runs in a pool process).
+
+    Same steps as the process_lesson_audio job: content-addressed original,
+    MP3 with waveform, renditions normalized with the measured loudness,
+    and the checksum of the MP3. On failure the stored files are left for
+    the caller to release (they may be shared with existing lessons).
+
+    Args:
+        input_path: Path to the audio file
+
+    Returns:
+        Lesson audio columns: original_audio_path, audio_path,
+        duration_seconds, waveform, loudness_stats, renditions, audio_size,
+        audio_sha256
+    """
+    processed = process_audio_file(input_path, Path(input_path).name)
+    renditions = generate_renditions(
+        processed.original_path,
+        loudness_stats=processed.loudness_stats,
+        duration_seconds=processed.duration_seconds
+    )
+    audio_size, audio_sha256 = compute_file_checksum(AUDIO_BASE_DIR / processed.processed_path)
+    return {
+        "original_audio_path": processed.original_path,
+        "audio_path": processed.processed_path,
+        "duration_seconds": processed.duration_seconds,
+        "waveform": processed.waveform,
+        "loudness_stats": processed.loudness_stats,
+        "renditions": renditions,
+        "audio_size": audio_size,
+        "audio_sha256": audio_sha256
+    }
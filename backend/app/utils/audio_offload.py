@@ -0,0 +1,88 @@
+"""
+Reverse-proxy offload for file responses.
+
+With AUDIO_OFFLOAD_MODE set, file routes do the lookup and authorization
+and then answer with an empty response carrying an internal redirect
+header; the proxy in front of uvicorn sends the bytes (and handles Range /
+conditional requests) itself:
+
+- "x-accel":    nginx, X-Accel-Redirect: AUDIO_OFFLOAD_PREFIX + path under AUDIO_FILES_PATH
+- "x-sendfile": Apache mod_xsendfile / lighttpd, X-Sendfile: absolute file path
+
+See nginx/audio-offload.conf.example for the matching nginx config.
+"""
+import logging
+import os
+from pathlib import Path
+from typing import Mapping, Optional
+from urllib.parse import quote
+
+from fastapi.responses import Response
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+OFFLOAD_X_ACCEL = "x-accel"
+OFFLOAD_X_SENDFILE = "x-sendfile"
+OFFLOAD_MODES = (OFFLOAD_X_ACCEL, OFFLOAD_X_SENDFILE)
+
+
+def is_offload_enabled() -> bool:
+    """Whether file bytes are handed off to the reverse proxy."""
+    return settings.AUDIO_OFFLOAD_MODE in OFFLOAD_MODES
+
+
+def get_offload_target(path: Path) -> Optional[str]:
+    """
+    Get the internal redirect target for a file.
+
+    Args:
+        path: File path (absolute or relative to the working directory)
+
+    Returns:
+        Header value for the configured mode, or None if offload is disabled
+        or the file is outside AUDIO_FILES_PATH (the proxy cannot reach it)
+    """
+    mode = settings.AUDIO_OFFLOAD_MODE
+    if mode not in OFFLOAD_MODES:
+        return None
+
+    full_path = os.path.realpath(path)
+    base_dir = os.path.realpath(settings.AUDIO_FILES_PATH)
+    if os.path.commonpath([full_path, base_dir]) != base_dir:
+        logger.warning(f"Not offloading {full_path}: outside AUDIO_FILES_PATH ({base_dir})")
+        return None
+
+    if mode == OFFLOAD_X_SENDFILE:
+        return full_path
+
+    relative_path = Path(os.path.relpath(full_path, base_dir)).as_posix()
+    return settings.AUDIO_OFFLOAD_PREFIX.rstrip("/") + "/" + quote(relative_path)
+
+
+def build_offload_response(
+    path: Path,
+    media_type: str,
+    headers: Optional[Mapping[str, str]] = None
+) -> Optional[Response]:
+    """
+    Build an empty response that tells the proxy to serve a file.
+
+    Args:
+        path: File to serve
+        media_type: Content-Type of the file
+        headers: Extra headers for the client (Cache-Control, Vary, ...)
+
+    Returns:
+        Response with X-Accel-Redirect / X-Sendfile, or None to serve the
+        file from the application as usual
+    """
+    target = get_offload_target(path)
+    if target is None:
+        return None
+
+    header_name = "X-Accel-Redirect" if settings.AUDIO_OFFLOAD_MODE == OFFLOAD_X_ACCEL else "X-Sendfile"
+    response_headers = dict(headers or {})
+    response_headers[header_name] = target
+    return Response(content=b"", media_type=media_type, headers=response_headers)
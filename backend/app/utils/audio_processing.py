@@ -1,11 +1,23 @@
 """Audio processing utilities for converting and normalizing audio files."""
 
 import os
+import re
+import json
+import hashlib
+import secrets
+import shutil
 import subprocess
+import threading
+from collections import deque
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import logging
 
+from app.config import settings
+from app.utils.seek_index import write_seek_index, delete_seek_index, get_seek_index_path
+from app.utils.waveform import WaveformAccumulator, WAVEFORM_SAMPLE_RATE
+from app.utils.waveform_peaks import write_peaks, delete_peaks, get_peaks_path
+
 logger = logging.getLogger(__name__)
 
 # Audio processing settings
@@ -14,16 +26,80 @@ TARGET_BITRATE = "64k"
 TARGET_CHANNELS = 1  # Mono
 AUDIO_CODEC = "libmp3lame"
 
+# Loudness normalization target (EBU R128 speech)
+LOUDNORM_TARGET = "I=-23:TP=-2:LRA=7"
+# Measured values printed by loudnorm (print_format=json) and reused for re-encodes
+LOUDNORM_MEASURED_KEYS = {
+    "input_i": "measured_I",
+    "input_tp": "measured_TP",
+    "input_lra": "measured_LRA",
+    "input_thresh": "measured_thresh",
+    "target_offset": "offset",
+}
+
+# Waveform points stored for a lesson (same as the waveform background task)
+DEFAULT_WAVEFORM_SAMPLES = 100
+
+
+class ProcessedAudio(NamedTuple):
+    """Result of processing an original."""
+    original_path: str
+    processed_path: str
+    duration_seconds: int
+    loudness_stats: Optional[Dict[str, str]]
+    waveform: Optional[List[int]]
+
 # Directory paths
 AUDIO_BASE_DIR = Path("/app/audio_files")
 ORIGINAL_DIR = AUDIO_BASE_DIR / "original"
 PROCESSED_DIR = AUDIO_BASE_DIR / "processed"
+RENDITIONS_DIR = PROCESSED_DIR / "renditions"
+
+# Rendition ladder: quality name -> encoder settings.
+# "high" is the main processed MP3 (Lesson.audio_path); the others are
+# extra renditions generated from the original for constrained clients.
+DEFAULT_QUALITY = "high"
+RENDITION_LADDER: Dict[str, Dict[str, object]] = {
+    "low": {
+        "codec": "libopus",
+        "bitrate": "24k",
+        "extension": "opus",
+        "media_type": "audio/ogg",
+        "extra_args": ["-application", "voip"],
+    },
+    "medium": {
+        "codec": "aac",
+        "bitrate": "48k",
+        "extension": "m4a",
+        "media_type": "audio/mp4",
+        "extra_args": ["-movflags", "+faststart"],
+    },
+    "high": {
+        "codec": AUDIO_CODEC,
+        "bitrate": TARGET_BITRATE,
+        "extension": TARGET_FORMAT,
+        "media_type": "audio/mpeg",
+        "extra_args": [],
+    },
+}
 
 
 def ensure_directories():
     """Ensure audio directories exist."""
     ORIGINAL_DIR.mkdir(parents=True, exist_ok=True)
     PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    RENDITIONS_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def get_enabled_renditions() -> List[str]:
+    """
+    Get extra renditions to generate, from AUDIO_RENDITIONS setting.
+
+    Returns:
+        List of quality names from RENDITION_LADDER (never includes "high")
+    """
+    names = [name.strip() for name in settings.AUDIO_RENDITIONS.split(",") if name.strip()]
+    return [name for name in names if name in RENDITION_LADDER and name != DEFAULT_QUALITY]
 
 
 def get_audio_duration(file_path: str) -> int:
@@ -63,18 +139,70 @@ def get_audio_duration(file_path: str) -> int:
         raise Exception(f"Invalid audio duration: {e}")
 
 
-def convert_to_mp3_mono(
+def with_transcode_priority(cmd: List[str]) -> List[str]:
+    """
+    Prefix a transcoding command with nice(1) (AUDIO_TRANSCODE_NICE).
+
+    Keeps ffmpeg from competing with the API process for CPU, so streaming
+    latency does not suffer while uploads are transcoded. nice(1) adds to
+    the caller's niceness, so only the part the calling process (e.g. a
+    pool process niced by its initializer) does not have yet is applied.
+
+    Args:
+        cmd: Command line
+
+    Returns:
+        Command line, niced if enabled and available
+    """
+    increment = settings.AUDIO_TRANSCODE_NICE - os.nice(0)
+    if increment > 0 and shutil.which("nice"):
+        return ["nice", "-n", str(increment)] + cmd
+    return cmd
+
+
+def compute_file_checksum(file_path: Path, chunk_size: int = 1024 * 1024) -> Tuple[int, str]:
+    """
+    Get size and SHA-256 of a file (stored on the lesson for download manifests).
+
+    Args:
+        file_path: Path to file
+        chunk_size: Read block size
+
+    Returns:
+        Tuple of (size_bytes, sha256 hex digest)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
+
+
+def convert_audio(
     input_path: str,
     output_path: str,
-    normalize: bool = True
+    codec: str,
+    bitrate: str,
+    normalize: bool = True,
+    extra_args: Optional[List[str]] = None,
+    loudness_stats: Optional[Dict[str, str]] = None
 ) -> None:
     """
-    Convert audio file to MP3 mono format at 64 kbps.
+    Convert audio file to mono with the given codec and bitrate.
 
     Args:
         input_path: Path to input audio file
-        output_path: Path to output MP3 file
+        output_path: Path to output file
+        codec: ffmpeg audio encoder (e.g., "libmp3lame", "libopus", "aac")
+        bitrate: Target bitrate (e.g., "64k")
         normalize: Whether to normalize audio volume (default: True)
+        extra_args: Additional encoder/muxer arguments
+        loudness_stats: Loudness measured on an earlier pass (linear loudnorm, no re-analysis)
 
     Raises:
         Exception: If conversion fails
@@ -86,17 +214,20 @@ def convert_to_mp3_mono(
             "-i", input_path,
             "-vn",  # Disable video
             "-ac", str(TARGET_CHANNELS),  # Mono
-            "-b:a", TARGET_BITRATE,  # Bitrate 64k
-            "-codec:a", AUDIO_CODEC,  # MP3 codec
+            "-b:a", bitrate,
+            "-codec:a", codec,
         ]
 
         # Add normalization filter if requested
         if normalize:
             # loudnorm filter normalizes audio to -23 LUFS (standard for speech)
             cmd.extend([
-                "-af", "loudnorm=I=-23:TP=-2:LRA=7"
+                "-af", build_loudnorm_filter(loudness_stats)
             ])
 
+        if extra_args:
+            cmd.extend(extra_args)
+
         # Output file
         cmd.extend([
             "-y",  # Overwrite output file if exists
@@ -105,7 +236,7 @@ def convert_to_mp3_mono(
 
         # Run ffmpeg
         result = subprocess.run(
-            cmd,
+            with_transcode_priority(cmd),
             capture_output=True,
             text=True,
             check=True
@@ -118,98 +249,442 @@ def convert_to_mp3_mono(
         raise Exception(f"Audio conversion failed: {e.stderr}")
 
 
-def process_audio_file(
-    input_file_path: str,
-    original_filename: str
-) -> Tuple[str, str, int]:
+def build_loudnorm_filter(
+    loudness_stats: Optional[Dict[str, str]] = None,
+    print_stats: bool = False
+) -> str:
     """
-    Process uploaded audio file: save original, convert to MP3 mono, get duration.
+    Build the loudnorm filter string.
 
     Args:
-        input_file_path: Path to the uploaded temporary file
-        original_filename: Original name of the uploaded file
+        loudness_stats: Values measured by an earlier loudnorm run; when given,
+            the filter normalizes linearly with them instead of measuring again
+        print_stats: Print the measured values as JSON to stderr
 
     Returns:
-        Tuple of (original_path, processed_path, duration_seconds)
-        - original_path: Relative path to original file (e.g., "original/file.wav")
-        - processed_path: Relative path to processed file (e.g., "processed/file.mp3")
-        - duration_seconds: Duration in seconds
+        ffmpeg filter string
+    """
+    parts = [f"loudnorm={LOUDNORM_TARGET}"]
+    if loudness_stats and all(key in loudness_stats for key in LOUDNORM_MEASURED_KEYS):
+        parts.extend(
+            f"{option}={loudness_stats[key]}"
+            for key, option in LOUDNORM_MEASURED_KEYS.items()
+        )
+        parts.append("linear=true")
+    if print_stats:
+        parts.append("print_format=json")
+    return ":".join(parts)
+
+
+def parse_loudnorm_stats(stderr_text: str) -> Optional[Dict[str, str]]:
+    """
+    Extract the JSON block printed by loudnorm (print_format=json).
+
+    Args:
+        stderr_text: ffmpeg stderr (the block is at the end)
+
+    Returns:
+        Dictionary of measured values or None if not found
+    """
+    match = re.search(r"\{[^{}]*\"input_i\"[^{}]*\}", stderr_text)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(0))
+    except ValueError:
+        return None
+
+
+def transcode_single_pass(
+    input_path: str,
+    output_path: str,
+    normalize: bool = True
+) -> Tuple[int, Optional[Dict[str, str]], WaveformAccumulator]:
+    """
+    Decode the original once: write the MP3 and measure everything from that decode.
+
+    One ffmpeg process normalizes and encodes the MP3 while an asplit branch
+    pipes 8 kHz mono PCM of the same normalized signal to stdout, which is
+    reduced on the fly by WaveformAccumulator. The PCM sample count gives
+    the duration and loudnorm prints its measured stats to stderr, so no
+    ffprobe or second decode is needed.
+
+    Args:
+        input_path: Path to input audio file
+        output_path: Path to output MP3 file
+        normalize: Whether to normalize audio volume (default: True)
+
+    Returns:
+        Tuple of (duration_seconds, loudness_stats, waveform envelope)
 
     Raises:
-        Exception: If processing fails
+        Exception: If conversion fails
     """
+    first_filter = build_loudnorm_filter(print_stats=True) if normalize else "anull"
+    filter_graph = (
+        f"[0:a:0]{first_filter},asplit=2[enc][wf];"
+        f"[wf]aresample={WAVEFORM_SAMPLE_RATE},"
+        f"aformat=sample_fmts=s16:channel_layouts=mono[pcm]"
+    )
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-i", input_path,
+        "-filter_complex", filter_graph,
+        # Output 1: processed MP3
+        "-map", "[enc]",
+        "-ac", str(TARGET_CHANNELS),
+        "-b:a", TARGET_BITRATE,
+        "-codec:a", AUDIO_CODEC,
+        "-y", output_path,
+        # Output 2: raw PCM for the waveform
+        "-map", "[pcm]",
+        "-f", "s16le",
+        "pipe:1",
+    ]
+
+    accumulator = WaveformAccumulator()
+    # Keep only the end of stderr, where loudnorm prints its stats
+    stderr_tail: deque = deque(maxlen=400)
+
+    process = subprocess.Popen(
+        with_transcode_priority(cmd),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    stderr_reader = threading.Thread(
+        target=lambda: stderr_tail.extend(
+            line.decode("utf-8", "replace").rstrip() for line in process.stderr
+        ),
+        daemon=True
+    )
+    stderr_reader.start()
+
     try:
-        ensure_directories()
+        while True:
+            chunk = process.stdout.read(256 * 1024)
+            if not chunk:
+                break
+            accumulator.add_pcm(chunk)
+    finally:
+        returncode = process.wait()
+        stderr_reader.join()
 
-        # Generate safe filename (remove spaces, special chars, keep extension)
-        base_name = Path(original_filename).stem
-        safe_name = "".join(c for c in base_name if c.isalnum() or c in "._- ")
-        safe_name = safe_name.replace(" ", "_")
+    stderr_text = "\n".join(stderr_tail)
+    if returncode != 0:
+        logger.error(f"FFmpeg single-pass processing failed: {stderr_text}")
+        raise Exception(f"Audio conversion failed: {stderr_text}")
 
-        # Original file extension
-        original_ext = Path(original_filename).suffix or ".unknown"
+    duration = int(round(accumulator.duration_seconds))
+    loudness_stats = parse_loudnorm_stats(stderr_text) if normalize else None
 
-        # Paths for original and processed files
-        original_filename_safe = f"{safe_name}{original_ext}"
-        processed_filename_safe = f"{safe_name}.mp3"
+    logger.info(f"Successfully converted {input_path} to {output_path} in one pass")
+    return duration, loudness_stats, accumulator
 
-        original_full_path = ORIGINAL_DIR / original_filename_safe
-        processed_full_path = PROCESSED_DIR / processed_filename_safe
 
-        # Save original file
-        import shutil
-        shutil.copy2(input_file_path, original_full_path)
-        logger.info(f"Original file saved: {original_full_path}")
+def convert_to_mp3_mono(
+    input_path: str,
+    output_path: str,
+    normalize: bool = True
+) -> None:
+    """
+    Convert audio file to MP3 mono format at 64 kbps.
 
-        # Convert to MP3 mono with normalization
-        convert_to_mp3_mono(
-            str(original_full_path),
-            str(processed_full_path),
-            normalize=True
-        )
-        logger.info(f"Processed file created: {processed_full_path}")
+    Args:
+        input_path: Path to input audio file
+        output_path: Path to output MP3 file
+        normalize: Whether to normalize audio volume (default: True)
+
+    Raises:
+        Exception: If conversion fails
+    """
+    convert_audio(input_path, output_path, AUDIO_CODEC, TARGET_BITRATE, normalize=normalize)
+
+
+def get_safe_filename(original_filename: str) -> str:
+    """
+    Build the stored file name for an upload.
 
-        # Get duration from processed file
-        duration = get_audio_duration(str(processed_full_path))
+    Removes spaces and special characters from the name, keeps the extension.
+
+    Args:
+        original_filename: Original name of the uploaded file
+
+    Returns:
+        Safe file name (e.g., "Lesson_1.wav")
+    """
+    base_name = Path(original_filename).stem
+    safe_name = "".join(c for c in base_name if c.isalnum() or c in "._- ")
+    safe_name = safe_name.replace(" ", "_")
+
+    # Original file extension
+    original_ext = Path(original_filename).suffix or ".unknown"
+
+    return f"{safe_name}{original_ext}"
+
+
+def get_blob_name(sha256: str, extension: str) -> str:
+    """
+    Content-addressed file name for an original (relative to original/).
+
+    Processed output uses the same name with ".mp3" under processed/, so
+    identical uploads share one original and one processed file.
+
+    Args:
+        sha256: Hex SHA-256 of the original file
+        extension: Original extension (e.g., ".wav")
+
+    Returns:
+        Relative name (e.g., "3f/3f9a...c1.wav")
+    """
+    return f"{sha256[:2]}/{sha256}{extension.lower()}"
+
+
+def process_original_file(original_name: str) -> ProcessedAudio:
+    """
+    Process an original already stored in original/ in a single decode.
+
+    Besides the MP3, writes its seek index and waveform peaks sidecars.
+
+    Args:
+        original_name: File name inside original/ (see get_blob_name)
+
+    Returns:
+        ProcessedAudio:
+        - original_path: Relative path to original file (e.g., "original/3f/3f9a...c1.wav")
+        - processed_path: Relative path to processed file (e.g., "processed/3f/3f9a...c1.mp3")
+        - duration_seconds: Duration in seconds
+        - loudness_stats: Measured loudness (reused by generate_renditions)
+        - waveform: Waveform points (DEFAULT_WAVEFORM_SAMPLES)
+
+    Raises:
+        Exception: If processing fails
+    """
+    # Imported here: cold_storage imports this module
+    from app.utils.cold_storage import hot_original
+
+    processed_name = Path(original_name).with_suffix(".mp3").as_posix()
+    processed_full_path = PROCESSED_DIR / processed_name
+    # Jobs for the same content may run at once and the MP3 may be streaming:
+    # encode under a private name, then rename into place (sidecars first)
+    tmp_full_path = processed_full_path.with_name(f".{processed_full_path.stem}.{secrets.token_hex(4)}.mp3")
+
+    try:
+        ensure_directories()
+        processed_full_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Convert to MP3 mono with normalization; duration, loudness and
+        # waveform come from the same decode
+        with hot_original(f"original/{original_name}") as original_full_path:
+            duration, loudness_stats, envelope = transcode_single_pass(
+                str(original_full_path),
+                str(tmp_full_path),
+                normalize=True
+            )
+
+        # Seek table of frame offsets for time-based seeking
+        write_seek_index(tmp_full_path)
+        # Peak pyramid for the waveform endpoint
+        write_peaks(tmp_full_path, envelope)
+
+        os.replace(get_seek_index_path(tmp_full_path), get_seek_index_path(processed_full_path))
+        os.replace(get_peaks_path(tmp_full_path), get_peaks_path(processed_full_path))
+        os.replace(tmp_full_path, processed_full_path)
+        logger.info(f"Processed file created: {processed_full_path}")
         logger.info(f"Audio duration: {duration} seconds")
 
         # Return relative paths (without /app/audio_files/ prefix)
-        original_rel_path = f"original/{original_filename_safe}"
-        processed_rel_path = f"processed/{processed_filename_safe}"
-
-        return original_rel_path, processed_rel_path, duration
+        return ProcessedAudio(
+            original_path=f"original/{original_name}",
+            processed_path=f"processed/{processed_name}",
+            duration_seconds=duration,
+            loudness_stats=loudness_stats,
+            waveform=envelope.waveform(DEFAULT_WAVEFORM_SAMPLES)
+        )
 
     except Exception as e:
         logger.error(f"Audio processing failed: {e}")
-        # Clean up partial files if processing failed
-        if original_full_path.exists():
-            original_full_path.unlink()
-        if processed_full_path.exists():
-            processed_full_path.unlink()
+        # Clean up partial output (never the published MP3: another job or
+        # lesson may own it); the original stays for a retry (the caller
+        # releases it once it gives up)
+        tmp_full_path.unlink(missing_ok=True)
+        delete_seek_index(tmp_full_path)
+        delete_peaks(tmp_full_path)
         raise
 
 
+def process_audio_file(
+    input_file_path: str,
+    original_filename: str
+) -> ProcessedAudio:
+    """
+    Process uploaded audio file: save original, convert to MP3 mono, get duration.
+
+    Args:
+        input_file_path: Path to the uploaded temporary file
+        original_filename: Original name of the uploaded file
+
+    Returns:
+        ProcessedAudio, see process_original_file
+
+    Raises:
+        Exception: If processing fails
+    """
+    ensure_directories()
+
+    # Content-addressed name: identical uploads share one file
+    _, sha256 = compute_file_checksum(Path(input_file_path))
+    original_name = get_blob_name(sha256, Path(original_filename).suffix or ".unknown")
+    original_full_path = ORIGINAL_DIR / original_name
+    original_full_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Save original file
+    shutil.copy2(input_file_path, original_full_path)
+    logger.info(f"Original file saved: {original_full_path}")
+
+    return process_original_file(original_name)
+
+
 def delete_audio_files(original_path: str | None, processed_path: str | None) -> None:
     """
-    Delete audio files (both original and processed).
+    Delete audio files (both original, in original/ and the cold tier, and processed).
 
     Args:
         original_path: Relative path to original file (e.g., "original/file.wav")
         processed_path: Relative path to processed file (e.g., "processed/file.mp3")
     """
+    # Imported here: cold_storage imports this module
+    from app.utils.cold_storage import delete_cold_copy
+
     try:
         if original_path:
             original_full_path = AUDIO_BASE_DIR / original_path
             if original_full_path.exists():
                 original_full_path.unlink()
                 logger.info(f"Deleted original file: {original_full_path}")
+            delete_cold_copy(original_path)
 
         if processed_path:
             processed_full_path = AUDIO_BASE_DIR / processed_path
             if processed_full_path.exists():
                 processed_full_path.unlink()
                 logger.info(f"Deleted processed file: {processed_full_path}")
+            delete_seek_index(processed_full_path)
+            delete_peaks(processed_full_path)
 
     except Exception as e:
         logger.error(f"Error deleting audio files: {e}")
         raise
+
+
+def generate_rendition(
+    original_path: str,
+    name: str,
+    loudness_stats: Optional[Dict[str, str]] = None,
+    duration_seconds: Optional[int] = None
+) -> Dict[str, object]:
+    """
+    Encode one rendition (RENDITION_LADDER entry) of a stored original.
+
+    Args:
+        original_path: Relative path to original file (e.g., "original/file.wav")
+        name: Rendition name (e.g., "low")
+        loudness_stats: Loudness measured while processing the original
+        duration_seconds: Known duration of the original (skips ffprobe)
+
+    Returns:
+        {"path", "size", "duration_seconds"} with a relative path
+        (e.g., "processed/renditions/file.low.opus")
+
+    Raises:
+        Exception: If the conversion fails
+    """
+    # Imported here: cold_storage imports this module
+    from app.utils.cold_storage import hot_original
+
+    ensure_directories()
+
+    rendition = RENDITION_LADDER[name]
+    rel_path = f"processed/renditions/{Path(original_path).stem}.{name}.{rendition['extension']}"
+    full_path = AUDIO_BASE_DIR / rel_path
+    # Private name, renamed into place (see process_original_file)
+    tmp_path = full_path.with_name(f".{Path(original_path).stem}.{secrets.token_hex(4)}.{name}.{rendition['extension']}")
+
+    try:
+        with hot_original(original_path) as original_full_path:
+            convert_audio(
+                str(original_full_path),
+                str(tmp_path),
+                codec=rendition["codec"],
+                bitrate=rendition["bitrate"],
+                normalize=True,
+                extra_args=rendition["extra_args"],
+                loudness_stats=loudness_stats
+            )
+        os.replace(tmp_path, full_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    logger.info(f"Rendition '{name}' created: {full_path}")
+
+    return {
+        "path": rel_path,
+        "size": full_path.stat().st_size,
+        "duration_seconds": (
+            duration_seconds if duration_seconds is not None
+            else get_audio_duration(str(full_path))
+        ),
+    }
+
+
+def generate_renditions(
+    original_path: str,
+    loudness_stats: Optional[Dict[str, str]] = None,
+    duration_seconds: Optional[int] = None
+) -> Dict[str, Dict[str, object]]:
+    """
+    Generate the extra renditions (AUDIO_RENDITIONS) from a stored original.
+
+    Args:
+        original_path: Relative path to original file (e.g., "original/file.wav")
+        loudness_stats: Loudness measured while processing the original; each
+            rendition is then normalized linearly instead of measuring again
+        duration_seconds: Known duration of the original (skips ffprobe per rendition)
+
+    Returns:
+        Dictionary quality -> {"path", "size", "duration_seconds"} with relative
+        paths (e.g., "processed/renditions/file.low.opus"); suitable for
+        storing as JSON in Lesson.renditions
+
+    Raises:
+        Exception: If any conversion fails (already created renditions are removed)
+    """
+    renditions: Dict[str, Dict[str, object]] = {}
+
+    try:
+        for name in get_enabled_renditions():
+            renditions[name] = generate_rendition(
+                original_path, name,
+                loudness_stats=loudness_stats,
+                duration_seconds=duration_seconds
+            )
+
+        return renditions
+
+    except Exception as e:
+        logger.error(f"Rendition generation failed: {e}")
+        delete_rendition_files(renditions)
+        raise
+
+
+def delete_rendition_files(renditions: Optional[Dict[str, Dict[str, object]]]) -> None:
+    """
+    Delete rendition files.
+
+    Args:
+        renditions: Rendition map as stored in Lesson.renditions (parsed)
+    """
+    for rendition in (renditions or {}).values():
+        full_path = AUDIO_BASE_DIR / str(rendition["path"])
+        if full_path.exists():
+            full_path.unlink()
+            logger.info(f"Deleted rendition file: {full_path}")
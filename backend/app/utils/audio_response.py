@@ -0,0 +1,214 @@
+"""
+File response for audio streaming (AUDIO_STREAMING_ENGINE=pread).
+
+Bytes come from positional reads (pread) of large chunks in a worker thread,
+or from the hot-content memory map if the file has one; the event loop never
+blocks on disk. This is a userspace copy: uvicorn implements neither the
+"http.response.pathsend" nor the "http.response.zerocopysend" extension.
+They are still used when an ASGI server advertises them, and then the server
+sends the file itself. For kernel sendfile(2) with uvicorn, put nginx in
+front and enable AUDIO_OFFLOAD_MODE (app/utils/audio_offload.py).
+"""
+import mmap
+import os
+import secrets
+from typing import List, Mapping, Optional, Sequence, Tuple, Union
+
+import anyio
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.utils.audio import get_content_range_header
+
+
+# ASGI extensions (https://asgi.readthedocs.io/en/latest/extensions.html)
+PATHSEND_EXTENSION = "http.response.pathsend"
+ZEROCOPYSEND_EXTENSION = "http.response.zerocopysend"
+
+# A body part is either literal bytes (multipart headers) or a file region (offset, count)
+BodyPart = Union[bytes, Tuple[int, int]]
+
+
+class AudioFileResponse(Response):
+    """
+    Response that streams a file, a single byte range or several byte ranges.
+
+    Bytes are read with pread in a worker thread, chunk_size at a time.
+    If the server advertises "http.response.zerocopysend" (fd + offset +
+    count) or "http.response.pathsend" (whole file), the file is handed to
+    the server instead. uvicorn advertises neither.
+
+    With more than one range the body is a multipart/byteranges document;
+    the caller is expected to pass already coalesced ranges.
+
+    An optional memory map of the file (hot-content tier) lets the response
+    copy bytes from memory (in a worker thread) instead of opening the file
+    and issuing a read per chunk.
+    """
+
+    chunk_size = 256 * 1024
+    buffer_chunk_size = 1024 * 1024
+
+    def __init__(
+        self,
+        path: "str | os.PathLike[str]",
+        file_size: int,
+        ranges: Optional[Sequence[Tuple[int, int]]] = None,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: str = "audio/mpeg",
+        background: Optional[BackgroundTask] = None,
+        method: Optional[str] = None,
+        buffer: Optional[mmap.mmap] = None,
+    ) -> None:
+        self.path = path
+        self.file_size = file_size
+        self.buffer = buffer
+        self.status_code = status_code
+        self.background = background
+        self.send_header_only = method is not None and method.upper() == "HEAD"
+
+        if not ranges:
+            ranges = [(0, file_size - 1)]
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            self.media_type = media_type
+            self.parts: List[BodyPart] = [(start, end - start + 1)]
+        else:
+            boundary = secrets.token_hex(16)
+            self.media_type = f"multipart/byteranges; boundary={boundary}"
+            self.parts = build_multipart_parts(ranges, file_size, media_type, boundary)
+
+        self.init_headers(headers)
+        self.headers.setdefault("content-length", str(self.content_length))
+
+    @property
+    def content_length(self) -> int:
+        """Number of body bytes this response sends."""
+        return sum(len(part) if isinstance(part, bytes) else part[1] for part in self.parts)
+
+    @property
+    def is_full_file(self) -> bool:
+        """Whether the response body is exactly the whole file."""
+        return self.parts == [(0, self.file_size)]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        extensions = scope.get("extensions") or {}
+
+        if self.send_header_only or self.content_length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif self.is_full_file and PATHSEND_EXTENSION in extensions:
+            await send({"type": PATHSEND_EXTENSION, "path": os.fspath(self.path)})
+        else:
+            await self._send_parts(send, zerocopy=ZEROCOPYSEND_EXTENSION in extensions)
+
+        if self.background is not None:
+            await self.background()
+
+    async def _send_parts(self, send: Send, zerocopy: bool) -> None:
+        """Send body parts in order, closing the body after the last one."""
+        if self.buffer is not None and not zerocopy:
+            await self._send_parts_from_buffer(send)
+            return
+
+        with open(self.path, "rb") as f:
+            last = len(self.parts) - 1
+            for index, part in enumerate(self.parts):
+                more_body = index < last
+                if isinstance(part, bytes):
+                    await send({"type": "http.response.body", "body": part, "more_body": more_body})
+                elif zerocopy:
+                    # Let the server sendfile() the region straight from the descriptor
+                    await send({
+                        "type": ZEROCOPYSEND_EXTENSION,
+                        "file": f,
+                        "offset": part[0],
+                        "count": part[1],
+                        "more_body": more_body,
+                    })
+                else:
+                    await self._send_region(send, f.fileno(), part[0], part[1], more_body)
+
+    async def _send_parts_from_buffer(self, send: Send) -> None:
+        """
+        Send body parts sliced from the memory-mapped file.
+
+        Slices are copied in a worker thread: a page that is not resident
+        (evicted since admission) would otherwise fault on the event loop.
+        """
+        last = len(self.parts) - 1
+        for index, part in enumerate(self.parts):
+            more_body = index < last
+            if isinstance(part, bytes):
+                await send({"type": "http.response.body", "body": part, "more_body": more_body})
+                continue
+
+            offset, count = part
+            end = offset + count
+            while offset < end:
+                chunk_end = min(offset + self.buffer_chunk_size, end)
+                body = await anyio.to_thread.run_sync(self.buffer.__getitem__, slice(offset, chunk_end))
+                await send({
+                    "type": "http.response.body",
+                    "body": body,
+                    "more_body": more_body or chunk_end < end,
+                })
+                offset = chunk_end
+
+    async def _send_region(self, send: Send, fd: int, offset: int, count: int, more_body: bool) -> None:
+        """Fallback: positional reads in a worker thread, large chunks."""
+        remaining = count
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(os.pread, fd, min(self.chunk_size, remaining), offset)
+            if not chunk:
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({
+                "type": "http.response.body",
+                "body": chunk,
+                "more_body": more_body or remaining > 0,
+            })
+        if remaining > 0 and not more_body:
+            # File shrank under us; close the body so the client sees a short read
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def build_multipart_parts(
+    ranges: Sequence[Tuple[int, int]],
+    file_size: int,
+    media_type: str,
+    boundary: str
+) -> List[BodyPart]:
+    """
+    Lay out a multipart/byteranges body (RFC 9110, 14.6).
+
+    Args:
+        ranges: List of (start, end) byte ranges
+        file_size: Total file size
+        media_type: Content-Type of each part
+        boundary: Multipart boundary string
+
+    Returns:
+        List of body parts: header bytes and (offset, count) file regions
+    """
+    parts: List[BodyPart] = []
+    for start, end in ranges:
+        part_header = (
+            f"\r\n--{boundary}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Range: {get_content_range_header(start, end, file_size)}\r\n"
+            f"\r\n"
+        )
+        parts.append(part_header.encode("latin-1"))
+        parts.append((start, end - start + 1))
+    parts.append(f"\r\n--{boundary}--\r\n".encode("latin-1"))
+    return parts
@@ -0,0 +1,536 @@
+"""
+Cold tier for original uploads.
+
+Originals are only read to re-transcode (an evicted MP3 or rendition, a
+new rendition), yet they are the bulk of the disk. Originals older than
+ORIGINAL_COLD_AFTER_DAYS are moved to ORIGINAL_COLD_DIR (which may be a
+cheaper volume) under the same relative name plus a format suffix:
+
+- PCM WAV (16/24 bit) is encoded to FLAC. The RIFF header and trailing
+  chunks go to a ".riff" sidecar, so decoding restores the exact original
+  bytes; this is verified against the SHA-256 before the original is
+  removed.
+- Other uncompressed formats are compressed with xz (lzma).
+- Already compressed formats (MP3, M4A, FLAC...) and files xz cannot
+  shrink by MIN_SAVING are moved as they are.
+
+Nothing changes in the database rows of lessons: original_audio_path keeps
+pointing into original/. Code that reads an original goes through
+hot_original(), which decodes a cold original to a temporary file for the
+duration of the read. A shared lock per original keeps freezing from
+removing a file that is being read.
+"""
+import asyncio
+import fcntl
+import hashlib
+import logging
+import lzma
+import os
+import secrets
+import shutil
+import struct
+import subprocess
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud import cold_original as cold_crud
+from app.utils.audio_processing import (
+    AUDIO_BASE_DIR,
+    ORIGINAL_DIR,
+    compute_file_checksum,
+    with_transcode_priority,
+)
+from app.utils.transcode_pool import transcode_pool
+
+logger = logging.getLogger(__name__)
+
+COLD_FLAC = "flac"
+COLD_XZ = "xz"
+COLD_RAW = "raw"
+
+# Suffix appended to the original name in the cold tier
+COLD_SUFFIXES = {COLD_FLAC: ".flac", COLD_XZ: ".xz", COLD_RAW: ""}
+RIFF_SIDECAR_SUFFIX = ".riff"
+# Sidecar layout: header length, data chunk size, bits per sample, then the bytes
+RIFF_SIDECAR_HEADER = struct.Struct("<QQH")
+
+# Formats worth compressing with xz (the rest is compressed audio already)
+UNCOMPRESSED_EXTENSIONS = {".wav", ".wave", ".aif", ".aiff", ".aifc", ".w64", ".pcm", ".raw"}
+
+# Smallest saving (fraction of the original) for which xz output is kept
+MIN_SAVING = 0.05
+
+# Originals frozen at once (they queue on the transcode pool)
+FREEZE_BATCH_SIZE = 20
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def get_cold_dir() -> Path:
+    """Cold tier directory (ORIGINAL_COLD_DIR, default AUDIO_FILES_PATH/cold)."""
+    return Path(settings.ORIGINAL_COLD_DIR) if settings.ORIGINAL_COLD_DIR else AUDIO_BASE_DIR / "cold"
+
+
+def get_cold_path(original_path: str, format: str) -> Path:
+    """
+    Path of an original's copy in the cold tier.
+
+    Args:
+        original_path: Original path (e.g., "original/3f/3f9a...c1.wav")
+        format: COLD_FLAC, COLD_XZ or COLD_RAW
+
+    Returns:
+        Cold path (e.g., cold/3f/3f9a...c1.wav.flac)
+    """
+    name = original_path[len("original/"):] if original_path.startswith("original/") else original_path
+    return get_cold_dir() / f"{name}{COLD_SUFFIXES[format]}"
+
+
+def get_original_path(cold_name: str) -> Optional[str]:
+    """
+    Original path of a file in the cold tier (inverse of get_cold_path).
+
+    Args:
+        cold_name: Path relative to the cold directory
+
+    Returns:
+        Original path, or None for sidecars and temporary files
+    """
+    if Path(cold_name).name.startswith(".") or cold_name.endswith(RIFF_SIDECAR_SUFFIX):
+        return None
+    for suffix in (COLD_SUFFIXES[COLD_FLAC], COLD_SUFFIXES[COLD_XZ]):
+        if cold_name.endswith(suffix):
+            return f"original/{cold_name[:-len(suffix)]}"
+    return f"original/{cold_name}"
+
+
+def find_cold_copy(original_path: str) -> Optional[Tuple[str, Path]]:
+    """
+    Find an original in the cold tier.
+
+    Returns:
+        (format, cold path), or None if the original is not in the cold tier
+    """
+    for format in (COLD_FLAC, COLD_XZ, COLD_RAW):
+        cold_path = get_cold_path(original_path, format)
+        if cold_path.is_file():
+            return format, cold_path
+    return None
+
+
+def original_exists(original_path: str) -> bool:
+    """Whether an original can be read, from original/ or the cold tier."""
+    return (AUDIO_BASE_DIR / original_path).exists() or find_cold_copy(original_path) is not None
+
+
+def list_cold_originals(shard: str) -> List[str]:
+    """File names (as in original/) of the cold originals of a shard directory."""
+    shard_dir = get_cold_dir() / shard
+    if not shard_dir.is_dir():
+        return []
+    names = []
+    for name in os.listdir(shard_dir):
+        original_path = get_original_path(f"{shard}/{name}")
+        if original_path:
+            names.append(Path(original_path).name)
+    return names
+
+
+def delete_cold_copy(original_path: str) -> None:
+    """Delete an original's copy in the cold tier (with its sidecar)."""
+    for format in (COLD_FLAC, COLD_XZ, COLD_RAW):
+        get_cold_path(original_path, format).unlink(missing_ok=True)
+    Path(f"{get_cold_path(original_path, COLD_FLAC)}{RIFF_SIDECAR_SUFFIX}").unlink(missing_ok=True)
+
+
+def _lock_original(original_path: str, exclusive: bool, blocking: bool = True) -> Optional[int]:
+    """
+    Lock an original across processes (shared for readers, exclusive to freeze).
+
+    Returns:
+        Lock fd, or None if not blocking and the lock is taken
+    """
+    lock_dir = AUDIO_BASE_DIR / ".locks"
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    lock_path = lock_dir / f"{hashlib.sha1(original_path.encode()).hexdigest()}.lock"
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    try:
+        fcntl.flock(fd, operation if blocking else operation | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock_original(fd: int) -> None:
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def parse_wav_layout(path: Path) -> Optional[Tuple[int, int, int]]:
+    """
+    Locate the samples of a PCM WAV file.
+
+    Args:
+        path: WAV file
+
+    Returns:
+        (data offset, data size, bits per sample), or None unless the file
+        is integer PCM with 16 or 24 bits and a complete data chunk
+    """
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            return None
+        pcm_format = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+            if chunk_id == b"fmt ":
+                body = f.read(chunk_size + chunk_size % 2)
+                if len(body) < 16:
+                    return None
+                format_tag, _, _, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                if format_tag == 0xFFFE and len(body) >= 26:
+                    # WAVE_FORMAT_EXTENSIBLE: the subformat GUID starts with the tag
+                    format_tag = struct.unpack("<H", body[24:26])[0]
+                pcm_format = (format_tag, bits)
+            elif chunk_id == b"data":
+                if pcm_format is None or pcm_format[0] != 1 or pcm_format[1] not in (16, 24):
+                    return None
+                offset = f.tell()
+                if offset + chunk_size > os.fstat(f.fileno()).st_size:
+                    return None
+                return offset, chunk_size, pcm_format[1]
+            else:
+                f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+
+def _write_riff_sidecar(original: Path, sidecar: Path, offset: int, data_size: int, bits: int) -> None:
+    """Store the bytes around the samples: lengths and bit depth, header, trailing chunks."""
+    with open(original, "rb") as f:
+        header = f.read(offset)
+        f.seek(offset + data_size)
+        trailer = f.read()
+    with open(sidecar, "wb") as out:
+        out.write(RIFF_SIDECAR_HEADER.pack(len(header), data_size, bits))
+        out.write(header)
+        out.write(trailer)
+        out.flush()
+        os.fsync(out.fileno())
+
+
+def _read_riff_sidecar(sidecar: Path) -> Tuple[bytes, int, int, bytes]:
+    """(header, data size, bits per sample, trailer) written by _write_riff_sidecar."""
+    content = sidecar.read_bytes()
+    header_size, data_size, bits = RIFF_SIDECAR_HEADER.unpack(content[:RIFF_SIDECAR_HEADER.size])
+    header_end = RIFF_SIDECAR_HEADER.size + header_size
+    return content[RIFF_SIDECAR_HEADER.size:header_end], data_size, bits, content[header_end:]
+
+
+def _decode_flac(cold_path: Path, out) -> int:
+    """Write the PCM samples of a cold FLAC file (in its original bit depth) to a binary stream."""
+    _, data_size, bits, _ = _read_riff_sidecar(Path(f"{cold_path}{RIFF_SIDECAR_SUFFIX}"))
+    sample_format = "s24le" if bits == 24 else "s16le"
+    cmd = with_transcode_priority([
+        "ffmpeg", "-v", "error", "-i", str(cold_path),
+        "-f", sample_format, "-c:a", f"pcm_{sample_format}", "-"
+    ])
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    written = 0
+    try:
+        while True:
+            chunk = process.stdout.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"FLAC decode failed: {stderr.decode(errors='replace')[-500:]}")
+    if written != data_size:
+        raise RuntimeError(f"FLAC decode returned {written} bytes, expected {data_size}")
+    return written
+
+
+class _HashWriter:
+    """Binary stream that only hashes and counts what is written."""
+
+    def __init__(self):
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self.digest.update(data)
+        self.size += len(data)
+
+
+def restore_original(format: str, cold_path: Path, target) -> None:
+    """
+    Decode a cold copy to its original bytes.
+
+    Args:
+        format: COLD_FLAC or COLD_XZ
+        cold_path: Cold copy
+        target: Writable binary stream
+    """
+    if format == COLD_FLAC:
+        header, _, _, trailer = _read_riff_sidecar(Path(f"{cold_path}{RIFF_SIDECAR_SUFFIX}"))
+        target.write(header)
+        _decode_flac(cold_path, target)
+        target.write(trailer)
+        return
+    with lzma.open(cold_path, "rb") as source:
+        shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+
+
+@contextmanager
+def hot_original(original_path: str) -> Iterator[Path]:
+    """
+    Readable path of an original, rehydrating it from the cold tier if needed.
+
+    A cold FLAC/xz original is decoded next to where it belongs (hidden
+    temporary file, removed on exit); a raw one is read in place. The
+    original cannot be frozen while the block runs.
+
+    Args:
+        original_path: Original path (e.g., "original/3f/3f9a...c1.wav")
+
+    Yields:
+        Path to read (the original itself if it is not in the cold tier,
+        even if it does not exist)
+    """
+    full_path = AUDIO_BASE_DIR / original_path
+    fd = _lock_original(original_path, exclusive=False)
+    try:
+        cold = None if full_path.exists() else find_cold_copy(original_path)
+        if cold is None:
+            yield full_path
+            return
+        format, cold_path = cold
+        if format == COLD_RAW:
+            yield cold_path
+            return
+
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = full_path.with_name(f".rehydrate-{secrets.token_hex(4)}{full_path.suffix}")
+        try:
+            started = time.perf_counter()
+            with open(tmp_path, "wb") as target:
+                restore_original(format, cold_path, target)
+            logger.info(f"Rehydrated {original_path} from {format} in {time.perf_counter() - started:.1f} s")
+            yield tmp_path
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    finally:
+        _unlock_original(fd)
+
+
+def _publish(tmp_path: Path, cold_path: Path) -> None:
+    """Make a written cold copy durable and give it its final name."""
+    with open(tmp_path, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, cold_path)
+
+
+def compress_original(original_path: str) -> Dict[str, Any]:
+    """
+    Write an original's cold copy (runs on the transcode pool).
+
+    The original itself is left in place (see drop_hot_original).
+
+    Args:
+        original_path: Original path (e.g., "original/3f/3f9a...c1.wav")
+
+    Returns:
+        {"format", "size", "cold_size", "mtime"} (mtime of the original when it was read)
+
+    Raises:
+        Exception: If the cold copy cannot be written
+    """
+    full_path = AUDIO_BASE_DIR / original_path
+    stat = full_path.stat()
+    extension = full_path.suffix.lower()
+    tmp_path = get_cold_path(original_path, COLD_RAW).with_name(f".{full_path.name}.{secrets.token_hex(4)}.tmp")
+    tmp_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def result(format: str, cold_size: int) -> Dict[str, Any]:
+        return {"format": format, "size": stat.st_size, "cold_size": cold_size, "mtime": stat.st_mtime}
+
+    try:
+        layout = parse_wav_layout(full_path) if extension in (".wav", ".wave") else None
+        if layout and shutil.which("ffmpeg"):
+            offset, data_size, bits = layout
+            cold_path = get_cold_path(original_path, COLD_FLAC)
+            sidecar = Path(f"{cold_path}{RIFF_SIDECAR_SUFFIX}")
+            _write_riff_sidecar(full_path, sidecar, offset, data_size, bits)
+            cmd = with_transcode_priority([
+                "ffmpeg", "-y", "-v", "error", "-i", str(full_path),
+                "-map", "0:a:0", "-map_metadata", "-1",
+                "-c:a", "flac", "-compression_level", "8", "-f", "flac", str(tmp_path)
+            ])
+            encoded = subprocess.run(cmd, capture_output=True)
+            if encoded.returncode == 0:
+                _publish(tmp_path, cold_path)
+                # Only an exact round trip may replace the original
+                size, sha256 = compute_file_checksum(full_path)
+                check = _HashWriter()
+                try:
+                    restore_original(COLD_FLAC, cold_path, check)
+                except RuntimeError as e:
+                    logger.warning(f"FLAC check of {original_path} failed: {e}")
+                if check.size == size and check.digest.hexdigest() == sha256:
+                    return result(COLD_FLAC, cold_path.stat().st_size + sidecar.stat().st_size)
+                logger.warning(f"FLAC of {original_path} does not restore the original, using xz")
+                cold_path.unlink(missing_ok=True)
+            sidecar.unlink(missing_ok=True)
+
+        if extension in UNCOMPRESSED_EXTENSIONS:
+            with open(full_path, "rb") as source, lzma.open(tmp_path, "wb", preset=6) as target:
+                shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+            cold_size = tmp_path.stat().st_size
+            if cold_size <= stat.st_size * (1 - MIN_SAVING):
+                _publish(tmp_path, get_cold_path(original_path, COLD_XZ))
+                return result(COLD_XZ, cold_size)
+
+        # Compressed audio: moved as is (pays off when the cold tier is a cheaper volume)
+        shutil.copyfile(full_path, tmp_path)
+        _publish(tmp_path, get_cold_path(original_path, COLD_RAW))
+        return result(COLD_RAW, stat.st_size)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def drop_hot_original(original_path: str, mtime: float) -> bool:
+    """
+    Remove an original from original/ once its cold copy exists.
+
+    Skipped if the original is being read or changed since it was compressed.
+
+    Returns:
+        True if removed
+    """
+    fd = _lock_original(original_path, exclusive=True, blocking=False)
+    if fd is None:
+        return False
+    try:
+        full_path = AUDIO_BASE_DIR / original_path
+        try:
+            if full_path.stat().st_mtime != mtime:
+                return False
+        except FileNotFoundError:
+            return False
+        full_path.unlink()
+        return True
+    finally:
+        _unlock_original(fd)
+
+
+def find_freezable(directory: Path, changed_before: float) -> List[Tuple[str, float, int]]:
+    """
+    Originals of one directory (shard) not changed since changed_before.
+
+    Returns:
+        (original path, mtime, size) of each
+    """
+    found = []
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return found
+    with entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if max(stat.st_mtime, stat.st_ctime) < changed_before:
+                rel_path = os.path.relpath(entry.path, AUDIO_BASE_DIR).replace(os.sep, "/")
+                found.append((rel_path, stat.st_mtime, stat.st_size))
+    return found
+
+
+async def freeze_originals(db: AsyncSession, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Move originals older than ORIGINAL_COLD_AFTER_DAYS to the cold tier.
+
+    Works one shard directory of original/ at a time. An original that is
+    already in the cold tier (it came back with a repeated upload) is just
+    removed from original/.
+
+    Args:
+        db: Database session
+        limit: Maximum number of originals to freeze
+
+    Returns:
+        Frozen originals, their bytes before and after, bytes reclaimed,
+        per-format counts, originals skipped because they were in use,
+        errors
+    """
+    report: Dict[str, Any] = {
+        "frozen": 0, "bytes": 0, "cold_bytes": 0, "reclaimed_bytes": 0,
+        "by_format": {}, "busy": 0, "errors": 0
+    }
+    if settings.ORIGINAL_COLD_AFTER_DAYS <= 0:
+        report["disabled"] = True
+        return report
+    changed_before = time.time() - settings.ORIGINAL_COLD_AFTER_DAYS * 86400
+
+    async def compress(original_path: str, mtime: float, size: int, known) -> Dict[str, Any]:
+        if known is not None and await asyncio.to_thread(find_cold_copy, original_path) is not None:
+            # Came back to original/ with a repeated upload: the cold copy is still good
+            return {"format": known.format, "size": size, "cold_size": 0, "mtime": mtime}
+        return await transcode_pool.run(compress_original, original_path)
+
+    directories = []
+    if ORIGINAL_DIR.is_dir():
+        directories = [ORIGINAL_DIR] + sorted(
+            (entry for entry in ORIGINAL_DIR.iterdir() if entry.is_dir() and not entry.name.startswith(".")),
+            key=lambda entry: entry.name
+        )
+    remaining = limit
+    for directory in directories:
+        candidates = await asyncio.to_thread(find_freezable, directory, changed_before)
+        if remaining is not None:
+            candidates = candidates[:remaining]
+            remaining -= len(candidates)
+        for start in range(0, len(candidates), FREEZE_BATCH_SIZE):
+            batch = candidates[start:start + FREEZE_BATCH_SIZE]
+            known = await cold_crud.get_cold_originals(db, [path for path, _, _ in batch])
+            # Encodes queue on the transcode pool; database writes stay sequential
+            results = await asyncio.gather(
+                *(compress(path, mtime, size, known.get(path)) for path, mtime, size in batch),
+                return_exceptions=True
+            )
+            for (path, _, _), info in zip(batch, results):
+                if isinstance(info, Exception):
+                    logger.error(f"Failed to freeze {path}: {info}")
+                    report["errors"] += 1
+                    continue
+                if info["cold_size"] or path not in known:
+                    await cold_crud.save_cold_original(db, path, info["format"], info["size"], info["cold_size"])
+                if not await asyncio.to_thread(drop_hot_original, path, info["mtime"]):
+                    report["busy"] += 1
+                    continue
+                report["frozen"] += 1
+                report["bytes"] += info["size"]
+                report["cold_bytes"] += info["cold_size"]
+                report["reclaimed_bytes"] += info["size"] - info["cold_size"]
+                report["by_format"][info["format"]] = report["by_format"].get(info["format"], 0) + 1
+        if remaining == 0:
+            break
+
+    logger.info(
+        f"Cold tier: froze {report['frozen']} originals, reclaimed {report['reclaimed_bytes']} bytes"
+    )
+    return report
@@ -0,0 +1,217 @@
+"""HLS packaging of processed lesson audio (m3u8 playlist + fixed-duration segments)."""
+
+import asyncio
+import fcntl
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import logging
+from pathlib import Path
+from typing import Dict, Tuple
+
+from app.config import settings
+from app.utils.audio_processing import AUDIO_BASE_DIR, with_transcode_priority
+from app.utils.transcode_pool import transcode_pool
+
+logger = logging.getLogger(__name__)
+
+HLS_DIR = AUDIO_BASE_DIR / "hls"
+PLAYLIST_NAME = "index.m3u8"
+SEGMENT_PATTERN = re.compile(r"^segment_\d{5}\.ts$")
+VERSION_PATTERN = re.compile(r"^[0-9a-f]+-[0-9a-f]+$")
+
+PLAYLIST_MEDIA_TYPE = "application/vnd.apple.mpegurl"
+SEGMENT_MEDIA_TYPE = "video/mp2t"
+
+# Packaging in progress in this process, (lesson_id, version) -> version dir
+_packaging: Dict[Tuple[int, str], asyncio.Future] = {}
+
+
+def etag_to_version(etag: str) -> str:
+    """
+    Convert an audio ETag into the HLS version directory name.
+
+    Args:
+        etag: Quoted ETag of the processed MP3 (e.g., '"18f3a-65b1c2d3e4f5"')
+
+    Returns:
+        Version string (e.g., "18f3a-65b1c2d3e4f5")
+    """
+    return etag.strip('"')
+
+
+def get_lesson_hls_dir(lesson_id: int) -> Path:
+    """Directory holding all HLS versions of a lesson."""
+    return HLS_DIR / f"lesson_{lesson_id}"
+
+
+def get_hls_version_dir(lesson_id: int, version: str) -> Path:
+    """Directory holding one HLS version (playlist + segments) of a lesson."""
+    return get_lesson_hls_dir(lesson_id) / version
+
+
+def _lock_lesson_hls(lesson_id: int) -> int:
+    """
+    Take the cross-process lock of a lesson's HLS directory (blocking).
+
+    Held while a version is packaged and older ones are removed, so API
+    processes never package the same version twice or delete each other's
+    output.
+
+    Returns:
+        Lock fd
+    """
+    lock_dir = AUDIO_BASE_DIR / ".locks"
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    key = get_lesson_hls_dir(lesson_id).relative_to(AUDIO_BASE_DIR).as_posix()
+    lock_path = lock_dir / f"{hashlib.sha1(key.encode()).hexdigest()}.lock"
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    return fd
+
+
+def _unlock_lesson_hls(fd: int) -> None:
+    """Release a lock taken by _lock_lesson_hls."""
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def package_hls(input_path: str, output_dir: Path, version: str, segment_seconds: int) -> None:
+    """
+    Split an MP3 into fixed-duration MPEG-TS segments and write a VOD playlist.
+
+    Audio is copied, not re-encoded. Output is written to a temporary
+    directory and renamed into place, so a half-written playlist is never served.
+
+    Args:
+        input_path: Path to processed MP3 file
+        output_dir: Final version directory
+        version: Version name, used as the segment URI prefix in the playlist
+        segment_seconds: Target segment duration in seconds
+
+    Raises:
+        Exception: If packaging fails
+    """
+    tmp_dir = output_dir.with_name(f".{output_dir.name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    try:
+        cmd = [
+            "ffmpeg",
+            "-i", input_path,
+            "-vn",
+            "-c:a", "copy",
+            "-f", "hls",
+            "-hls_time", str(segment_seconds),
+            "-hls_playlist_type", "vod",
+            "-hls_segment_type", "mpegts",
+            "-hls_base_url", f"{version}/",
+            "-hls_segment_filename", str(tmp_dir / "segment_%05d.ts"),
+            "-y",
+            str(tmp_dir / PLAYLIST_NAME)
+        ]
+
+        subprocess.run(
+            with_transcode_priority(cmd),
+            capture_output=True,
+            text=True,
+            check=True
+        )
+
+        tmp_dir.rename(output_dir)
+        logger.info(f"HLS package created: {output_dir}")
+
+    except subprocess.CalledProcessError as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        logger.error(f"HLS packaging failed: {e.stderr}")
+        raise Exception(f"HLS packaging failed: {e.stderr}")
+
+
+async def ensure_hls_package(lesson_id: int, audio_path: Path, version: str) -> Path:
+    """
+    Return the HLS directory for a lesson version, packaging it on first use.
+
+    Concurrent requests share one packaging run: in-process through a
+    shared future, across processes through a lock file per lesson. ffmpeg
+    runs niced on the transcode pool, so packaging bursts queue behind
+    AUDIO_TRANSCODE_CONCURRENCY instead of starting one process each. Older
+    versions of the lesson are removed once the new one is ready. A
+    package evicted by the artifact quota is simply packaged again.
+
+    Args:
+        lesson_id: Lesson ID
+        audio_path: Path to the processed MP3 file
+        version: Current audio version (from the ETag)
+
+    Returns:
+        Path to the version directory
+    """
+    version_dir = get_hls_version_dir(lesson_id, version)
+    if (version_dir / PLAYLIST_NAME).exists():
+        return version_dir
+
+    key = (lesson_id, version)
+    future = _packaging.get(key)
+    if future is not None:
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _packaging[key] = future
+    try:
+        await _package_version(lesson_id, audio_path, version)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Retrieved: waiting requests get it raised on their own
+        raise
+    finally:
+        _packaging.pop(key, None)
+    future.set_result(version_dir)
+    return version_dir
+
+
+async def _package_version(lesson_id: int, audio_path: Path, version: str) -> None:
+    """Package a lesson version under the lesson's cross-process lock (see ensure_hls_package)."""
+    version_dir = get_hls_version_dir(lesson_id, version)
+    fd = await asyncio.to_thread(_lock_lesson_hls, lesson_id)
+    try:
+        if (version_dir / PLAYLIST_NAME).exists():
+            return  # Packaged by another process while we waited for the lock
+
+        await transcode_pool.run(
+            package_hls,
+            str(audio_path),
+            version_dir,
+            version,
+            settings.HLS_SEGMENT_SECONDS
+        )
+
+        # Drop packages made from previous uploads
+        for old_dir in get_lesson_hls_dir(lesson_id).iterdir():
+            if old_dir.name != version:
+                shutil.rmtree(old_dir, ignore_errors=True)
+
+        # Counted against the artifact quota (imported here: artifact_store imports this module)
+        from app.utils.artifact_store import artifact_store
+        from app.crud.artifact import ARTIFACT_HLS
+        await artifact_store.record(version_dir.relative_to(AUDIO_BASE_DIR).as_posix(), ARTIFACT_HLS)
+    finally:
+        await asyncio.to_thread(_unlock_lesson_hls, fd)
+
+
+def delete_hls_package(lesson_id: int) -> None:
+    """
+    Delete all HLS versions of a lesson.
+
+    Args:
+        lesson_id: Lesson ID
+    """
+    lesson_dir = get_lesson_hls_dir(lesson_id)
+    if lesson_dir.exists():
+        shutil.rmtree(lesson_dir, ignore_errors=True)
+        logger.info(f"Deleted HLS package: {lesson_dir}")
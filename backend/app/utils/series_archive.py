@@ -0,0 +1,247 @@
+"""
+On-the-fly offline pack of a lesson series.
+
+The pack is an uncompressed POSIX (pax) TAR: "manifest.json" first, then
+one "lesson_{id}.mp3" member per lesson, the same file names the mobile
+download manager uses. Tar headers are built in memory and MP3 bytes are
+read straight from the processed files, so nothing is written to disk,
+the total size is known before the first byte is sent and any byte range
+of the archive can be produced (resumable downloads).
+"""
+import hashlib
+import json
+import os
+import tarfile
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.utils.audio_response import ZEROCOPYSEND_EXTENSION
+
+ARCHIVE_MEDIA_TYPE = "application/x-tar"
+MANIFEST_NAME = "manifest.json"
+BLOCK_SIZE = tarfile.BLOCKSIZE
+
+# An archive part is literal bytes (headers, manifest, padding) or a file region
+ArchivePart = Union[bytes, Tuple[Path, int, int]]
+
+
+class ArchiveMember(NamedTuple):
+    """One lesson audio file to pack."""
+    lesson_id: int
+    lesson_number: Optional[int]
+    title: str
+    duration_seconds: Optional[int]
+    path: Path
+    size: int
+    mtime: float
+
+
+class SeriesArchive(NamedTuple):
+    """Byte layout of a series pack."""
+    parts: List[ArchivePart]
+    size: int
+    etag: str
+    mtime: float
+
+
+def _padding(size: int) -> bytes:
+    """Zero padding up to the next tar block."""
+    return b"\0" * (-size % BLOCK_SIZE)
+
+
+def _tar_header(name: str, size: int, mtime: float) -> bytes:
+    """Tar header block(s) for a regular file (pax records for non-ASCII names)."""
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    return info.tobuf(format=tarfile.PAX_FORMAT)
+
+
+def get_member_name(lesson_id: int) -> str:
+    """Archive file name of a lesson (matches the mobile app's local name)."""
+    return f"lesson_{lesson_id}.mp3"
+
+
+def build_manifest(series: dict, members: Sequence[ArchiveMember]) -> bytes:
+    """
+    Build the JSON manifest placed first in the archive.
+
+    Args:
+        series: Series info (id, name, year, teacher)
+        members: Packed lessons in archive order
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    manifest = {
+        "series": series,
+        "lessons": [
+            {
+                "id": member.lesson_id,
+                "lesson_number": member.lesson_number,
+                "title": member.title,
+                "duration_seconds": member.duration_seconds,
+                "file": get_member_name(member.lesson_id),
+                "size": member.size,
+            }
+            for member in members
+        ],
+    }
+    return json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def build_series_archive(series: dict, members: Iterable[ArchiveMember]) -> SeriesArchive:
+    """
+    Lay out the archive and compute its size and ETag.
+
+    The layout is deterministic for the same files, so the ETag stays
+    stable between requests and can be used with If-Range to resume.
+
+    Args:
+        series: Series info for the manifest
+        members: Lessons to pack, in order
+
+    Returns:
+        Archive layout
+    """
+    members = list(members)
+    mtime = max((member.mtime for member in members), default=0.0)
+
+    manifest = build_manifest(series, members)
+    parts: List[ArchivePart] = [
+        _tar_header(MANIFEST_NAME, len(manifest), mtime),
+        manifest + _padding(len(manifest)),
+    ]
+    for member in members:
+        parts.append(_tar_header(get_member_name(member.lesson_id), member.size, member.mtime))
+        if member.size:
+            parts.append((member.path, 0, member.size))
+        padding = _padding(member.size)
+        if padding:
+            parts.append(padding)
+    # End of archive: two zero blocks
+    parts.append(b"\0" * (2 * BLOCK_SIZE))
+
+    size = sum(len(part) if isinstance(part, bytes) else part[2] for part in parts)
+
+    digest = hashlib.sha1(manifest)
+    for member in members:
+        digest.update(f"{member.lesson_id}:{member.size}:{member.mtime}".encode())
+    etag = f'"{digest.hexdigest()[:32]}"'
+
+    return SeriesArchive(parts=parts, size=size, etag=etag, mtime=mtime)
+
+
+def slice_parts(parts: Sequence[ArchivePart], start: int, end: int) -> List[ArchivePart]:
+    """
+    Cut the parts covering archive bytes start..end (inclusive).
+
+    Args:
+        parts: Archive layout
+        start: First byte
+        end: Last byte
+
+    Returns:
+        Parts (bytes or file regions) of exactly that range
+    """
+    result: List[ArchivePart] = []
+    position = 0
+    for part in parts:
+        length = len(part) if isinstance(part, bytes) else part[2]
+        part_start, part_end = position, position + length
+        position = part_end
+        if part_end <= start:
+            continue
+        if part_start > end:
+            break
+
+        cut_start = max(start, part_start) - part_start
+        cut_end = min(end + 1, part_end) - part_start
+        if isinstance(part, bytes):
+            result.append(part[cut_start:cut_end])
+        else:
+            path, offset, _ = part
+            result.append((path, offset + cut_start, cut_end - cut_start))
+    return result
+
+
+class SeriesArchiveResponse(Response):
+    """
+    Streams (a byte range of) a series archive.
+
+    File regions are read with pread in a worker thread. They go through
+    "http.response.zerocopysend" instead when the server advertises it
+    (uvicorn does not; see AUDIO_OFFLOAD_MODE for kernel sendfile).
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        parts: Sequence[ArchivePart],
+        status_code: int = 200,
+        headers: Optional[dict] = None,
+        media_type: str = ARCHIVE_MEDIA_TYPE,
+        method: Optional[str] = None,
+    ) -> None:
+        self.parts = list(parts)
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.send_header_only = method is not None and method.upper() == "HEAD"
+        self.init_headers(headers)
+        content_length = sum(len(part) if isinstance(part, bytes) else part[2] for part in self.parts)
+        self.headers.setdefault("content-length", str(content_length))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if self.send_header_only or not self.parts:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zerocopy = ZEROCOPYSEND_EXTENSION in (scope.get("extensions") or {})
+        last = len(self.parts) - 1
+        for index, part in enumerate(self.parts):
+            more_body = index < last
+            if isinstance(part, bytes):
+                await send({"type": "http.response.body", "body": part, "more_body": more_body})
+                continue
+
+            path, offset, count = part
+            with open(path, "rb") as f:
+                if zerocopy:
+                    await send({
+                        "type": ZEROCOPYSEND_EXTENSION,
+                        "file": f,
+                        "offset": offset,
+                        "count": count,
+                        "more_body": more_body,
+                    })
+                else:
+                    await self._send_region(send, f.fileno(), offset, count, more_body)
+
+    async def _send_region(self, send: Send, fd: int, offset: int, count: int, more_body: bool) -> None:
+        """Positional reads in a worker thread, padded if the file shrank."""
+        remaining = count
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(os.pread, fd, min(self.chunk_size, remaining), offset)
+            if not chunk:
+                # Keep the announced layout; the client sees a corrupt member, not a hang
+                chunk = b"\0" * min(self.chunk_size, remaining)
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({
+                "type": "http.response.body",
+                "body": chunk,
+                "more_body": more_body or remaining > 0,
+            })
@@ -0,0 +1,159 @@
+"""
+HMAC-signed, time-limited audio URLs.
+
+A signed URL carries the lesson id, the audio version and an expiry:
+
+    /api/lessons/{id}/audio?v=<audio_version>&exp=<unix_ts>&sig=<hmac>
+
+so the streaming route can validate it with pure CPU work (no database or
+session lookup), and a caching reverse proxy can treat every URL as an
+immutable object. The same v/exp/sig query string is accepted by the
+lesson's HLS and waveform routes. Series archives are signed separately:
+
+    /api/series/{id}/download?exp=<unix_ts>&sig=<hmac>
+"""
+import hashlib
+import hmac
+import time
+from typing import Optional
+
+from app.config import settings
+
+
+def _signing_key() -> bytes:
+    """Key for audio URL signatures (falls back to the JWT secret)."""
+    return (settings.AUDIO_URL_SIGNING_KEY or settings.JWT_SECRET_KEY).encode()
+
+
+def compute_audio_signature(lesson_id: int, version: int, expires: int) -> str:
+    """
+    Compute the signature of an audio URL.
+
+    Args:
+        lesson_id: Lesson ID
+        version: Lesson audio version
+        expires: Expiry as a UNIX timestamp
+
+    Returns:
+        Hex HMAC-SHA256 signature (truncated to 32 chars)
+    """
+    return _sign(f"{lesson_id}:{version}:{expires}")
+
+
+def compute_series_signature(series_id: int, expires: int) -> str:
+    """
+    Compute the signature of a series archive URL.
+
+    Args:
+        series_id: Series ID
+        expires: Expiry as a UNIX timestamp
+
+    Returns:
+        Hex HMAC-SHA256 signature (truncated to 32 chars)
+    """
+    return _sign(f"series:{series_id}:{expires}")
+
+
+def _sign(message: str) -> str:
+    """Truncated hex HMAC-SHA256 of a message."""
+    return hmac.new(_signing_key(), message.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def get_expiry(now: Optional[float] = None) -> int:
+    """
+    Get the expiry for a new signed URL.
+
+    Expiries are rounded up to AUDIO_URL_EXPIRY_BUCKET_SECONDS so that the
+    same lesson gets the same URL for a while, which keeps list responses
+    and proxy caches stable.
+
+    Args:
+        now: Current UNIX time (default: time.time())
+
+    Returns:
+        Expiry as a UNIX timestamp
+    """
+    now = time.time() if now is None else now
+    bucket = max(1, settings.AUDIO_URL_EXPIRY_BUCKET_SECONDS)
+    expires = int(now) + settings.AUDIO_URL_TTL_SECONDS
+    return -(-expires // bucket) * bucket
+
+
+def sign_audio_url(lesson_id: int, version: int, base_url: str = "/api/lessons") -> str:
+    """
+    Build a signed, expiring audio URL for a lesson.
+
+    Args:
+        lesson_id: Lesson ID
+        version: Lesson audio version
+        base_url: Base API URL
+
+    Returns:
+        Signed audio streaming URL
+    """
+    expires = get_expiry()
+    signature = compute_audio_signature(lesson_id, version, expires)
+    return f"{base_url}/{lesson_id}/audio?v={version}&exp={expires}&sig={signature}"
+
+
+def verify_audio_signature(
+    lesson_id: int,
+    version: int,
+    expires: int,
+    signature: str,
+    now: Optional[float] = None
+) -> bool:
+    """
+    Check an audio URL signature and expiry.
+
+    Args:
+        lesson_id: Lesson ID from the path
+        version: Audio version from the query string
+        expires: Expiry from the query string
+        signature: Signature from the query string
+        now: Current UNIX time (default: time.time())
+
+    Returns:
+        True if the signature is valid and not expired
+    """
+    now = time.time() if now is None else now
+    if expires < now:
+        return False
+    expected = compute_audio_signature(lesson_id, version, expires)
+    return hmac.compare_digest(expected, signature)
+
+
+def sign_series_download_url(series_id: int, base_url: str = "/api/series") -> str:
+    """
+    Build a signed, expiring series archive URL.
+
+    Args:
+        series_id: Series ID
+        base_url: Base API URL
+
+    Returns:
+        Signed series download URL
+    """
+    expires = get_expiry()
+    signature = compute_series_signature(series_id, expires)
+    return f"{base_url}/{series_id}/download?exp={expires}&sig={signature}"
+
+
+def verify_series_signature(series_id: int, expires: int, signature: str, now: Optional[float] = None) -> bool:
+    """
+    Check a series archive URL signature and expiry.
+
+    Args:
+        series_id: Series ID from the path
+        expires: Expiry from the query string
+        signature: Signature from the query string
+        now: Current UNIX time (default: time.time())
+
+    Returns:
+        True if the signature is valid and not expired
+    """
+    now = time.time() if now is None else now
+    if expires < now:
+        return False
+    expected = compute_series_signature(series_id, expires)
+    return hmac.compare_digest(expected, signature)
@@ -0,0 +1,405 @@
+"""
+Consistency audit of the audio directory against the lessons table.
+
+Files are left behind when delete_audio_files fails (errors are only
+logged), when an upload dies halfway, and when lessons are soft-deleted.
+The audit compares original/ with the cold tier, processed/ (renditions
+and the seek/peaks sidecars included), hls/ and the legacy
+lesson_{id}.mp3 files against what lessons reference, and reports orphaned files, referenced files that
+are missing and the bytes of each. With reclaim the orphans are deleted.
+
+Both sides are written to sorted runs in temporary files (an external
+merge sort) and merged in a single pass, so memory is bounded by
+AUDIT_RUN_SIZE records however many files and lessons there are. Every
+record carries a key: the path lessons reference (a sidecar is keyed by
+its MP3, an HLS directory by hls/lesson_{id}, a cold copy by its
+original); all records of a key meet in the merge.
+
+Files changed less than STORAGE_AUDIT_GRACE_SECONDS ago are never
+reported as orphans: they may belong to an upload whose lesson row is not
+written yet.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud import artifact as artifact_crud
+from app.crud import cold_original as cold_crud
+from app.crud import job as job_crud
+from app.crud import lesson as lesson_crud
+from app.crud import upload_session as upload_crud
+from app.jobs import JOB_PROCESS_LESSON_AUDIO
+from app.utils.audio_processing import AUDIO_BASE_DIR, ORIGINAL_DIR, PROCESSED_DIR
+from app.utils.cold_storage import RIFF_SIDECAR_SUFFIX, get_cold_dir, get_original_path
+from app.utils.hls import HLS_DIR
+from app.utils.seek_index import SEEK_INDEX_SUFFIX
+from app.utils.waveform_peaks import WAVEFORM_PEAKS_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+# Records kept in memory before a sorted run is spilled to disk
+AUDIT_RUN_SIZE = 50000
+
+# Orphaned / missing paths listed in the report
+AUDIT_SAMPLE_LIMIT = 100
+
+# Artifact rows forgotten per statement after reclaim
+FORGET_BATCH_SIZE = 500
+
+LEGACY_AUDIO_NAME = re.compile(r"lesson_\d+\.mp3")
+
+# Reference states
+REF_ACTIVE = "active"  # Active lesson
+REF_INACTIVE = "inactive"  # Soft-deleted lesson
+REF_PENDING = "pending"  # Upload waiting for its processing job or still receiving chunks
+REF_EVICTED = "evicted"  # Derived artifact deleted by the quota, restored on demand
+
+
+def normalize_audio_path(path: str) -> str:
+    """Path relative to AUDIO_FILES_PATH as stored in lessons ("audio_files/" prefix dropped)."""
+    return path[len("audio_files/"):] if path.startswith("audio_files/") else path
+
+
+def get_record_key(rel_path: str) -> str:
+    """Key of a file: sidecars belong to their MP3, HLS files to their lesson directory."""
+    if rel_path.startswith("hls/"):
+        return "/".join(rel_path.split("/")[:2])
+    for suffix in (SEEK_INDEX_SUFFIX, WAVEFORM_PEAKS_SUFFIX):
+        if rel_path.endswith(suffix):
+            return rel_path[:-len(suffix)]
+    return rel_path
+
+
+def get_cold_record_key(cold_name: str) -> str:
+    """Key of a file in the cold tier: its original (temporary files keep their own name)."""
+    if cold_name.endswith(RIFF_SIDECAR_SUFFIX):
+        cold_name = cold_name[:-len(RIFF_SIDECAR_SUFFIX)]
+    return get_original_path(cold_name) or f"cold/{cold_name}"
+
+
+def get_area(path: str) -> str:
+    """Report area of a file: original, processed, renditions, hls, cold or legacy."""
+    if path.startswith("processed/renditions/"):
+        return "renditions"
+    area = path.split("/", 1)[0]
+    return area if area in ("original", "processed", "hls", "cold") else "legacy"
+
+
+def is_required(key: str) -> bool:
+    """Whether a referenced key must exist (HLS packages and legacy files are optional)."""
+    return key.startswith(("original/", "processed/"))
+
+
+class SortedSpool:
+    """
+    Records sorted with bounded memory.
+
+    Records (JSON-serializable lists) are buffered and, every run_size of
+    them, sorted and written to a temporary file; iterating merges the runs.
+    """
+
+    def __init__(self, directory: str, run_size: int = AUDIT_RUN_SIZE):
+        self.directory = directory
+        self.run_size = run_size
+        self.buffer: List[list] = []
+        self.runs: List[str] = []
+
+    def add(self, record: list) -> None:
+        """Add a record."""
+        self.buffer.append(record)
+        if len(self.buffer) >= self.run_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        self.buffer.sort()
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix=".run")
+        with os.fdopen(fd, "w", encoding="utf-8") as run:
+            for record in self.buffer:
+                run.write(json.dumps(record, ensure_ascii=False))
+                run.write("\n")
+        self.runs.append(path)
+        self.buffer = []
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator[list]:
+        with open(path, encoding="utf-8") as run:
+            for line in run:
+                yield json.loads(line)
+
+    def __iter__(self) -> Iterator[list]:
+        self.buffer.sort()
+        return heapq.merge(*(self._read_run(path) for path in self.runs), iter(self.buffer))
+
+
+async def collect_references(db: AsyncSession, spool: SortedSpool) -> int:
+    """
+    Write every path the database references to the spool.
+
+    Records: [key, "ref", state, lesson_id]
+
+    Returns:
+        Number of lessons read
+    """
+    lessons = 0
+    async for lesson_id, is_active, audio_path, original_path, renditions in \
+            lesson_crud.iter_lesson_audio_references(db):
+        lessons += 1
+        state = REF_ACTIVE if is_active else REF_INACTIVE
+        # Served as a fallback when audio_path is empty or missing
+        spool.add([f"lesson_{lesson_id}.mp3", "ref", state, lesson_id])
+        if audio_path:
+            spool.add([normalize_audio_path(audio_path), "ref", state, lesson_id])
+            spool.add([f"hls/lesson_{lesson_id}", "ref", state, lesson_id])
+        if original_path:
+            spool.add([normalize_audio_path(original_path), "ref", state, lesson_id])
+        for rendition in lesson_crud.parse_renditions(renditions).values():
+            if rendition.get("path"):
+                spool.add([normalize_audio_path(str(rendition["path"])), "ref", state, lesson_id])
+
+    for upload_id in await upload_crud.get_active_upload_ids(db):
+        spool.add([f"original/.upload-{upload_id}.part", "ref", REF_PENDING, 0])
+    for payload in await job_crud.get_unfinished_job_payloads(db, JOB_PROCESS_LESSON_AUDIO):
+        if payload.get("original_name"):
+            spool.add([f"original/{payload['original_name']}", "ref", REF_PENDING, 0])
+
+    async for path in artifact_crud.iter_evicted_artifact_paths(db):
+        spool.add([path, "ref", REF_EVICTED, 0])
+    return lessons
+
+
+def _walk_files(directory: str) -> Iterator[os.DirEntry]:
+    """All files under a directory (symlinks are not followed)."""
+    stack = [directory]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def _changed_at(stat: os.stat_result) -> float:
+    """Last change of a file; ctime is included because copies may keep an old mtime."""
+    return max(stat.st_mtime, stat.st_ctime)
+
+
+def collect_files(spool: SortedSpool) -> None:
+    """
+    Write every audio file on disk to the spool (blocking, run in a thread).
+
+    Records: [key, "disk", path, size, changed_at]; an HLS lesson directory
+    is one record with the total size of its files. Paths are relative to
+    AUDIO_FILES_PATH, except in a cold tier outside it (absolute).
+    """
+    base = str(AUDIO_BASE_DIR)
+    if AUDIO_BASE_DIR.is_dir():
+        with os.scandir(base) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False) and LEGACY_AUDIO_NAME.fullmatch(entry.name):
+                    stat = entry.stat(follow_symlinks=False)
+                    spool.add([entry.name, "disk", entry.name, stat.st_size, _changed_at(stat)])
+
+    for directory in (ORIGINAL_DIR, PROCESSED_DIR):
+        for entry in _walk_files(str(directory)):
+            rel_path = os.path.relpath(entry.path, base).replace(os.sep, "/")
+            stat = entry.stat(follow_symlinks=False)
+            spool.add([get_record_key(rel_path), "disk", rel_path, stat.st_size, _changed_at(stat)])
+
+    cold_dir = get_cold_dir()
+    for entry in _walk_files(str(cold_dir)):
+        cold_name = os.path.relpath(entry.path, cold_dir).replace(os.sep, "/")
+        try:
+            path = Path(entry.path).relative_to(AUDIO_BASE_DIR).as_posix()
+        except ValueError:
+            path = entry.path
+        stat = entry.stat(follow_symlinks=False)
+        spool.add([get_cold_record_key(cold_name), "disk", path, stat.st_size, _changed_at(stat)])
+
+    if HLS_DIR.is_dir():
+        with os.scandir(HLS_DIR) as entries:
+            lesson_dirs = [entry.name for entry in entries if entry.is_dir(follow_symlinks=False)]
+        for name in lesson_dirs:
+            size, changed_at = 0, os.stat(HLS_DIR / name).st_ctime
+            for entry in _walk_files(str(HLS_DIR / name)):
+                stat = entry.stat(follow_symlinks=False)
+                size += stat.st_size
+                changed_at = max(changed_at, _changed_at(stat))
+            key = f"hls/{name}"
+            spool.add([key, "disk", key, size, changed_at])
+
+
+def _delete_file(rel_path: str) -> List[str]:
+    """
+    Delete an orphaned file or HLS directory.
+
+    Returns:
+        Artifact keys the deleted files were tracked under
+    """
+    full_path = AUDIO_BASE_DIR / rel_path  # Absolute paths (cold tier) stay as they are
+    if rel_path.startswith("hls/"):
+        versions = [f"{rel_path}/{name}" for name in os.listdir(full_path)]
+        shutil.rmtree(full_path)
+        return versions
+    full_path.unlink(missing_ok=True)
+    return [rel_path] if rel_path.startswith("processed/") and get_record_key(rel_path) == rel_path else []
+
+
+def _new_totals() -> Dict[str, int]:
+    return {"files": 0, "bytes": 0}
+
+
+def _add(totals: Dict[str, int], files: List[list]) -> None:
+    totals["files"] += len(files)
+    totals["bytes"] += sum(record[3] for record in files)
+
+
+def merge_records(
+    references: SortedSpool,
+    files: SortedSpool,
+    reclaim: bool,
+    changed_before: float
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Merge references with files in one pass (blocking, run in a thread).
+
+    Args:
+        references: Spool filled by collect_references
+        files: Spool filled by collect_files
+        reclaim: Delete orphaned files
+        changed_before: Files changed later are too recent to be orphans
+
+    Returns:
+        (report, artifact keys of deleted files and originals removed from the cold tier)
+    """
+    categories = ("referenced", "inactive", "orphaned", "recent")
+    report: Dict[str, Any] = {category: _new_totals() for category in categories}
+    report.update({
+        "missing": 0,
+        "evicted": 0,
+        "by_area": {},
+        "orphans": [],
+        "missing_files": []
+    })
+    if reclaim:
+        report["reclaimed"] = {"files": 0, "bytes": 0, "errors": 0}
+    forgotten: List[str] = []
+
+    merged = heapq.merge(references, files, key=lambda record: record[0])
+    for key, group in groupby(merged, key=lambda record: record[0]):
+        on_disk: List[list] = []
+        states = set()
+        lesson_ids = set()
+        for record in group:
+            if record[1] == "disk":
+                on_disk.append(record)
+            else:
+                states.add(record[2])
+                if record[3]:
+                    lesson_ids.add(record[3])
+
+        if not on_disk:
+            if lesson_ids and is_required(key):
+                if REF_EVICTED in states:
+                    report["evicted"] += 1
+                else:
+                    report["missing"] += 1
+                    if len(report["missing_files"]) < AUDIT_SAMPLE_LIMIT:
+                        report["missing_files"].append({"path": key, "lesson_ids": sorted(lesson_ids)})
+            continue
+
+        areas = []
+        for record in on_disk:
+            area = report["by_area"].setdefault(
+                "cold" if os.path.isabs(record[2]) else get_area(record[2]),
+                {"files": 0, "bytes": 0, "orphaned_bytes": 0}
+            )
+            _add(area, [record])
+            areas.append(area)
+
+        if states & {REF_ACTIVE, REF_PENDING}:
+            _add(report["referenced"], on_disk)
+        elif REF_INACTIVE in states:
+            _add(report["inactive"], on_disk)
+        elif max(record[4] for record in on_disk) >= changed_before:
+            _add(report["recent"], on_disk)
+        else:
+            _add(report["orphaned"], on_disk)
+            for record, area in zip(on_disk, areas):
+                area["orphaned_bytes"] += record[3]
+                if len(report["orphans"]) < AUDIT_SAMPLE_LIMIT:
+                    report["orphans"].append({"path": record[2], "size": record[3]})
+                if not reclaim:
+                    continue
+                try:
+                    forgotten.extend(_delete_file(record[2]))
+                except OSError as e:
+                    logger.error(f"Failed to delete orphaned {record[2]}: {e}")
+                    report["reclaimed"]["errors"] += 1
+                    continue
+                report["reclaimed"]["files"] += 1
+                report["reclaimed"]["bytes"] += record[3]
+            if reclaim and key.startswith("original/"):
+                forgotten.append(key)
+
+    report["files"] = sum(report[category]["files"] for category in categories)
+    report["bytes"] = sum(report[category]["bytes"] for category in categories)
+    return report, forgotten
+
+
+async def audit_storage(db: AsyncSession, reclaim: bool = False) -> Dict[str, Any]:
+    """
+    Compare the audio directory with the lessons table.
+
+    Args:
+        db: Database session
+        reclaim: Delete orphaned files (the default only reports)
+
+    Returns:
+        Files/bytes that are referenced, referenced only by soft-deleted
+        lessons (inactive), orphaned or too recent to judge; the number of
+        missing and evicted files; per-area totals; up to AUDIT_SAMPLE_LIMIT
+        orphans and missing files; with reclaim, the files and bytes deleted
+    """
+    started = time.time()
+    # References are read before the disk walk: a file written in between
+    # is newer than the grace cutoff, never an orphan
+    changed_before = started - settings.STORAGE_AUDIT_GRACE_SECONDS
+
+    with tempfile.TemporaryDirectory(prefix="storage-audit-") as work_dir:
+        references = SortedSpool(work_dir)
+        lessons = await collect_references(db, references)
+        files = SortedSpool(work_dir)
+        await asyncio.to_thread(collect_files, files)
+        report, forgotten = await asyncio.to_thread(merge_records, references, files, reclaim, changed_before)
+
+    for start in range(0, len(forgotten), FORGET_BATCH_SIZE):
+        batch = forgotten[start:start + FORGET_BATCH_SIZE]
+        await artifact_crud.forget_artifacts(db, [key for key in batch if not key.startswith("original/")])
+        await cold_crud.forget_cold_originals(db, [key for key in batch if key.startswith("original/")])
+
+    report["lessons"] = lessons
+    report["reclaim"] = reclaim
+    report["duration_seconds"] = round(time.time() - started, 1)
+    logger.info(
+        f"Storage audit: {report['files']} files, {report['orphaned']['files']} orphaned "
+        f"({report['orphaned']['bytes']} bytes), {report['missing']} missing"
+        + (f", reclaimed {report['reclaimed']['bytes']} bytes" if reclaim else "")
+    )
+    return report
@@ -0,0 +1,84 @@
+"""
+Bounded executor for transcoding and probing.
+
+ffmpeg/ffprobe calls (including waveform decoding) block for as long as the
+file takes to process. Running them on the event loop froze the whole
+uvicorn worker, including every audio stream it was serving. They now run
+on a dedicated thread pool of AUDIO_TRANSCODE_CONCURRENCY workers: each
+worker thread only waits on its ffmpeg child process, so the limit bounds
+the number of concurrent ffmpeg processes, and further jobs queue in FIFO
+order instead of competing for CPU with the streaming path.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+
+from app.config import settings
+
+
+class TranscodePool:
+    """Dedicated, size-limited executor with queue counters."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="transcode"
+        )
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _call(self, func: Callable[..., Any]) -> Any:
+        """Run a job in a worker thread, keeping the counters."""
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            result = func()
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.running -= 1
+        with self._lock:
+            self.completed += 1
+        return result
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking function on the pool and wait for its result.
+
+        Args:
+            func: Blocking function (ffmpeg/ffprobe wrapper)
+            *args: Positional arguments
+            **kwargs: Keyword arguments
+
+        Returns:
+            Function result
+        """
+        with self._lock:
+            self.queued += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, partial(func, *args, **kwargs))
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+
+# Global pool instance (one per worker process)
+transcode_pool = TranscodePool(max_workers=settings.AUDIO_TRANSCODE_CONCURRENCY)
@@ -1,18 +1,252 @@
 """
 Waveform generation utilities for audio files.
+
+Audio is decoded by ffmpeg straight to 8 kHz mono 16-bit PCM and streamed
+through a pipe into WaveformAccumulator, so memory stays constant however
+long the lecture is.
 """
 import json
+import subprocess
+import tempfile
 from pathlib import Path
 from typing import List, Optional
 import numpy as np
-from pydub import AudioSegment
+
+
+# Sample rate of the PCM fed to WaveformAccumulator (plenty for an amplitude envelope)
+WAVEFORM_SAMPLE_RATE = 8000
+
+# Bytes read from the ffmpeg pipe per iteration
+PCM_READ_SIZE = 256 * 1024
+
+# Per-bucket statistics generate_waveform can draw
+WAVEFORM_MODES = ("rms", "peak")
+
+
+class WaveformAccumulator:
+    """
+    Constant-memory amplitude envelope of a PCM stream.
+
+    Samples are reduced to fixed-size blocks (sum of squares, peak, count)
+    with vectorized reshape operations. When the block table is full,
+    adjacent blocks are merged pairwise and the block size doubles, so
+    memory stays bounded by max_blocks no matter how long the audio is.
+    Any number of waveform points can be read at the end.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = WAVEFORM_SAMPLE_RATE,
+        block_size: int = 32,
+        max_blocks: int = 65536
+    ):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.max_blocks = max_blocks - max_blocks % 2
+        self.sample_count = 0
+        self._sum_sq = np.zeros(self.max_blocks, dtype=np.float64)
+        self._peak = np.zeros(self.max_blocks, dtype=np.int32)
+        self._blocks = 0
+        self._pending = np.zeros(0, dtype=np.int16)
+
+    @property
+    def duration_seconds(self) -> float:
+        """Duration of the audio fed so far."""
+        return self.sample_count / self.sample_rate
+
+    def add_pcm(self, data: bytes) -> None:
+        """
+        Feed signed 16-bit little-endian mono PCM.
+
+        Args:
+            data: Raw PCM bytes (an odd trailing byte is ignored)
+        """
+        samples = np.frombuffer(data[:len(data) - len(data) % 2], dtype="<i2")
+        self.add_samples(samples)
+
+    def add_samples(self, samples: np.ndarray) -> None:
+        """
+        Feed 16-bit samples.
+
+        Args:
+            samples: 1-D int16 array
+        """
+        self.sample_count += len(samples)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+
+        while True:
+            full = min(len(samples) // self.block_size, self.max_blocks - self._blocks)
+            if full:
+                end = full * self.block_size
+                blocks = samples[:end].astype(np.int32).reshape(full, self.block_size)
+                self._sum_sq[self._blocks:self._blocks + full] = np.einsum(
+                    "ij,ij->i", blocks, blocks, dtype=np.float64
+                )
+                self._peak[self._blocks:self._blocks + full] = np.abs(blocks).max(axis=1)
+                self._blocks += full
+                samples = samples[end:]
+            if self._blocks < self.max_blocks or len(samples) < self.block_size:
+                break
+            # Table full: merge it and continue with the doubled block size
+            self._merge()
+
+        self._pending = samples.copy()
+
+    def _merge(self) -> None:
+        """Halve the block table by merging adjacent blocks."""
+        half = self._blocks // 2
+        self._sum_sq[:half] = self._sum_sq[:self._blocks].reshape(half, 2).sum(axis=1)
+        self._peak[:half] = self._peak[:self._blocks].reshape(half, 2).max(axis=1)
+        self._sum_sq[half:] = 0
+        self._peak[half:] = 0
+        self._blocks = half
+        self.block_size *= 2
+
+    def _block_table(self):
+        """Blocks as (sum_sq, peak, count) arrays, including the partial last block."""
+        sum_sq = self._sum_sq[:self._blocks]
+        peak = self._peak[:self._blocks]
+        counts = np.full(self._blocks, self.block_size, dtype=np.float64)
+        if len(self._pending):
+            pending = self._pending.astype(np.int64)
+            sum_sq = np.append(sum_sq, float(np.dot(pending, pending)))
+            peak = np.append(peak, int(np.abs(pending).max()))
+            counts = np.append(counts, float(len(pending)))
+        return sum_sq, peak, counts
+
+    def _bucket_index(self, blocks: int, points: int) -> np.ndarray:
+        """Waveform point each block belongs to."""
+        return (np.arange(blocks, dtype=np.int64) * points) // max(blocks, 1)
+
+    def rms(self, points: int) -> np.ndarray:
+        """
+        RMS amplitude per waveform point.
+
+        Args:
+            points: Number of points
+
+        Returns:
+            Float array of length points (0 for points without samples)
+        """
+        sum_sq, _, counts = self._block_table()
+        if not len(sum_sq):
+            return np.zeros(points)
+        index = self._bucket_index(len(sum_sq), points)
+        total_sq = np.bincount(index, weights=sum_sq, minlength=points)
+        total_count = np.bincount(index, weights=counts, minlength=points)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.nan_to_num(np.sqrt(total_sq / total_count))
+
+    def peaks(self, points: int) -> np.ndarray:
+        """
+        Peak absolute amplitude per waveform point.
+
+        Args:
+            points: Number of points
+
+        Returns:
+            Int array of length points (0 for points without samples)
+        """
+        _, peak, _ = self._block_table()
+        result = np.zeros(points, dtype=np.int32)
+        if len(peak):
+            np.maximum.at(result, self._bucket_index(len(peak), points), peak)
+        return result
+
+    def waveform(self, points: int, max_amplitude: int = 100) -> List[int]:
+        """
+        Normalized RMS waveform (same scale as generate_waveform).
+
+        Args:
+            points: Number of points
+            max_amplitude: Maximum amplitude value
+
+        Returns:
+            List of amplitude values
+        """
+        return normalize_waveform(self.rms(points), max_amplitude)
+
+
+def normalize_waveform(rms_values: np.ndarray, max_amplitude: int = 100) -> List[int]:
+    """
+    Scale RMS values relative to their maximum, keeping every bar visible.
+
+    Args:
+        rms_values: RMS amplitude per point
+        max_amplitude: Maximum amplitude value
+
+    Returns:
+        List of ints in 1..max_amplitude
+    """
+    rms_values = np.asarray(rms_values, dtype=np.float64)
+    max_rms = rms_values.max() if len(rms_values) else 1.0
+    if max_rms == 0:
+        max_rms = 1.0
+    normalized = (rms_values / max_rms * max_amplitude).astype(np.int64)
+    return np.clip(normalized, 1, max_amplitude).tolist()
+
+
+def get_waveform_points(duration_seconds: float, points_per_second: int = 4) -> int:
+    """Number of waveform points for a duration (minimum 10)."""
+    return max(10, int(duration_seconds * points_per_second))
+
+
+def read_waveform_envelope(audio_path: Path) -> WaveformAccumulator:
+    """
+    Decode an audio file through an ffmpeg pipe into a WaveformAccumulator.
+
+    Args:
+        audio_path: Path to audio file (MP3, WAV, etc.)
+
+    Returns:
+        Accumulator holding the envelope of the whole file
+
+    Raises:
+        Exception: If ffmpeg fails
+    """
+    from app.utils.audio_processing import with_transcode_priority
+
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-i", str(audio_path),
+        "-map", "0:a:0",
+        "-ac", "1",
+        "-ar", str(WAVEFORM_SAMPLE_RATE),
+        "-f", "s16le",
+        "pipe:1",
+    ]
+    accumulator = WaveformAccumulator()
+
+    # stderr goes to a temporary file so a chatty ffmpeg cannot block on a full pipe
+    with tempfile.TemporaryFile() as stderr_file:
+        with subprocess.Popen(
+            with_transcode_priority(cmd),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file
+        ) as process:
+            while True:
+                chunk = process.stdout.read(PCM_READ_SIZE)
+                if not chunk:
+                    break
+                accumulator.add_pcm(chunk)
+
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode("utf-8", "replace")
+
+    if process.returncode != 0:
+        raise Exception(f"ffmpeg failed to decode {audio_path}: {stderr.strip()}")
+
+    return accumulator
 
 
 def generate_waveform(
     audio_path: Path,
     samples: int = None,
     max_amplitude: int = 100,
-    points_per_second: int = 4
+    points_per_second: int = 4,
+    mode: str = "rms"
 ) -> List[int]:
     """
     Generate waveform data from audio file.
@@ -22,81 +256,38 @@ def generate_waveform(
         samples: Number of waveform samples to generate (if None, calculated from duration)
         max_amplitude: Maximum amplitude value (default: 100)
         points_per_second: Number of waveform points per second (default: 3)
+        mode: "rms" (default) or "peak" amplitude per point
 
     Returns:
         List of amplitude values representing the waveform
     """
     try:
-        # Load audio file
-        audio = AudioSegment.from_file(str(audio_path))
-
-        # Convert to mono for simpler processing
-        if audio.channels > 1:
-            audio = audio.set_channels(1)
-
-        # Get raw audio data as numpy array
-        samples_data = np.array(audio.get_array_of_samples())
+        accumulator = read_waveform_envelope(audio_path)
 
         # Calculate samples based on duration if not provided
         if samples is None:
-            duration_seconds = len(audio) / 1000.0  # pydub uses milliseconds
-            samples = int(duration_seconds * points_per_second)
-            # Minimum 10 points for very short audio
-            samples = max(10, samples)
+            samples = get_waveform_points(accumulator.duration_seconds, points_per_second)
 
-        # Calculate how many samples per waveform point
-        chunk_size = len(samples_data) // samples
-
-        if chunk_size == 0:
-            chunk_size = 1
-
-        # First pass: calculate all RMS values to find the maximum
-        rms_values = []
-        for i in range(samples):
-            start = i * chunk_size
-            end = min(start + chunk_size, len(samples_data))
-
-            if start >= len(samples_data):
-                break
+        if mode == "peak":
+            values = accumulator.peaks(samples)
+        else:
+            values = accumulator.rms(samples)
 
-            # Get chunk of audio
-            chunk = samples_data[start:end]
-
-            # Calculate RMS (Root Mean Square) amplitude for this chunk
-            rms = np.sqrt(np.mean(chunk.astype(np.float64) ** 2))
-            rms_values.append(rms)
-
-        # Find maximum RMS for normalization
-        max_rms = max(rms_values) if rms_values else 1.0
-
-        # Prevent division by zero
-        if max_rms == 0:
-            max_rms = 1.0
-
-        # Second pass: normalize relative to the maximum RMS in this audio
-        waveform = []
-        for rms in rms_values:
-            # Normalize to 0-max_amplitude range based on actual audio dynamics
-            normalized = int((rms / max_rms) * max_amplitude)
-
-            # Ensure it's within bounds (min 1 to avoid invisible bars)
-            normalized = max(1, min(max_amplitude, normalized))
-
-            waveform.append(normalized)
-
-        return waveform
+        # Normalize relative to the maximum in this audio
+        return normalize_waveform(values, max_amplitude)
 
     except Exception as e:
         print(f"Error generating waveform for {audio_path}: {e}")
         # Return flat waveform as fallback
-        return [50] * samples
+        return [50] * (samples or 10)
 
 
 def generate_waveform_json(
     audio_path: Path,
     samples: int = None,
     max_amplitude: int = 100,
-    points_per_second: int = 3
+    points_per_second: int = 3,
+    mode: str = "rms"
 ) -> str:
     """
     Generate waveform data as JSON string.
@@ -106,11 +297,12 @@ def generate_waveform_json(
         samples: Number of waveform samples (if None, calculated from duration)
         max_amplitude: Maximum amplitude value
         points_per_second: Number of waveform points per second (default: 3)
+        mode: "rms" (default) or "peak" amplitude per point
 
     Returns:
         JSON string of waveform data
     """
-    waveform = generate_waveform(audio_path, samples, max_amplitude, points_per_second)
+    waveform = generate_waveform(audio_path, samples, max_amplitude, points_per_second, mode)
     return json.dumps(waveform)
 
 
@@ -124,9 +316,10 @@ def get_audio_duration(audio_path: Path) -> Optional[int]:
     Returns:
         Duration in seconds, or None if error
     """
+    from app.utils.audio_processing import get_audio_duration as probe_duration
+
     try:
-        audio = AudioSegment.from_file(str(audio_path))
-        return int(audio.duration_seconds)
+        return probe_duration(str(audio_path))
     except Exception as e:
         print(f"Error getting duration for {audio_path}: {e}")
         return None
@@ -0,0 +1,340 @@
+"""
+Bulk waveform regeneration engine.
+
+Runs in the worker as the generate_all_waveforms job (see app.jobs.audio),
+never on API nodes. Decoding is CPU-heavy, so lessons are processed on a
+process pool of WAVEFORM_BATCH_WORKERS processes (niced like ffmpeg) while
+the event loop only reads lesson paths and stores results. At most that
+many lessons are in flight at once, so a whole-catalog run does not flood
+the worker's transcode pool.
+
+If the pool itself dies, the batch stops in the "failed" state with the
+unfinished lessons still pending.
+
+Progress is checkpointed to a JSON file (WAVEFORM_BATCH_CHECKPOINT, on the
+shared audio volume): the ids not finished yet, counters and failures. The
+API reads its status from there and asks for cancellation with a marker
+file next to it. If the worker dies, the requeued job resumes the batch
+from the checkpoint; lessons that were in flight are simply processed again.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.crud import lesson as lesson_crud
+from app.database import AsyncSessionLocal
+from app.schemas.lesson import LessonUpdate
+from app.utils.audio import get_audio_file_path
+from app.utils.waveform_peaks import compute_lesson_waveform
+
+logger = logging.getLogger(__name__)
+
+# Minimum time between checkpoint writes (the file is always written on exit)
+CHECKPOINT_INTERVAL_SECONDS = 2.0
+
+# Failures kept in the checkpoint / status (the count is always exact)
+MAX_REPORTED_FAILURES = 100
+
+# How often the worker looks for a cancellation request
+CANCEL_CHECK_INTERVAL_SECONDS = 2.0
+
+
+class BatchAlreadyRunningError(Exception):
+    """A waveform batch is already running."""
+
+
+def get_checkpoint_path() -> Path:
+    """Path of the checkpoint file."""
+    if settings.WAVEFORM_BATCH_CHECKPOINT:
+        return Path(settings.WAVEFORM_BATCH_CHECKPOINT)
+    return Path(settings.AUDIO_FILES_PATH) / ".waveform_batch.json"
+
+
+class WaveformBatch:
+    """One bulk waveform run at a time, with checkpoint and progress."""
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._task: Optional[asyncio.Task] = None
+        self._state: Dict[str, object] = {}
+        self._pending: Dict[int, None] = {}  # Ordered set of ids not finished yet
+        self._last_checkpoint = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        """Whether a batch task is active in this process."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self, batch_id: str, lesson_ids: List[int], samples: int, regenerate: bool) -> Dict[str, object]:
+        """
+        Start a batch.
+
+        Args:
+            batch_id: Identifies the run in the checkpoint (see resume)
+            lesson_ids: Lessons to process
+            samples: Number of waveform samples
+            regenerate: Recorded for the status report
+
+        Returns:
+            Batch status
+
+        Raises:
+            BatchAlreadyRunningError: If a batch is running
+        """
+        if self.is_running:
+            raise BatchAlreadyRunningError("Waveform generation is already running")
+
+        now = time.time()
+        self._pending = dict.fromkeys(lesson_ids)
+        self._state = {
+            "batch_id": batch_id,
+            "state": "running",
+            "samples": samples,
+            "regenerate": regenerate,
+            "total": len(lesson_ids),
+            "completed": 0,
+            "failed_count": 0,
+            "failed": {},
+            "error": None,
+            "started_at": now,
+            "updated_at": now,
+        }
+        await asyncio.to_thread(get_cancel_marker_path().unlink, missing_ok=True)
+        await self._launch()
+        return self.status()
+
+    async def resume(self, batch_id: str) -> bool:
+        """
+        Resume a batch whose worker died (the job was requeued).
+
+        Args:
+            batch_id: Run to resume; a checkpoint of another run is ignored
+
+        Returns:
+            True if the batch was resumed
+        """
+        checkpoint = await asyncio.to_thread(read_checkpoint)
+        if (
+            not checkpoint or checkpoint.get("state") != "running"
+            or checkpoint.get("batch_id") != batch_id or self.is_running
+        ):
+            return False
+
+        self._pending = dict.fromkeys(checkpoint.pop("pending", []))
+        self._state = checkpoint
+        logger.info(f"Resuming waveform batch: {len(self._pending)} lessons left")
+        await self._launch()
+        return True
+
+    async def wait(self) -> Dict[str, object]:
+        """
+        Wait for the batch to finish, stopping it if cancellation is requested.
+
+        Returns:
+            Final batch status
+        """
+        try:
+            while self.is_running:
+                if await asyncio.to_thread(is_cancel_requested):
+                    self._task.cancel()
+                    try:
+                        await self._task
+                    except asyncio.CancelledError:
+                        pass
+                    self._state["state"] = "cancelled"
+                    await self._write_checkpoint(force=True)
+                    break
+                await asyncio.wait({self._task}, timeout=CANCEL_CHECK_INTERVAL_SECONDS)
+            else:
+                # Unexpected errors fail the job (its retry resumes the batch)
+                self._task.result()
+        except asyncio.CancelledError:
+            # Worker shutting down: keep the checkpoint resumable
+            await self.shutdown()
+            raise
+        finally:
+            await asyncio.to_thread(get_cancel_marker_path().unlink, missing_ok=True)
+        return self.status()
+
+    async def shutdown(self) -> None:
+        """Stop without finishing, leaving the checkpoint resumable."""
+        if self.is_running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            await self._write_checkpoint(force=True)
+
+    def status(self) -> Dict[str, object]:
+        """Progress report (see summarize_checkpoint)."""
+        return summarize_checkpoint({**self._state, "pending": list(self._pending)}, self.workers)
+
+    async def _launch(self) -> None:
+        """Start the batch task."""
+        self._state["run_started_at"] = time.time()
+        self._state["run_completed"] = 0
+        await self._write_checkpoint(force=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Process pending lessons with at most `workers` in flight."""
+        # Pool processes are niced; ffmpeg inherits it (see with_transcode_priority)
+        nice = settings.AUDIO_TRANSCODE_NICE
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=os.nice if nice > 0 else None,
+            initargs=(nice,) if nice > 0 else ()
+        )
+        semaphore = asyncio.Semaphore(self.workers)
+        running = set()
+        try:
+            for lesson_id in list(self._pending):
+                await semaphore.acquire()
+                task = asyncio.create_task(self._process_lesson(executor, lesson_id))
+                task.add_done_callback(lambda _: semaphore.release())
+                task.add_done_callback(running.discard)
+                running.add(task)
+            if running:
+                await asyncio.gather(*running)
+
+            self._state["state"] = "completed"
+            await self._write_checkpoint(force=True)
+            logger.info(
+                f"Waveform batch finished: {self._state['completed']} done, "
+                f"{self._state['failed_count']} failed"
+            )
+        except BrokenProcessPool as e:
+            # Not the lesson's fault: stop, keeping unfinished lessons pending
+            logger.error(f"Waveform batch stopped, process pool failed: {e}")
+            self._state["state"] = "failed"
+            self._state["error"] = str(e) or "Process pool terminated"
+            await self._write_checkpoint(force=True)
+        finally:
+            for task in running:
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _process_lesson(self, executor: ProcessPoolExecutor, lesson_id: int) -> None:
+        """Generate and store the waveform of one lesson."""
+        try:
+            async with AsyncSessionLocal() as db:
+                lesson = await lesson_crud.get_lesson_by_id(db, lesson_id)
+                audio_path = None
+                if lesson and lesson.audio_path:
+                    audio_path = get_audio_file_path(audio_path=lesson.audio_path, lesson_id=lesson_id)
+            if not audio_path:
+                raise FileNotFoundError("No audio file")
+
+            loop = asyncio.get_running_loop()
+            waveform_json = await loop.run_in_executor(
+                executor, compute_lesson_waveform, str(audio_path), self._state["samples"]
+            )
+
+            async with AsyncSessionLocal() as db:
+                await lesson_crud.update_lesson(db, lesson_id, LessonUpdate(waveform_data=waveform_json))
+
+            self._state["completed"] += 1
+            self._state["run_completed"] += 1
+
+        except (asyncio.CancelledError, BrokenProcessPool):
+            raise
+        except Exception as e:
+            logger.error(f"Waveform generation failed for lesson {lesson_id}: {e}")
+            self._state["failed_count"] += 1
+            failed = self._state["failed"]
+            if len(failed) < MAX_REPORTED_FAILURES:
+                failed[str(lesson_id)] = str(e)
+
+        self._pending.pop(lesson_id, None)
+        await self._write_checkpoint()
+
+    async def _write_checkpoint(self, force: bool = False) -> None:
+        """Persist progress (throttled unless forced)."""
+        now = time.monotonic()
+        if not force and now - self._last_checkpoint < CHECKPOINT_INTERVAL_SECONDS:
+            return
+        self._last_checkpoint = now
+        self._state["updated_at"] = time.time()
+        data = json.dumps({**self._state, "pending": list(self._pending)})
+        await asyncio.to_thread(self._replace_checkpoint, data)
+
+    @staticmethod
+    def _replace_checkpoint(data: str) -> None:
+        """Write the checkpoint atomically."""
+        path = get_checkpoint_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(data)
+        os.replace(tmp_path, path)
+
+
+def read_checkpoint() -> Optional[Dict[str, object]]:
+    """Load the checkpoint file, if any."""
+    try:
+        return json.loads(get_checkpoint_path().read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def summarize_checkpoint(checkpoint: Optional[Dict[str, object]], workers: int) -> Dict[str, object]:
+    """
+    Progress report of a batch.
+
+    Args:
+        checkpoint: Checkpoint data (None - no batch has run)
+        workers: Pool size
+
+    Returns:
+        Dictionary with state, counters, rate and ETA (seconds)
+    """
+    if not checkpoint:
+        return {"state": "idle", "workers": workers}
+
+    state = dict(checkpoint)
+    remaining = len(state.pop("pending", []))
+    running = state.get("state") == "running"
+    run_completed = state.pop("run_completed", 0)
+    elapsed = time.time() - state.pop("run_started_at", 0.0) if running else 0.0
+    rate = run_completed / elapsed if elapsed > 0 and run_completed else None
+
+    return {
+        **state,
+        "workers": workers,
+        "remaining": remaining,
+        "in_flight": min(remaining, workers) if running else 0,
+        "lessons_per_minute": round(rate * 60, 2) if rate else None,
+        "eta_seconds": int(remaining / rate) if rate and running else None,
+    }
+
+
+def get_batch_status() -> Dict[str, object]:
+    """Progress of the current or last batch, from its checkpoint (any process)."""
+    return summarize_checkpoint(read_checkpoint(), settings.WAVEFORM_BATCH_WORKERS)
+
+
+def get_cancel_marker_path() -> Path:
+    """Marker file asking the worker to stop the running batch."""
+    path = get_checkpoint_path()
+    return path.with_name(f"{path.name}.cancel")
+
+
+def request_cancel() -> None:
+    """Ask the worker running the batch to stop it (checked every few seconds)."""
+    path = get_cancel_marker_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+
+
+def is_cancel_requested() -> bool:
+    """Whether cancellation of the running batch was requested."""
+    return get_cancel_marker_path().exists()
@@ -0,0 +1,177 @@
+"""
+Multi-resolution waveform peaks for MP3 files.
+
+The peak envelope of the processed MP3 is stored at several resolutions
+(WAVEFORM_PEAK_LEVELS points over the whole file) as one byte per point,
+so the player can draw an overview and zoomed-in views without shipping
+waveform JSON in every lesson list.
+
+The pyramid is stored as a compact binary sidecar next to the MP3
+("<file>.mp3.peaks"):
+
+    header:  magic b"PEAK", version (uint16), level_count (uint16),
+             duration_ms (uint32)
+    levels:  level_count x uint32 point counts (ascending)
+    body:    the levels one after another, uint8 peaks (0-255, scaled to
+             the loudest peak of the file)
+
+Processed MP3s are content-addressed, so the sidecar never goes stale and
+is shared by every lesson using the same audio.
+"""
+import json
+import os
+import secrets
+import struct
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.utils.waveform import WaveformAccumulator, read_waveform_envelope
+
+logger = logging.getLogger(__name__)
+
+WAVEFORM_PEAK_LEVELS = (100, 1000, 10000)
+WAVEFORM_PEAKS_SUFFIX = ".peaks"
+
+_MAGIC = b"PEAK"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHI")
+
+
+def get_peaks_path(audio_path: Path) -> Path:
+    """Path of the waveform peaks sidecar for an MP3 file."""
+    return Path(f"{audio_path}{WAVEFORM_PEAKS_SUFFIX}")
+
+
+def build_peak_pyramid(accumulator: WaveformAccumulator) -> Dict[int, bytes]:
+    """
+    Build the uint8 peak levels from an accumulated envelope.
+
+    Args:
+        accumulator: Envelope of the whole file
+
+    Returns:
+        Dictionary points -> uint8 peaks
+    """
+    levels = {points: accumulator.peaks(points) for points in WAVEFORM_PEAK_LEVELS}
+    # Scale every level by the loudest peak of the file (the finest level holds it)
+    max_peak = max(int(levels[WAVEFORM_PEAK_LEVELS[-1]].max(initial=0)), 1)
+    return {
+        points: np.round(peaks * (255 / max_peak)).astype(np.uint8).tobytes()
+        for points, peaks in levels.items()
+    }
+
+
+def write_peaks(audio_path: Path, accumulator: Optional[WaveformAccumulator] = None) -> Path:
+    """
+    Write the waveform peaks sidecar of an MP3.
+
+    Args:
+        audio_path: Path to MP3 file
+        accumulator: Envelope from an earlier decode (the file is decoded if None)
+
+    Returns:
+        Path to the sidecar file
+    """
+    if accumulator is None:
+        accumulator = read_waveform_envelope(audio_path)
+
+    pyramid = build_peak_pyramid(accumulator)
+    duration_ms = int(accumulator.duration_seconds * 1000)
+
+    peaks_path = get_peaks_path(audio_path)
+    # Unique per writer: the file may be built by several processes at once
+    tmp_path = peaks_path.with_name(f".{peaks_path.name}.{secrets.token_hex(4)}.tmp")
+
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(pyramid), duration_ms))
+            f.write(struct.pack(f"<{len(pyramid)}I", *pyramid.keys()))
+            for data in pyramid.values():
+                f.write(data)
+        os.replace(tmp_path, peaks_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    logger.info(f"Waveform peaks created: {peaks_path} ({', '.join(map(str, pyramid))} points)")
+    return peaks_path
+
+
+def read_peaks(audio_path: Path, points: int) -> Optional[Tuple[bytes, int]]:
+    """
+    Read peaks at a given resolution from the sidecar.
+
+    The smallest stored level with at least `points` points (or the finest
+    one) is reduced to exactly `points` points by taking the maximum.
+
+    Args:
+        audio_path: Path to MP3 file
+        points: Number of points
+
+    Returns:
+        Tuple of (uint8 peaks, duration_ms), or None if missing/invalid
+    """
+    try:
+        raw = get_peaks_path(audio_path).read_bytes()
+    except OSError:
+        return None
+
+    if len(raw) < _HEADER.size:
+        return None
+
+    magic, version, level_count, duration_ms = _HEADER.unpack_from(raw)
+    levels_size = level_count * 4
+    if (magic != _MAGIC or version != _VERSION or not level_count
+            or len(raw) < _HEADER.size + levels_size):
+        return None
+
+    levels = struct.unpack_from(f"<{level_count}I", raw, _HEADER.size)
+    if len(raw) < _HEADER.size + levels_size + sum(levels):
+        return None
+
+    # Pick the level and locate it in the body
+    offset = _HEADER.size + levels_size
+    for level in levels:
+        if level >= points or level == levels[-1]:
+            break
+        offset += level
+    peaks = np.frombuffer(raw, dtype=np.uint8, count=level, offset=offset)
+
+    if level == points:
+        return peaks.tobytes(), duration_ms
+
+    # Reduce (or stretch, past the finest level) to the requested number of points
+    if level > points:
+        result = np.zeros(points, dtype=np.uint8)
+        np.maximum.at(result, (np.arange(level, dtype=np.int64) * points) // level, peaks)
+    else:
+        result = peaks[(np.arange(points, dtype=np.int64) * level) // points]
+    return result.tobytes(), duration_ms
+
+
+def compute_lesson_waveform(audio_path: str, samples: int) -> str:
+    """
+    Decode a lesson's MP3 once: waveform JSON plus its peaks sidecar.
+
+    Used by the bulk waveform engine in pool processes (keeps imports light).
+
+    Args:
+        audio_path: Path to processed MP3 file
+        samples: Number of waveform samples
+
+    Returns:
+        JSON string of waveform data
+    """
+    envelope = read_waveform_envelope(Path(audio_path))
+    write_peaks(Path(audio_path), envelope)
+    return json.dumps(envelope.waveform(samples))
+
+
+def delete_peaks(audio_path: Path) -> None:
+    """Delete the waveform peaks sidecar of an MP3 file, if any."""
+    peaks_path = get_peaks_path(audio_path)
+    if peaks_path.exists():
+        peaks_path.unlink()
+        logger.info(f"Deleted waveform peaks: {peaks_path}")
@@ -0,0 +1,212 @@
+"""
+Background job worker.
+
+Runs the jobs queued in the jobs table (see app.crud.job). Start one or
+more per machine, on as many machines as needed; they share the queue
+through SELECT ... FOR UPDATE SKIP LOCKED:
+
+    python -m app.worker
+    python -m app.worker --concurrency 4 --types process_lesson_audio
+    python -m app.worker --once       # run due jobs, then exit
+
+Stops gracefully on SIGTERM/SIGINT: running jobs are finished first.
+While a job runs its lock is refreshed, so only jobs of dead workers are
+requeued by the stale lock check, however long a handler takes.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import traceback
+from typing import List, Optional
+
+from app.config import settings
+from app.crud import job as job_crud
+from app.database import AsyncSessionLocal, close_db
+from app.jobs import JOB_HANDLERS, PermanentJobError
+from app.models import Job
+
+logger = logging.getLogger("app.worker")
+
+# How often stale locks (workers that died mid-job) are checked
+STALE_CHECK_INTERVAL_SECONDS = 60
+
+# Lock heartbeats per JOB_LOCK_TIMEOUT_SECONDS (a few may fail before the job is stolen)
+LOCK_REFRESHES_PER_TIMEOUT = 4
+
+# Longest wait between claims while the database is failing
+MAX_CLAIM_BACKOFF_SECONDS = 60
+
+# Traceback kept in last_error
+MAX_ERROR_LENGTH = 4000
+
+
+class Worker:
+    """Claims and runs jobs with a fixed number of concurrent slots."""
+
+    def __init__(self, concurrency: int, job_types: Optional[List[str]] = None, once: bool = False):
+        self.concurrency = max(1, concurrency)
+        self.job_types = job_types or None
+        self.once = once
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Finish running jobs, then exit."""
+        if not self._stopping.is_set():
+            logger.info("Stopping worker (waiting for running jobs)...")
+            self._stopping.set()
+
+    async def run(self) -> None:
+        """Run until stopped (or, with --once, until no job is due)."""
+        logger.info(
+            f"Worker {self.worker_id} started: concurrency {self.concurrency}, "
+            f"types {', '.join(self.job_types) if self.job_types else 'all'}"
+        )
+        maintenance = asyncio.create_task(self._requeue_stale_jobs())
+        try:
+            await asyncio.gather(*(self._slot() for _ in range(self.concurrency)))
+        finally:
+            maintenance.cancel()
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    async def _slot(self) -> None:
+        """Claim and run jobs one at a time."""
+        backoff = settings.JOB_POLL_INTERVAL_SECONDS
+        while not self._stopping.is_set():
+            try:
+                async with AsyncSessionLocal() as db:
+                    job = await job_crud.claim_next_job(db, self.worker_id, self.job_types)
+                    if job is not None:
+                        await self._run_job(db, job)
+                        backoff = settings.JOB_POLL_INTERVAL_SECONDS
+                        continue
+                delay = settings.JOB_POLL_INTERVAL_SECONDS
+                backoff = settings.JOB_POLL_INTERVAL_SECONDS
+            except Exception as e:
+                # Database unavailable: keep the slot alive and back off. A job
+                # claimed before the error is requeued by the stale lock check.
+                logger.error(f"Job queue error, retrying in {backoff:g} s: {e}")
+                delay = backoff
+                backoff = min(backoff * 2, MAX_CLAIM_BACKOFF_SECONDS)
+            else:
+                if self.once:
+                    return
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_job(self, db, job: Job) -> None:
+        """Run a claimed job and record its outcome."""
+        job_id, job_type = job.id, job.type
+        payload = job_crud.parse_job_json(job.payload) or {}
+        handler = JOB_HANDLERS.get(job_type)
+        logger.info(f"Job {job_id} ({job_type}) started, attempt {job.attempts}/{job.max_attempts}")
+
+        heartbeat = asyncio.create_task(self._keep_lock(job_id))
+        try:
+            if handler is None:
+                raise PermanentJobError(f"Unknown job type: {job_type}")
+            result = await handler.run(db, payload)
+        except Exception as e:
+            permanent = isinstance(e, PermanentJobError)
+            error = str(e) if permanent else traceback.format_exc()[-MAX_ERROR_LENGTH:]
+
+            # The handler may have left the transaction broken
+            await db.rollback()
+            job = await job_crud.get_job_by_id(db, job_id)
+            await job_crud.fail_job(db, job, error, retry=not permanent)
+
+            if job.status == job_crud.JOB_FAILED:
+                logger.error(f"Job {job_id} ({job_type}) failed: {e}")
+                await self._on_failure(db, job, error)
+            else:
+                logger.warning(f"Job {job_id} ({job_type}) failed, retry at {job.run_at}: {e}")
+            return
+        finally:
+            heartbeat.cancel()
+
+        await job_crud.complete_job(db, await job_crud.get_job_by_id(db, job_id), result)
+        logger.info(f"Job {job_id} ({job_type}) succeeded")
+
+    async def _keep_lock(self, job_id: int) -> None:
+        """Refresh a running job's lock until cancelled (own session: the handler's may be busy)."""
+        interval = max(1, settings.JOB_LOCK_TIMEOUT_SECONDS / LOCK_REFRESHES_PER_TIMEOUT)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    if not await job_crud.refresh_job_lock(db, job_id, self.worker_id):
+                        logger.warning(f"Job {job_id} lock lost (requeued after a lock timeout?)")
+                        return
+            except Exception as e:
+                logger.error(f"Job {job_id} lock refresh failed: {e}")
+
+    async def _on_failure(self, db, job: Job, error: str) -> None:
+        """Run the failure hook of a job that failed for good."""
+        handler = JOB_HANDLERS.get(job.type)
+        if handler is None or handler.on_failure is None:
+            return
+        try:
+            await handler.on_failure(db, job_crud.parse_job_json(job.payload) or {}, error)
+        except Exception as cleanup_error:
+            logger.error(f"Job {job.id} cleanup failed: {cleanup_error}")
+
+    async def _requeue_stale_jobs(self) -> None:
+        """Periodically release jobs locked by workers that died."""
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    requeued, failed = await job_crud.requeue_stale_jobs(db, settings.JOB_LOCK_TIMEOUT_SECONDS)
+                    if requeued or failed:
+                        logger.warning(f"Released {requeued + len(failed)} stale jobs ({len(failed)} failed)")
+                    for job in failed:
+                        await self._on_failure(db, job, job.last_error)
+            except Exception as e:
+                logger.error(f"Stale job check failed: {e}")
+            await asyncio.sleep(STALE_CHECK_INTERVAL_SECONDS)
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run a worker until it is stopped."""
+    worker = Worker(
+        concurrency=args.concurrency,
+        job_types=args.types.split(",") if args.types else None,
+        once=args.once
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await close_db()
+
+
+def parse_args() -> argparse.Namespace:
+    """Command line arguments."""
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.WORKER_CONCURRENCY,
+        help="Jobs run at the same time (default: WORKER_CONCURRENCY)"
+    )
+    parser.add_argument(
+        "--types", default="",
+        help=f"Comma-separated job types to run (default: all of {', '.join(sorted(JOB_HANDLERS))})"
+    )
+    parser.add_argument("--once", action="store_true", help="Exit when no job is due")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.DEBUG if settings.DEBUG else logging.INFO,
+        format="%(asctime)s %(levelname)s [%(name)s] %(message)s"
+    )
+    asyncio.run(main(parse_args()))
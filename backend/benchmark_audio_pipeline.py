@@ -0,0 +1,101 @@
+"""
+Benchmark of the audio processing pipeline.
+
+Processes the same original twice and compares wall time:
+- multi-pass (previous pipeline): ffmpeg loudnorm + MP3 encode, ffprobe for
+  the duration, a second full decode for the waveform, and every
+  rendition measuring loudness again;
+- single-pass: one ffmpeg decode writes the MP3 and pipes PCM to the
+  waveform accumulator, duration and loudness come from the same run and
+  renditions reuse the measured loudness.
+
+Needs ffmpeg/ffprobe and the API settings (run inside the api container):
+
+    docker-compose exec api python benchmark_audio_pipeline.py /app/audio_files/original/<file>.wav
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.utils.audio_processing import (
+    RENDITION_LADDER,
+    convert_audio,
+    convert_to_mp3_mono,
+    get_audio_duration,
+    get_enabled_renditions,
+    transcode_single_pass,
+)
+from app.utils.waveform import generate_waveform
+
+
+def encode_renditions(input_path: str, work_dir: Path, prefix: str, loudness_stats=None) -> None:
+    """Encode the enabled renditions (optionally reusing measured loudness)."""
+    for name in get_enabled_renditions():
+        rendition = RENDITION_LADDER[name]
+        convert_audio(
+            input_path,
+            str(work_dir / f"{prefix}.{name}.{rendition['extension']}"),
+            codec=rendition["codec"],
+            bitrate=rendition["bitrate"],
+            normalize=True,
+            extra_args=rendition["extra_args"],
+            loudness_stats=loudness_stats
+        )
+
+
+def run_multi_pass(input_path: str, work_dir: Path, renditions: bool) -> float:
+    """Previous pipeline; returns wall seconds."""
+    output_path = work_dir / "multi.mp3"
+    started = time.perf_counter()
+    convert_to_mp3_mono(input_path, str(output_path), normalize=True)
+    get_audio_duration(str(output_path))
+    generate_waveform(output_path, samples=100)
+    if renditions:
+        encode_renditions(input_path, work_dir, "multi")
+    return time.perf_counter() - started
+
+
+def run_single_pass(input_path: str, work_dir: Path, renditions: bool) -> float:
+    """Single-decode pipeline; returns wall seconds."""
+    output_path = work_dir / "single.mp3"
+    started = time.perf_counter()
+    _, loudness_stats, _ = transcode_single_pass(input_path, str(output_path), normalize=True)
+    if renditions:
+        encode_renditions(input_path, work_dir, "single", loudness_stats=loudness_stats)
+    return time.perf_counter() - started
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Original audio file")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per pipeline (best is reported)")
+    parser.add_argument("--no-renditions", action="store_true", help="Only the main MP3")
+    args = parser.parse_args()
+
+    renditions = not args.no_renditions
+    duration = get_audio_duration(args.input)
+
+    print("=" * 60)
+    print("  Audio Pipeline Benchmark")
+    print("=" * 60)
+    print(f"  Input:      {args.input} ({duration} s)")
+    print(f"  Renditions: {', '.join(get_enabled_renditions()) if renditions else 'skipped'}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        multi = min(run_multi_pass(args.input, work_dir, renditions) for _ in range(args.runs))
+        single = min(run_single_pass(args.input, work_dir, renditions) for _ in range(args.runs))
+
+    hours = max(duration, 1) / 3600
+    saved = multi - single
+
+    print()
+    print(f"  {'Multi-pass':<12} {multi:8.2f} s   {multi / hours:8.1f} s per hour of audio")
+    print(f"  {'Single-pass':<12} {single:8.2f} s   {single / hours:8.1f} s per hour of audio")
+    print(f"\n  Saved: {saved / hours:.1f} s per hour of audio ({saved / multi * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark for the audio streaming endpoint.
+
+Measures throughput of full-file and range requests with N concurrent
+clients, and (optionally) the CPU time the API server process spent serving
+them, read from /proc/<pid>/stat.
+
+Run the API once with AUDIO_STREAMING_ENGINE=generator and once with
+AUDIO_STREAMING_ENGINE=pread, then compare the two reports. Under uvicorn
+"pread" is a userspace copy too (no zero-copy ASGI extensions); to measure
+kernel sendfile, point BASE_URL at nginx with AUDIO_OFFLOAD_MODE=x-accel:
+
+    python benchmark_audio_streaming.py --lesson-id 1 --clients 50 --pid <uvicorn pid>
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+BASE_URL = "http://localhost:8000/api"
+
+
+def read_process_cpu_seconds(pid: int) -> float:
+    """Return user+system CPU seconds consumed by a process (Linux only)."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime and stime are fields 14 and 15 (1-based) of the full stat line
+    utime, stime = int(fields[11]), int(fields[12])
+    return (utime + stime) / os.sysconf("SC_CLK_TCK")
+
+
+def fetch(url: str, headers: dict) -> int:
+    """Download a URL and return the number of body bytes received."""
+    received = 0
+    with requests.get(url, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=256 * 1024):
+            received += len(chunk)
+    return received
+
+
+def run_scenario(name: str, url: str, headers_list: list, clients: int, pid: int = None):
+    """Run a batch of requests concurrently and print throughput and CPU use."""
+    cpu_before = read_process_cpu_seconds(pid) if pid else None
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        total_bytes = sum(pool.map(lambda h: fetch(url, h), headers_list))
+
+    elapsed = time.perf_counter() - started
+    cpu_used = read_process_cpu_seconds(pid) - cpu_before if pid else None
+
+    print(f"\n{name}")
+    print(f"  Requests:    {len(headers_list)} ({clients} concurrent)")
+    print(f"  Transferred: {total_bytes / 1024 / 1024:.1f} MB in {elapsed:.2f} s")
+    print(f"  Throughput:  {total_bytes / 1024 / 1024 / elapsed:.1f} MB/s")
+    if cpu_used is not None:
+        print(f"  Server CPU:  {cpu_used:.2f} s "
+              f"({cpu_used / max(total_bytes / 1024 / 1024 / 1024, 1e-9):.2f} CPU-s per GB)")
+
+
+def main():
+    """Run the benchmark scenarios."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lesson-id", type=int, default=1)
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--pid", type=int, default=None, help="API server PID for CPU accounting")
+    args = parser.parse_args()
+
+    url = f"{BASE_URL}/lessons/{args.lesson_id}/audio"
+    head = requests.get(url, headers={"Range": "bytes=0-0"})
+    file_size = int(head.headers["Content-Range"].split("/")[1])
+
+    print("=" * 60)
+    print(f"  Audio streaming benchmark: lesson {args.lesson_id}, {file_size} bytes")
+    print("=" * 60)
+
+    run_scenario(
+        "Full file",
+        url,
+        [{} for _ in range(args.requests)],
+        args.clients,
+        args.pid
+    )
+
+    # Player-like seeks: 256 KB windows at random offsets
+    window = 256 * 1024
+    seeks = []
+    for _ in range(args.requests * 10):
+        start = random.randrange(0, max(1, file_size - window))
+        seeks.append({"Range": f"bytes={start}-{start + window - 1}"})
+    run_scenario("Range requests (256 KB seeks)", url, seeks, args.clients, args.pid)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Shared helpers of the upload test scripts (test_resumable_upload.py,
+test_transcode_latency.py): API login and generated test audio.
+"""
+import io
+import os
+import wave
+
+import requests
+
+
+BASE_URL = "http://localhost:8000/api"
+
+
+def login(email: str, password: str) -> str:
+    """Log in and return an access token."""
+    response = requests.post(f"{BASE_URL}/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def make_noise_wav(minutes: float) -> bytes:
+    """Build a mono 16-bit 44.1 kHz WAV of random noise."""
+    frames = int(minutes * 60 * 44100)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(44100)
+        wav.writeframes(os.urandom(frames * 2))
+    return buffer.getvalue()
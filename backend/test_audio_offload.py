@@ -0,0 +1,199 @@
+"""
+Test script for reverse-proxy audio offload (X-Accel-Redirect).
+
+Start the API with offload enabled and the local audio directory:
+
+    AUDIO_OFFLOAD_MODE=x-accel AUDIO_FILES_PATH=$PWD/audio_files uvicorn app.main:app
+
+The script runs a small stub proxy that forwards requests to the API and,
+like nginx, serves the file named in X-Accel-Redirect itself.
+"""
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import requests
+
+
+API_URL = "http://localhost:8000"
+PROXY_PORT = 8089
+PROXY_URL = f"http://localhost:{PROXY_PORT}"
+OFFLOAD_PREFIX = "/protected-audio/"
+AUDIO_FILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_files")
+
+
+class StubProxyHandler(BaseHTTPRequestHandler):
+    """Forwards to the API and follows X-Accel-Redirect like nginx."""
+
+    def do_GET(self):
+        # Internal location must not be reachable from outside
+        if self.path.startswith(OFFLOAD_PREFIX):
+            self.send_error(404)
+            return
+
+        headers = {name: value for name, value in self.headers.items() if name.lower() != "host"}
+        upstream = requests.get(API_URL + self.path, headers=headers, allow_redirects=False)
+
+        target = upstream.headers.get("X-Accel-Redirect")
+        if target is None:
+            self.send_response(upstream.status_code)
+            for name, value in upstream.headers.items():
+                if name.lower() not in ("transfer-encoding", "connection", "content-length"):
+                    self.send_header(name, value)
+            self.send_header("Content-Length", str(len(upstream.content)))
+            self.end_headers()
+            self.wfile.write(upstream.content)
+            return
+
+        self.server.offloaded += 1
+        file_path = os.path.join(AUDIO_FILES_PATH, unquote(target[len(OFFLOAD_PREFIX):]))
+        with open(file_path, "rb") as f:
+            data = f.read()
+
+        start, end, status = 0, len(data) - 1, 200
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            first, _, last = range_header[len("bytes="):].partition("-")
+            start = int(first)
+            end = int(last) if last else len(data) - 1
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", upstream.headers.get("Content-Type", "application/octet-stream"))
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+        self.wfile.write(data[start:end + 1])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_proxy():
+    """Start the stub proxy in a background thread."""
+    server = ThreadingHTTPServer(("localhost", PROXY_PORT), StubProxyHandler)
+    server.offloaded = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_api_returns_redirect_header():
+    """Test that the API answers with X-Accel-Redirect and an empty body."""
+    print("\n" + "=" * 60)
+    print("  Test 1: API Returns X-Accel-Redirect")
+    print("=" * 60)
+
+    response = requests.get(f"{API_URL}/api/lessons/1/audio")
+    print(f"Status: {response.status_code}")
+    print(f"X-Accel-Redirect: {response.headers.get('X-Accel-Redirect')}")
+    print(f"Body size: {len(response.content)} bytes")
+
+    assert response.status_code == 200, "Expected 200 OK"
+    assert response.headers.get("X-Accel-Redirect", "").startswith(OFFLOAD_PREFIX), "Missing X-Accel-Redirect"
+    assert len(response.content) == 0, "Body should be empty (proxy sends the file)"
+
+    print("OK: API hands the file off to the proxy!")
+
+
+def test_full_file_through_proxy(server):
+    """Test full file download through the stub proxy."""
+    print("\n" + "=" * 60)
+    print("  Test 2: Full File Through Proxy")
+    print("=" * 60)
+
+    before = server.offloaded
+    response = requests.get(f"{PROXY_URL}/api/lessons/1/audio")
+    expected_size = os.path.getsize(os.path.join(AUDIO_FILES_PATH, "lesson_1.mp3"))
+    print(f"Status: {response.status_code}")
+    print(f"Content-Type: {response.headers.get('Content-Type')}")
+    print(f"Size: {len(response.content)} bytes (file: {expected_size})")
+
+    assert response.status_code == 200, "Expected 200 OK"
+    assert response.headers.get("Content-Type") == "audio/mpeg", "Wrong content type"
+    assert len(response.content) == expected_size, "Size mismatch"
+    assert server.offloaded == before + 1, "Request was not offloaded"
+
+    print("OK: Proxy served the full file!")
+
+
+def test_range_through_proxy(server):
+    """Test Range request through the stub proxy."""
+    print("\n" + "=" * 60)
+    print("  Test 3: Range Request Through Proxy")
+    print("=" * 60)
+
+    direct = requests.get(f"{PROXY_URL}/api/lessons/1/audio").content
+    response = requests.get(f"{PROXY_URL}/api/lessons/1/audio", headers={"Range": "bytes=1000-1999"})
+    print(f"Status: {response.status_code}")
+    print(f"Content-Range: {response.headers.get('Content-Range')}")
+
+    assert response.status_code == 206, "Expected 206 Partial Content"
+    assert response.content == direct[1000:2000], "Range content mismatch"
+
+    print("OK: Proxy served the range!")
+
+
+def test_internal_location_hidden():
+    """Test that the internal location is not reachable directly."""
+    print("\n" + "=" * 60)
+    print("  Test 4: Internal Location Hidden")
+    print("=" * 60)
+
+    response = requests.get(f"{PROXY_URL}{OFFLOAD_PREFIX}lesson_1.mp3")
+    print(f"Status: {response.status_code}")
+
+    assert response.status_code == 404, "Internal location must not be public"
+
+    print("OK: Internal location is hidden!")
+
+
+def test_missing_lesson_not_offloaded():
+    """Test that lookup errors still come from the API."""
+    print("\n" + "=" * 60)
+    print("  Test 5: Missing Lesson (404 From API)")
+    print("=" * 60)
+
+    response = requests.get(f"{PROXY_URL}/api/lessons/999999/audio")
+    print(f"Status: {response.status_code}")
+    print(f"Response: {response.text}")
+
+    assert response.status_code == 404, "Expected 404 Not Found"
+
+    print("OK: Lookup errors are not offloaded!")
+
+
+def main():
+    """Run all tests."""
+    print("=" * 60)
+    print("  Audio Offload - Stub Proxy Integration Tests")
+    print("=" * 60)
+
+    server = start_stub_proxy()
+    try:
+        test_api_returns_redirect_header()
+        test_full_file_through_proxy(server)
+        test_range_through_proxy(server)
+        test_internal_location_hidden()
+        test_missing_lesson_not_offloaded()
+
+        print("\n" + "=" * 60)
+        print("  All tests passed!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\nFAILED: Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -185,6 +185,76 @@ def test_multiple_ranges_simulation():
     print("\nOK: Multiple seek operations work!")
 
 
+def test_conditional_requests():
+    """Test ETag / Last-Modified revalidation and If-Range."""
+    print("\n" + "=" * 60)
+    print("  Test 8: Conditional Requests (304 / If-Range)")
+    print("=" * 60)
+
+    lesson_id = 1
+    url = f"{BASE_URL}/lessons/{lesson_id}/audio"
+
+    response = requests.get(url, headers={"Range": "bytes=0-1023"})
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    print(f"ETag: {etag}")
+    print(f"Last-Modified: {last_modified}")
+    assert etag and last_modified, "Missing validators"
+
+    response = requests.get(url, headers={"If-None-Match": etag})
+    print(f"If-None-Match status: {response.status_code}")
+    assert response.status_code == 304, "Expected 304 for matching ETag"
+    assert len(response.content) == 0, "304 must not have a body"
+
+    response = requests.get(url, headers={"If-Modified-Since": last_modified})
+    print(f"If-Modified-Since status: {response.status_code}")
+    assert response.status_code == 304, "Expected 304 for unchanged file"
+
+    # Matching If-Range: range is honoured
+    response = requests.get(url, headers={"Range": "bytes=0-1023", "If-Range": etag})
+    print(f"If-Range (match) status: {response.status_code}")
+    assert response.status_code == 206, "Expected 206 for matching If-Range"
+
+    # Stale If-Range: full file is sent instead
+    response = requests.get(url, headers={"Range": "bytes=0-1023", "If-Range": '"stale"'})
+    print(f"If-Range (stale) status: {response.status_code}")
+    assert response.status_code == 200, "Expected 200 for stale If-Range"
+
+    print("OK: Conditional requests work!")
+
+
+def test_multipart_byteranges():
+    """Test several ranges in one request (multipart/byteranges)."""
+    print("\n" + "=" * 60)
+    print("  Test 9: Multi-Range Request (multipart/byteranges)")
+    print("=" * 60)
+
+    lesson_id = 1
+    url = f"{BASE_URL}/lessons/{lesson_id}/audio"
+
+    # Header + overlapping/adjacent ranges + tail: coalesced into two parts
+    headers = {"Range": "bytes=0-1023,512-2047,2048-4095,-1024"}
+    response = requests.get(url, headers=headers)
+
+    content_type = response.headers.get("Content-Type", "")
+    print(f"Status: {response.status_code}")
+    print(f"Content-Type: {content_type}")
+    print(f"Content-Length: {response.headers.get('Content-Length')} bytes")
+
+    assert response.status_code == 206, "Expected 206 Partial Content"
+    assert content_type.startswith("multipart/byteranges"), "Expected multipart body"
+    assert len(response.content) == int(response.headers["Content-Length"]), "Length mismatch"
+    assert response.content.count(b"Content-Range: bytes ") == 2, "Expected 2 coalesced parts"
+
+    # Too many ranges are rejected
+    many = ",".join(f"{i * 100}-{i * 100 + 10}" for i in range(50))
+    response = requests.get(url, headers={"Range": f"bytes={many}"})
+    print(f"Too many ranges status: {response.status_code}")
+    assert response.status_code == 416, "Expected 416 for too many ranges"
+
+    print("OK: Multi-range requests work!")
+
+
 def main():
     """Run all tests."""
     print("=" * 60)
@@ -199,6 +269,8 @@ def main():
         test_invalid_lesson()
         test_lesson_without_audio()
         test_multiple_ranges_simulation()
+        test_conditional_requests()
+        test_multipart_byteranges()
 
         print("\n" + "=" * 60)
         print("  All tests passed!")
@@ -0,0 +1,126 @@
+"""
+Test resumable chunked uploads.
+
+Uploads a generated noise WAV into a lesson through /uploads: chunks are
+sent in random order from several threads and must all be recorded, one
+chunk is cut off midway (as by a dropped connection) and resent,
+completion is refused while bytes are missing, parallel completions queue
+a single job, and the finished upload is processed by the job worker
+(python -m app.worker must be running). REPLACES the audio of the
+given lesson - use a test lesson.
+
+    python test_resumable_upload.py --lesson-id 1 --email admin@example.com --password secret
+"""
+import argparse
+import hashlib
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from script_helpers import BASE_URL, login, make_noise_wav
+
+
+def main():
+    """Run the test."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lesson-id", type=int, required=True, help="Lesson to upload into")
+    parser.add_argument("--minutes", type=float, default=10, help="Length of the uploaded WAV")
+    parser.add_argument("--parallel", type=int, default=4, help="Chunks sent at once")
+    parser.add_argument("--email", default=os.environ.get("ADMIN_EMAIL", "admin@example.com"))
+    parser.add_argument("--password", default=os.environ.get("ADMIN_PASSWORD", "admin123"))
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  Resumable Upload")
+    print("=" * 60)
+
+    token = login(args.email, args.password)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    body = make_noise_wav(args.minutes)
+    sha256 = hashlib.sha256(body).hexdigest()
+    print(f"\n  File: {len(body) / 1024 / 1024:.1f} MB, sha256 {sha256[:16]}...")
+
+    response = requests.post(
+        f"{BASE_URL}/uploads",
+        json={"lesson_id": args.lesson_id, "filename": "resumable_test.wav", "size": len(body)},
+        headers=headers
+    )
+    response.raise_for_status()
+    upload_id = response.json()["id"]
+    chunk_size = response.json()["chunk_size"]
+    upload_url = f"{BASE_URL}/uploads/{upload_id}"
+
+    offsets = list(range(0, len(body), chunk_size))
+    random.shuffle(offsets)
+    dropped = offsets.pop()
+
+    def send(offset: int, length: int = chunk_size) -> int:
+        response = requests.put(
+            upload_url, params={"offset": offset}, data=body[offset:offset + length], headers=headers
+        )
+        return response.status_code
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.parallel) as pool:
+            statuses = list(pool.map(send, offsets))
+        assert all(code == 200 for code in statuses), f"Chunk uploads failed: {set(statuses)}"
+        print(f"  Sent {len(offsets)} chunks of {chunk_size} bytes in {time.perf_counter() - started:.1f} s")
+
+        # Parallel chunks must all be recorded: only the dropped one is missing
+        state = requests.get(upload_url, headers=headers).json()
+        dropped_range = [dropped, min(dropped + chunk_size, len(body))]
+        assert state["missing_ranges"] == [dropped_range], \
+            f"Concurrent chunks lost: missing {state['missing_ranges']}, expected [{dropped_range}]"
+
+        # A connection that drops midway is simulated by a truncated chunk
+        assert send(dropped, chunk_size // 2) == 200
+        state = requests.get(upload_url, headers=headers).json()
+        print(f"  Missing after the dropped chunk: {state['missing_ranges']}")
+        assert state["missing_ranges"], "Missing bytes not reported"
+
+        response = requests.post(f"{upload_url}/complete", headers=headers)
+        assert response.status_code == 409, f"Incomplete upload accepted ({response.status_code})"
+
+        # Resume: resend what is missing
+        for start, end in state["missing_ranges"]:
+            for offset in range(start, end, chunk_size):
+                assert send(offset, min(chunk_size, end - offset)) == 200
+        offset = int(requests.head(upload_url, headers=headers).headers["Upload-Offset"])
+        assert offset == len(body), f"Upload-Offset {offset} != {len(body)}"
+
+        # Concurrent completions hand the file over once
+        with ThreadPoolExecutor(max_workers=args.parallel) as pool:
+            responses = list(pool.map(
+                lambda _: requests.post(f"{upload_url}/complete", headers=headers), range(args.parallel)
+            ))
+        for response in responses:
+            assert response.status_code == 202, f"Completion failed: {response.status_code} {response.text}"
+            assert response.json()["original_sha256"] == sha256, "SHA-256 mismatch"
+        job_ids = {response.json()["job_id"] for response in responses}
+        assert len(job_ids) == 1, f"Concurrent completions queued several jobs: {job_ids}"
+        job_id = job_ids.pop()
+        print(f"  Completed, processing job {job_id}")
+
+        while True:
+            job = requests.get(f"{BASE_URL}/jobs/{job_id}", headers=headers).json()
+            if job["status"] in ("succeeded", "failed"):
+                break
+            time.sleep(1)
+        assert job["status"] == "succeeded", f"Processing failed: {job['last_error']}"
+        print(f"  Processed: {job['result']['processed_path']} ({job['result']['duration_seconds']} s)")
+
+        print("\n" + "=" * 60)
+        print("  OK: Resumable upload works!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\nFAILED: Test failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Test that audio streaming latency stays flat while uploads are transcoded.
+
+Measures range-request latency of one lesson, first idle and then while
+several uploads (generated noise WAVs, so deduplication does not skip the
+transcode) are processed by the job worker (python -m app.worker must be
+running). Uploads REPLACE the audio of the given lessons - use test lessons.
+
+    python test_transcode_latency.py --lesson-id 1 --upload-lessons 2 3 4 \
+        --email admin@example.com --password secret
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+import requests
+
+from script_helpers import BASE_URL, login, make_noise_wav
+
+
+def probe_latency(url: str) -> float:
+    """Time one small range request in milliseconds."""
+    started = time.perf_counter()
+    response = requests.get(url, headers={"Range": "bytes=0-65535"})
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+def summarize(name: str, samples: list) -> float:
+    """Print latency percentiles and return p95."""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"  {name:<22} n={len(ordered):<4} p50={statistics.median(ordered):7.1f} ms  "
+          f"p95={p95:7.1f} ms  max={ordered[-1]:7.1f} ms")
+    return p95
+
+
+def main():
+    """Run the test."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lesson-id", type=int, default=1, help="Lesson whose audio is streamed")
+    parser.add_argument("--upload-lessons", type=int, nargs="+", required=True, help="Lessons to upload into")
+    parser.add_argument("--minutes", type=float, default=20, help="Length of each uploaded WAV")
+    parser.add_argument("--probes", type=int, default=50, help="Idle latency probes")
+    parser.add_argument("--email", default=os.environ.get("ADMIN_EMAIL", "admin@example.com"))
+    parser.add_argument("--password", default=os.environ.get("ADMIN_PASSWORD", "admin123"))
+    parser.add_argument("--max-factor", type=float, default=3.0, help="Allowed p95 growth factor")
+    parser.add_argument("--slack-ms", type=float, default=50.0, help="Allowed absolute p95 growth")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  Streaming Latency During Transcoding")
+    print("=" * 60)
+
+    token = login(args.email, args.password)
+    headers = {"Authorization": f"Bearer {token}"}
+    stream_url = f"{BASE_URL}/lessons/{args.lesson_id}/audio"
+
+    # Idle baseline
+    idle = [probe_latency(stream_url) for _ in range(args.probes)]
+
+    # Start uploads
+    print(f"\nUploading {len(args.upload_lessons)} x {args.minutes:g} min WAV...")
+    results = {}
+
+    def upload(lesson_id: int):
+        body = make_noise_wav(args.minutes)
+        response = requests.post(
+            f"{BASE_URL}/lessons/{lesson_id}/audio/stream",
+            params={"filename": f"latency_test_{lesson_id}.wav"},
+            data=body,
+            headers=headers
+        )
+        if response.status_code != 202:
+            results[lesson_id] = response.status_code
+            return
+
+        # Wait for the worker to process the upload
+        job_url = f"{BASE_URL}/jobs/{response.json()['job_id']}"
+        while True:
+            job = requests.get(job_url, headers=headers).json()
+            if job["status"] in ("succeeded", "failed"):
+                results[lesson_id] = job["status"]
+                return
+            time.sleep(0.5)
+
+    threads = [threading.Thread(target=upload, args=(lesson_id,)) for lesson_id in args.upload_lessons]
+    for thread in threads:
+        thread.start()
+
+    # Probe while uploads are processed
+    busy = []
+    queue_peak = 0
+    while any(thread.is_alive() for thread in threads):
+        busy.append(probe_latency(stream_url))
+        counts = requests.get(f"{BASE_URL}/jobs", params={"limit": 1}, headers=headers).json()["counts"]
+        queue_peak = max(queue_peak, counts.get("queued", 0) + counts.get("running", 0))
+        time.sleep(0.05)
+
+    for thread in threads:
+        thread.join()
+
+    print()
+    idle_p95 = summarize("Idle", idle)
+    busy_p95 = summarize("During transcoding", busy)
+    print(f"  Peak queued jobs:      {queue_peak}")
+    print(f"  Upload job statuses:   {results}")
+
+    try:
+        assert all(result == "succeeded" for result in results.values()), "Some uploads failed"
+        assert busy, "Uploads finished before any probe"
+        limit = idle_p95 * args.max_factor + args.slack_ms
+        assert busy_p95 <= limit, f"p95 grew from {idle_p95:.1f} ms to {busy_p95:.1f} ms (limit {limit:.1f} ms)"
+
+        print("\n" + "=" * 60)
+        print("  OK: Streaming latency stays flat while transcoding!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\nFAILED: Test failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
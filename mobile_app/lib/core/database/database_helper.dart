@@ -1,4 +1,3 @@
-import 'dart:convert';
 import 'dart:io';
 import 'package:sqflite/sqflite.dart';
 import 'package:path/path.dart';
@@ -593,7 +592,6 @@ class DatabaseHelper {
           'audio_file_path': lessonData['audio_file_path'],
           'description': lessonData['description'],
           'tags': lessonData['tags'],
-          'waveform_data': lessonData['waveform_data'],
           'is_active': lessonData['is_active'] == true ? 1 : 0,
           'series_id': lessonData['series_id'] ?? lessonData['series']?['id'],
           'teacher_id': lessonData['teacher_id'] ?? lessonData['teacher']?['id'],
@@ -627,17 +625,6 @@ class DatabaseHelper {
           final batch = txn.batch();
 
           for (final lessonData in currentBatch) {
-            // Convert waveform_data from List to JSON string if needed
-            String? waveformDataStr;
-            final waveformData = lessonData['waveform_data'];
-            if (waveformData != null) {
-              if (waveformData is List) {
-                waveformDataStr = jsonEncode(waveformData);
-              } else if (waveformData is String) {
-                waveformDataStr = waveformData;
-              }
-            }
-
             batch.insert(
               'cached_lessons',
               {
@@ -651,7 +638,6 @@ class DatabaseHelper {
                 'audio_file_path': lessonData['audio_file_path'],
                 'description': lessonData['description'],
                 'tags': lessonData['tags'],
-                'waveform_data': waveformDataStr,
                 'is_active': lessonData['is_active'] == true ? 1 : 0,
                 'series_id': lessonData['series_id'] ?? lessonData['series']?['id'],
                 'teacher_id': lessonData['teacher_id'] ?? lessonData['teacher']?['id'],
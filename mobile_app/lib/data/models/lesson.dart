@@ -182,6 +182,8 @@ class Lesson {
   final String? tags;
   @JsonKey(name: 'tags_list')
   final List<String>? tagsList;
+  /// Only sent by GET /lessons/{id}: lesson lists omit it, peaks come
+  /// from GET /lessons/{id}/waveform
   @JsonKey(name: 'waveform_data')
   final String? waveformData;
   @JsonKey(name: 'is_active')
@@ -119,7 +119,6 @@ class LessonsNotifier extends StateNotifier<LessonsState> {
           audioFilePath: data['audio_file_path'] as String?,
           description: data['description'] as String?,
           tags: data['tags'] as String?,
-          waveformData: data['waveform_data'] as String?,
           isActive: (data['is_active'] as int?) == 1,
           seriesId: data['series_id'] as int?,
           teacherId: data['teacher_id'] as int?,
@@ -1,3 +1,5 @@
+import 'dart:math';
+import 'dart:typed_data';
 import 'package:flutter/material.dart';
 import 'package:flutter/services.dart';
 import 'package:flutter_riverpod/flutter_riverpod.dart';
@@ -319,6 +321,58 @@ class _LessonFormScreenState extends ConsumerState<LessonFormScreen> {
     }
   }
 
+  /// Send one chunk of a resumable upload, retrying network errors.
+  Future<void> _uploadChunk(
+    Dio dio,
+    String uploadId,
+    int offset,
+    Uint8List chunk,
+  ) async {
+    const maxAttempts = 3;
+    for (var attempt = 1; ; attempt++) {
+      try {
+        await dio.put(
+          '/uploads/$uploadId',
+          queryParameters: {'offset': offset},
+          data: Stream.value(chunk),
+          options: Options(
+            contentType: 'application/octet-stream',
+            headers: {Headers.contentLengthHeader: chunk.length},
+          ),
+          cancelToken: _uploadCancelToken,
+        );
+        return;
+      } on DioException catch (e) {
+        final retryable = e.type != DioExceptionType.cancel &&
+            e.type != DioExceptionType.badResponse;
+        if (!retryable || attempt == maxAttempts) rethrow;
+        await Future.delayed(Duration(seconds: attempt * 2));
+      }
+    }
+  }
+
+  /// Poll the audio processing job until it finishes.
+  ///
+  /// Returns the job result (processed_path, duration_seconds, ...).
+  Future<Map<String, dynamic>> _waitForAudioJob(Dio dio, int jobId) async {
+    while (true) {
+      final response = await dio.get(
+        '/jobs/$jobId',
+        cancelToken: _uploadCancelToken,
+      );
+      final job = response.data as Map<String, dynamic>;
+
+      if (job['status'] == 'succeeded') {
+        return job['result'] as Map<String, dynamic>;
+      }
+      if (job['status'] == 'failed') {
+        throw Exception('Ошибка обработки аудио: ${job['last_error']}');
+      }
+
+      await Future.delayed(const Duration(seconds: 2));
+    }
+  }
+
   Future<void> _uploadAudio() async {
     if (_selectedAudioFile == null) return;
     if (widget.lesson == null) {
@@ -348,28 +402,39 @@ class _LessonFormScreenState extends ConsumerState<LessonFormScreen> {
         throw Exception('Не удалось прочитать файл');
       }
 
-      // Create multipart file
-      final formData = FormData.fromMap({
-        'audio_file': MultipartFile.fromBytes(
-          bytes,
-          filename: _selectedAudioFile!.name,
-        ),
-      });
+      // Resumable upload: create a session, then send chunks (a dropped
+      // connection only repeats the chunk in flight)
+      final session = await dio.post(
+        '/uploads',
+        data: {
+          'lesson_id': widget.lesson!.id,
+          'filename': _selectedAudioFile!.name,
+          'size': bytes.length,
+        },
+        cancelToken: _uploadCancelToken,
+      );
+      final uploadId = session.data['id'] as String;
+      final chunkSize = session.data['chunk_size'] as int;
+
+      for (var offset = 0; offset < bytes.length; offset += chunkSize) {
+        final end = min(offset + chunkSize, bytes.length);
+        await _uploadChunk(dio, uploadId, offset, bytes.sublist(offset, end));
+        setState(() {
+          _uploadProgress = end / bytes.length;
+        });
+      }
 
-      // Upload with progress tracking
       final response = await dio.post(
-        '/lessons/${widget.lesson!.id}/audio',
-        data: formData,
+        '/uploads/$uploadId/complete',
         cancelToken: _uploadCancelToken,
-        onSendProgress: (sent, total) {
-          setState(() {
-            _uploadProgress = sent / total;
-          });
-        },
       );
 
-      if (response.statusCode == 200) {
-        final data = response.data as Map<String, dynamic>;
+      if (response.statusCode == 202) {
+        // Processing runs in the background worker: wait for the job
+        final data = await _waitForAudioJob(
+          dio,
+          response.data['job_id'] as int,
+        );
 
         setState(() {
           _currentAudioPath = data['processed_path'] as String?;